@@ -1,38 +1,297 @@
 import serial
+import threading
 import time
 import os
+from collections import deque
+from typing import Dict, Optional
+
+from metrics import RollingHistogram
 
 # Lazy Arduino serial helper. Configure port via ARDUINO_PORT env var if needed.
 _ARDUINO_PORT = os.getenv("ARDUINO_PORT", "/dev/cu.usbmodem1201")
 _ARDUINO_BAUD = int(os.getenv("ARDUINO_BAUD", "9600"))
-_ser = None
+_QUEUE_MAX = int(os.getenv("ARDUINO_QUEUE_MAX", "32"))
+# minimum spacing between two commands of the same kind (seconds)
+_SERVO_MIN_INTERVAL_S = float(os.getenv("ARDUINO_SERVO_INTERVAL", "1.2"))
+_LCD_MIN_INTERVAL_S = float(os.getenv("ARDUINO_LCD_INTERVAL", "0.2"))
+
+# reply the sketch prints for each command (see arduino_control.ino)
+_REPLIES = {"W": "WAVE_OK", "M": "MSG_OK", "C": "CLR_OK"}
+
+
+def _expected_reply(payload: str) -> str:
+    cmd = payload.strip()
+    if cmd == "PING":
+        return "PONG"
+    return _REPLIES.get(cmd[:1], "")
+
+
+class CommandScheduler:
+    """Decides what goes on the wire next.
+
+    - servo (W): at most one pending, later ones coalesce into it
+    - lcd (M/C): one slot, the latest content wins; writes identical to what
+      the display already shows are dropped
+    - other (PING, ...): bounded FIFO
+    Each kind is rate-limited with `min_interval`, and a ready servo command
+    always goes before cosmetic LCD updates.
+    """
+
+    PRIORITY = ("servo", "lcd", "other")
+
+    def __init__(self, maxsize: int = 32, min_interval: Optional[Dict[str, float]] = None):
+        self.maxsize = int(maxsize)
+        self.min_interval = {"servo": _SERVO_MIN_INTERVAL_S, "lcd": _LCD_MIN_INTERVAL_S, "other": 0.0}
+        if min_interval:
+            self.min_interval.update(min_interval)
+        self._cond = threading.Condition()
+        self._servo: Optional[str] = None
+        self._lcd: Optional[str] = None
+        self._other: deque = deque()
+        self._last_sent_at = {k: float("-inf") for k in self.PRIORITY}
+        # what the LCD is showing (last LCD command written), None if unknown
+        self.last_lcd: Optional[str] = None
+
+        self.deduped = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    @staticmethod
+    def kind(payload: str) -> str:
+        c = payload[:1]
+        if c == "W":
+            return "servo"
+        if c in ("M", "C"):
+            return "lcd"
+        return "other"
+
+    def submit(self, payload: str) -> bool:
+        with self._cond:
+            k = self.kind(payload)
+            if k == "lcd":
+                if self._lcd is not None:
+                    if payload == self._lcd:
+                        self.deduped += 1
+                        return True
+                    self.coalesced += 1
+                    # going back to what is already displayed: nothing left to send
+                    self._lcd = None if payload == self.last_lcd else payload
+                    return True
+                if payload == self.last_lcd:
+                    self.deduped += 1
+                    return True
+                self._lcd = payload
+            elif k == "servo":
+                if self._servo is not None:
+                    self.coalesced += 1
+                    return True
+                self._servo = payload
+            else:
+                if len(self._other) >= self.maxsize:
+                    self.dropped += 1
+                    return False
+                self._other.append(payload)
+            self._cond.notify()
+            return True
+
+    def _take(self, k: str) -> Optional[str]:
+        if k == "servo":
+            p, self._servo = self._servo, None
+        elif k == "lcd":
+            p, self._lcd = self._lcd, None
+            self.last_lcd = p
+        else:
+            p = self._other.popleft()
+        return p
+
+    def _peek(self, k: str) -> Optional[str]:
+        if k == "servo":
+            return self._servo
+        if k == "lcd":
+            return self._lcd
+        return self._other[0] if self._other else None
+
+    def pop(self, timeout: float) -> Optional[str]:
+        """Next command allowed to go out, waiting up to `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                next_ready = deadline
+                for k in self.PRIORITY:
+                    if self._peek(k) is None:
+                        continue
+                    ready_at = self._last_sent_at[k] + self.min_interval[k]
+                    if ready_at <= now:
+                        self._last_sent_at[k] = now
+                        return self._take(k)
+                    next_ready = min(next_ready, ready_at)
+                if now >= deadline:
+                    return None
+                self._cond.wait(next_ready - now)
+
+    def forget_display(self) -> None:
+        """The board was reset (LCD blank): do not dedup against stale content."""
+        with self._cond:
+            self.last_lcd = None
+
+    def qsize(self) -> int:
+        with self._cond:
+            return int(self._servo is not None) + int(self._lcd is not None) + len(self._other)
+
+
+class _SerialWorker:
+    """Owns the serial port on a background thread.
+
+    Callers only enqueue commands (never block). The worker opens the port
+    (and waits for the Arduino reset) asynchronously, reconnects with
+    exponential backoff, writes what the CommandScheduler hands out and
+    matches the replies to measure the per-command round-trip time.
+    """
+
+    def __init__(self, port: str, baud: int, maxsize: int = 32):
+        self.port = port
+        self.baud = baud
+        self.scheduler = CommandScheduler(maxsize=maxsize)
+        self._ser = None
+        self._running = True
+        self._pending: deque = deque()  # (expected reply, t_sent)
+        self._backoff = 0.5
+        self._next_open = 0.0
+
+        self.rtt = RollingHistogram()
+        self.sent = 0
+        self.replies = 0
+        self.errors = 0
+
+        self._thread = threading.Thread(target=self._run, name="arduino-serial", daemon=True)
+        self._thread.start()
+
+    def submit(self, payload: str) -> bool:
+        return self.scheduler.submit(payload)
+
+    def _open(self) -> bool:
+        now = time.monotonic()
+        if now < self._next_open:
+            return False
+        try:
+            ser = serial.Serial(self.port, self.baud, timeout=0.05, write_timeout=1)
+            # the board resets when the port opens: let it boot before writing
+            time.sleep(2)
+            ser.reset_input_buffer()
+            self._ser = ser
+            self._backoff = 0.5
+            self.scheduler.forget_display()
+            print(f"Opened Arduino on {self.port} @{self.baud}")
+            return True
+        except Exception as e:
+            print(f"Could not open Arduino serial {self.port}: {e} (retry in {self._backoff:.1f}s)")
+            self._next_open = now + self._backoff
+            self._backoff = min(self._backoff * 2.0, 10.0)
+            return False
+
+    def _drop_port(self) -> None:
+        try:
+            if self._ser is not None:
+                self._ser.close()
+        except Exception:
+            pass
+        self._ser = None
+        self._pending.clear()
+
+    def _read_replies(self) -> None:
+        ser = self._ser
+        while ser is not None and ser.in_waiting:
+            line = ser.readline().decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            now = time.monotonic()
+            # replies come back in command order; anything unexpected (ERR:..)
+            # still accounts for the oldest outstanding command
+            if self._pending:
+                expected, t_sent = self._pending.popleft()
+                if line == expected:
+                    self.replies += 1
+                    self.rtt.add(now - t_sent)
+                else:
+                    self.errors += 1
+
+    def _run(self) -> None:
+        while self._running:
+            if self._ser is None and not self._open():
+                time.sleep(0.05)
+                continue
+            try:
+                payload = self.scheduler.pop(timeout=0.02)
+                if payload is not None:
+                    self._ser.write(payload.encode("utf-8"))
+                    self._ser.flush()
+                    self.sent += 1
+                    expected = _expected_reply(payload)
+                    if expected:
+                        self._pending.append((expected, time.monotonic()))
+                self._read_replies()
+            except Exception as e:
+                print(f"Arduino serial error: {e} (reconnecting)")
+                self._drop_port()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.scheduler.qsize(),
+            "sent": self.sent,
+            "dropped": self.scheduler.dropped,
+            "deduped": self.scheduler.deduped,
+            "coalesced": self.scheduler.coalesced,
+            "replies": self.replies,
+            "errors": self.errors,
+            "connected": self._ser is not None,
+            "rtt_p50_ms": self.rtt.percentile(50) * 1e3,
+            "rtt_p95_ms": self.rtt.percentile(95) * 1e3,
+            "rtt_p99_ms": self.rtt.percentile(99) * 1e3,
+        }
+
+    def stop(self) -> None:
+        self._running = False
+        self._thread.join(timeout=1.0)
+        self._drop_port()
 
 
-def _open_serial():
-    global _ser
-    if _ser is not None:
-        return _ser
-    try:
-        _ser = serial.Serial(_ARDUINO_PORT, _ARDUINO_BAUD, timeout=1)
-        time.sleep(2)
-        print(f"Opened Arduino on {_ARDUINO_PORT} @{_ARDUINO_BAUD}")
-    except Exception as e:
-        print(f"Could not open Arduino serial {_ARDUINO_PORT}: {e}")
-        _ser = None
-    return _ser
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _get_worker() -> _SerialWorker:
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = _SerialWorker(_ARDUINO_PORT, _ARDUINO_BAUD, _QUEUE_MAX)
+        return _worker
 
 
 def _send_raw(s: str):
-    ser = _open_serial()
-    if ser is None:
-        return False
-    try:
-        ser.write(s.encode("utf-8"))
-        ser.flush()
-        return True
-    except Exception as e:
-        print(f"Failed to write to Arduino: {e}")
-        return False
+    """Queue a raw command for the serial thread. Never blocks; False if the queue is full."""
+    ok = _get_worker().submit(s)
+    if not ok:
+        print(f"Arduino command queue full, dropped {s.strip()!r}")
+    return ok
+
+
+def send_ping():
+    """Queue a PING; the reply (PONG) feeds the round-trip metric."""
+    return _send_raw("PING\n")
+
+
+def serial_stats() -> dict:
+    """Counters and round-trip latency (ms) of the background serial writer."""
+    return _get_worker().stats()
+
+
+def shutdown():
+    global _worker
+    with _worker_lock:
+        if _worker is not None:
+            _worker.stop()
+            _worker = None
 
 
 def send_wave_command():
@@ -40,7 +299,7 @@ def send_wave_command():
     # terminate with newline so Arduino processes immediately
     ok = _send_raw("W\n")
     if ok:
-        print("Sent WAVE command to Arduino")
+        print("Queued WAVE command for Arduino")
     return ok
 
 
@@ -56,7 +315,7 @@ def send_lcd_message(line1: str, line2: str = ""):
     payload = f"M{l1}|{l2}\n"
     ok = _send_raw(payload)
     if ok:
-        print(f"Sent LCD message: '{l1}' / '{l2}'")
+        print(f"Queued LCD message: '{l1}' / '{l2}'")
     return ok
 
 
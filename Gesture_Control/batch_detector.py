@@ -0,0 +1,304 @@
+"""Batched GestureDetector for many sessions (cameras / users) at once.
+
+`BatchGestureDetector.process_batch()` takes (session_id, landmarks,
+handedness, score, ts) rows from any number of sessions and runs them in
+vectorized passes: one hand_geometry() call for the whole batch, validity
+checks as array ops, and the WaveTracker of every (session, hand) slot
+updated together. Wave and cooldown state lives in struct-of-arrays storage
+indexed by slot (2 per session) instead of one WaveTracker object per hand.
+
+Results are the same as a GestureDetector per session fed the same frames:
+one (events, per_hand, total) tuple per session, equal event for event.
+A batch holds at most one frame per session; rows repeating a hand of the
+same frame are run in a further pass, in order, like the per-frame loop does.
+"""
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gesture_detector import EdgeTracker, PerHandResult, finish_frame
+from gesture_registry import DEFAULT_REGISTRY, GestureRegistry, GestureSpec, finger_masks
+from gestures import GestureEvent, WaveTracker, count_fingers, hand_geometry, states_dict
+
+Row = Tuple[Hashable, Any, str, float, float]
+FrameResult = Tuple[List[GestureEvent], Dict[str, PerHandResult], int]
+
+_HANDS = {"left": 0, "right": 1}
+
+
+class BatchGestureDetector:
+    def __init__(
+        self,
+        wave_permissive: bool = False,
+        *,
+        min_score: float = 0.50,
+        min_palm_scale: float = 0.04,
+        center_margin: float = 0.02,
+        suppress_open_after_wave_s: float = 1.5,
+        emit_wave_dbg: bool = False,
+        edges: Optional[Callable[[], EdgeTracker]] = None,
+        registry: Optional[GestureRegistry] = None,
+        capacity: int = 16,
+    ):
+        # same knobs as GestureDetector; `edges` builds one EdgeTracker per session
+        self.min_score = float(min_score)
+        self.min_palm_scale = float(min_palm_scale)
+        self.center_margin = float(center_margin)
+        self.suppress_open_after_wave_s = float(suppress_open_after_wave_s)
+        self.emit_wave_dbg = bool(emit_wave_dbg)
+        self.registry = registry if registry is not None else DEFAULT_REGISTRY
+        self._edges_factory = edges
+
+        # wave parameters: the WaveTracker defaults GestureDetector uses
+        wt = WaveTracker()
+        self.window = wt.window
+        self.amp_thr_norm = wt.amp_thr_norm
+        self.flips_thr = wt.flips_thr
+        self.min_dx_norm = wt.min_dx_norm
+        self.open_ratio = wt.open_ratio
+        self.cooldown_s = wt.cooldown_s
+        self.smooth_k = wt.smooth_k
+
+        self._sessions: Dict[Hashable, int] = {}
+        self._free: List[int] = []
+        self._edges: List[Optional[EdgeTracker]] = []
+        self._alloc(max(1, int(capacity)))
+
+    # -- slot storage -------------------------------------------------------
+
+    def _alloc(self, sessions: int) -> None:
+        n = 2 * sessions
+        old = getattr(self, "_xs", None)
+        xs = np.zeros((n, self.window))
+        opens = np.zeros((n, self.window), dtype=np.int64)
+        length = np.zeros(n, dtype=np.int64)  # samples in the window (0 after a reset)
+        head = np.zeros(n, dtype=np.int64)  # next write position in the ring
+        smooth = np.full(n, np.nan)  # smoothed palm x, NaN = no sample yet
+        cooldown = np.zeros(n)
+        last_wave = np.full(n, -1e9)
+        if old is not None:
+            k = old.shape[0]
+            xs[:k] = self._xs
+            opens[:k] = self._opens
+            length[:k] = self._len
+            head[:k] = self._head
+            smooth[:k] = self._smooth
+            cooldown[:k] = self._cooldown
+            last_wave[:k] = self._last_wave
+        self._xs, self._opens, self._len, self._head = xs, opens, length, head
+        self._smooth, self._cooldown, self._last_wave = smooth, cooldown, last_wave
+
+    def _session(self, sid: Hashable) -> int:
+        idx = self._sessions.get(sid)
+        if idx is not None:
+            return idx
+        if self._free:
+            idx = self._free.pop()
+        else:
+            idx = len(self._edges)
+            if 2 * (idx + 1) > self._xs.shape[0]:
+                self._alloc(2 * (idx + 1))
+            self._edges.append(None)
+        self._sessions[sid] = idx
+        self._edges[idx] = self._edges_factory() if self._edges_factory is not None else None
+        return idx
+
+    @property
+    def sessions(self) -> Tuple[Hashable, ...]:
+        return tuple(self._sessions)
+
+    def drop_session(self, sid: Hashable) -> None:
+        """Forget a session; its slots are reused by the next new one."""
+        idx = self._sessions.pop(sid, None)
+        if idx is None:
+            return
+        s = slice(2 * idx, 2 * idx + 2)
+        self._len[s] = 0
+        self._head[s] = 0
+        self._smooth[s] = np.nan
+        self._cooldown[s] = 0.0
+        self._last_wave[s] = -1e9
+        self._edges[idx] = None
+        self._free.append(idx)
+
+    # -- waves ---------------------------------------------------------------
+
+    def _wave_update(self, slots: np.ndarray, x: np.ndarray, is_open: np.ndarray, palm: np.ndarray, ts: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """WaveTracker.update() for distinct slots at once.
+
+        Returns (fired, amp_norm, flips, open_ratio, conf) arrays.
+        """
+        n = len(slots)
+        W = self.window
+        fired = np.zeros(n, dtype=bool)
+        amp_norm = np.zeros(n)
+        flips = np.zeros(n, dtype=np.int64)
+        open_ratio = np.zeros(n)
+        conf = np.zeros(n)
+
+        # in cooldown: nothing is recorded, not even the smoothed position
+        upd = ~(ts < self._cooldown[slots])
+        s = slots[upd]
+        if len(s) == 0:
+            return fired, amp_norm, flips, open_ratio, conf
+        xu = x[upd]
+        ps = np.where(palm[upd] > 1e-6, palm[upd], 0.1)
+        deadband = (self.min_dx_norm * ps) * 1.2
+
+        prev = self._smooth[s]
+        sm = np.where(np.isnan(prev), xu, (1.0 - self.smooth_k) * prev + self.smooth_k * xu)
+        self._smooth[s] = sm
+        head = self._head[s]
+        self._xs[s, head] = sm
+        self._opens[s, head] = is_open[upd]
+        self._head[s] = (head + 1) % W
+        self._len[s] = np.minimum(self._len[s] + 1, W)
+
+        full = self._len[s] == W
+        if not full.any():
+            return fired, amp_norm, flips, open_ratio, conf
+        rows = np.flatnonzero(upd)[full]
+        sf = s[full]
+        ps = ps[full]
+        deadband = deadband[full]
+
+        # window in chronological order: oldest sample at the write position
+        order = (self._head[sf][:, None] + np.arange(W)) % W
+        buf = np.take_along_axis(self._xs[sf], order, axis=1)
+        hi = buf.max(axis=1)
+        lo = buf.min(axis=1)
+        a_norm = (hi - lo) / ps
+
+        # centerline crossings with hysteresis, one column (time step) at a time
+        mid = (hi + lo) * 0.5
+        up = mid + deadband
+        down = mid - deadband
+        cross = np.zeros(len(sf), dtype=np.int64)
+        if W >= 4:
+            state = np.zeros(len(sf), dtype=np.int64)
+            for j in range(W):
+                col = buf[:, j]
+                new_state = np.where(col > up, 1, np.where(col < down, -1, state))
+                cross += (state != 0) & (new_state != 0) & (new_state != state)
+                state = new_state
+            cross = np.where((hi > up) & (lo < down), cross, 0)
+
+        o_ratio = self._opens[sf].sum(axis=1) / float(W)
+        c = np.clip(0.55 + 0.45 * np.minimum(1.0, a_norm / (self.amp_thr_norm * 1.5)), 0.0, 1.0)
+
+        ok_primary = (a_norm >= self.amp_thr_norm) & (cross >= self.flips_thr) & (o_ratio >= self.open_ratio)
+        amp_score = a_norm / max(1e-6, self.amp_thr_norm)
+        flips_score = np.minimum(cross / max(1, self.flips_thr), 3.0)
+        combined_score = 0.6 * amp_score + 0.4 * flips_score
+        ok = ok_primary | ((combined_score >= 1.2) & (o_ratio >= self.open_ratio))
+
+        hit = sf[ok]
+        self._len[hit] = 0
+        self._cooldown[hit] = ts[rows[ok]] + self.cooldown_s
+
+        fired[rows] = ok
+        amp_norm[rows] = a_norm
+        flips[rows] = cross
+        open_ratio[rows] = o_ratio
+        conf[rows] = c
+        return fired, amp_norm, flips, open_ratio, conf
+
+    # -- frames --------------------------------------------------------------
+
+    def process_batch(self, rows: Sequence[Row], frames: Optional[Mapping[Hashable, float]] = None) -> Dict[Hashable, FrameResult]:
+        """Run one frame for every session in the batch.
+
+        `rows` are (session_id, landmarks, handedness, score, ts), hands of the
+        same session sharing its frame timestamp. `frames` maps sessions to a
+        frame timestamp and adds frames without any hand (they still advance
+        edge tracking and report a zero count). Returns
+        {session_id: (events, per_hand, total)} like GestureDetector.process.
+        """
+        frame_ts: Dict[Hashable, float] = dict(frames) if frames is not None else {}
+        rows = [r for r in rows if r[2] in _HANDS]
+        for sid, _, _, _, ts in rows:
+            seen = frame_ts.setdefault(sid, ts)
+            if seen != ts:
+                raise ValueError(f"session {sid!r}: more than one frame in the batch ({seen} and {ts})")
+        idx = {sid: self._session(sid) for sid in frame_ts}
+
+        n = len(rows)
+        statics: List[List[GestureSpec]] = [[] for _ in range(n)]
+        if n:
+            lms_all = np.stack([np.asarray(r[1], dtype=np.float64) for r in rows])
+            states_all, centers_all, palm_all = hand_geometry(lms_all, [r[2] for r in rows])
+            masks = finger_masks(states_all)
+            counts = states_all.sum(axis=1)
+            scores = np.array([float(r[3]) for r in rows])
+            ts_all = np.array([float(r[4]) for r in rows])
+            slots = np.array([2 * idx[r[0]] + _HANDS[r[2]] for r in rows], dtype=np.int64)
+
+            m = self.center_margin
+            cx, cy = centers_all[:, 0], centers_all[:, 1]
+            in_center = (cx > m) & (cx < (1.0 - m)) & (cy > m) & (cy < (1.0 - m))
+            valid = (scores >= self.min_score) & (palm_all >= self.min_palm_scale) & in_center
+
+            # k-th occurrence of a slot goes to pass k, so slots are distinct within a pass
+            occurrence = np.zeros(n, dtype=np.int64)
+            seen_slots: Dict[int, int] = {}
+            for i, s in enumerate(slots.tolist()):
+                occurrence[i] = seen_slots.get(s, 0)
+                seen_slots[s] = occurrence[i] + 1
+
+            fired = np.zeros(n, dtype=bool)
+            amp_norm = np.zeros(n)
+            flips = np.zeros(n, dtype=np.int64)
+            open_ratio = np.zeros(n)
+            conf = np.zeros(n)
+            for k in range(int(occurrence.max()) + 1):
+                p = np.flatnonzero(occurrence == k)
+                ps_ = slots[p]
+                # static gestures see the wave state before this hand's own update
+                recent_wave = ts_all[p] - self._last_wave[ps_] < self.suppress_open_after_wave_s
+                for j, i in enumerate(p.tolist()):
+                    if valid[i]:
+                        lms = lms_all[i]
+                        statics[i] = [s for s in self.registry.classify(int(masks[i]), lms) if not (s.suppressed_by_wave and recent_wave[j])]
+                # invalid detections drop their partial wave window
+                self._len[ps_[~valid[p]]] = 0
+                res = self._wave_update(ps_, lms_all[p, 9, 0], (counts[p] >= 4).astype(np.int64), palm_all[p], ts_all[p])
+                fired[p], amp_norm[p], flips[p], open_ratio[p], conf[p] = res
+                hit = p[res[0]]
+                self._last_wave[slots[hit]] = ts_all[hit]
+
+        by_session: Dict[Hashable, List[int]] = {sid: [] for sid in frame_ts}
+        for i, r in enumerate(rows):
+            by_session[r[0]].append(i)
+
+        out: Dict[Hashable, FrameResult] = {}
+        for sid, ts in frame_ts.items():
+            per_hand: Dict[str, PerHandResult] = {}
+            events: List[GestureEvent] = []
+            for i in by_session[sid]:
+                handed = rows[i][2]
+                states = states_dict(states_all[i])
+                per_hand[handed] = PerHandResult(
+                    handedness=handed,
+                    score=float(scores[i]),
+                    states=states,
+                    count=count_fingers(states),
+                    center=(float(centers_all[i, 0]), float(centers_all[i, 1])),
+                    wave=(float(amp_norm[i]), int(flips[i]), float(open_ratio[i]), float(conf[i])),
+                )
+                for spec in statics[i]:
+                    events.append(GestureEvent(name=spec.name, hand=handed, confidence=float(scores[i]), ts=ts, payload=dict(spec.payload)))
+                if self.emit_wave_dbg and ((flips[i] > 0) or (amp_norm[i] >= 0.15)):
+                    print(f"[WAVE_DBG] ts={ts:.2f} hand={handed} amp={amp_norm[i]:.3f} flips={flips[i]} open_ratio={open_ratio[i]:.2f} fired={bool(fired[i])}")
+                if fired[i]:
+                    events.append(
+                        GestureEvent(
+                            name="wave",
+                            hand=handed,
+                            confidence=float(conf[i]),
+                            ts=ts,
+                            payload={"amp_norm": float(amp_norm[i]), "flips": int(flips[i]), "open_ratio": float(open_ratio[i])},
+                        )
+                    )
+                    events = [e for e in events if not (e.hand == handed and e.name == "open_palm")]
+            out[sid] = finish_frame(events, per_hand, ts, self._edges[idx[sid]])
+        return out
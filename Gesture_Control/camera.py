@@ -1,14 +1,29 @@
 from typing import Any, Dict, List, Tuple
-import cv2
+import numpy as np
 from gestures import to_px
 
 Vec2 = Tuple[float, float]
 
 class CameraUI:
+    HUD_X, HUD_Y = 8, 68
+    HUD_W, HUD_H = 300, 96
+
     def __init__(self):
         self.debug = True
+        self._hud_key = None
+        self._hud_patch = None
+        self._cv2 = None
+
+    def _load_cv2(self) -> Any:
+        # deferred to the first draw (headless runs never draw), then cached
+        import cv2
+
+        self._cv2 = cv2
+        return cv2
 
     def draw_hand(self, frame: Any, lms: List[Vec2], handedness: str) -> None:
+        cv2 = self._cv2 or self._load_cv2()
+
         h, w = frame.shape[:2]
         # Colors in BGR: left = pink, right = dark purple
         if handedness == "left":
@@ -42,14 +57,33 @@ class CameraUI:
             cv2.putText(frame, txt_full, (10, y0), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255, 255, 255), 2)
 
     def draw_hud(self, frame: Any, last_event: str, count_total: int) -> None:
-        # Draw a dark translucent panel for HUD background (approximate by filled rect)
-        hud_x, hud_y = 8, 68
-        hud_w, hud_h = 300, 90
-        cv2.rectangle(frame, (hud_x, hud_y), (hud_x + hud_w, hud_y + hud_h), (0, 0, 0), -1)
+        # The HUD panel is rendered once per distinct content and then just
+        # copied onto every frame (putText/getTextSize are not free).
+        key = (last_event, count_total, self.debug, frame.shape[1])
+        if key != self._hud_key:
+            self._hud_key = key
+            self._hud_patch = self._render_hud(frame.shape[1], last_event, count_total)
+        patch = self._hud_patch
+        ph = min(patch.shape[0], frame.shape[0] - self.HUD_Y)
+        if ph > 0:
+            frame[self.HUD_Y:self.HUD_Y + ph, self.HUD_X:self.HUD_X + patch.shape[1]] = patch[:ph]
+
+    def _render_hud(self, frame_w: int, last_event: str, count_total: int) -> np.ndarray:
+        cv2 = self._cv2 or self._load_cv2()
+
+        # Dark panel for HUD background, widened if the last event text is longer
+        w = self.HUD_W
+        if last_event:
+            (tw, _), _ = cv2.getTextSize(last_event, cv2.FONT_HERSHEY_SIMPLEX, 0.65, 2)
+            w = max(w, tw + 8)
+        w = max(1, min(w, frame_w - self.HUD_X))
+        patch = np.zeros((self.HUD_H, w, 3), dtype=np.uint8)
+        ox, oy = self.HUD_X, self.HUD_Y
         # Count (use bright yellow)
-        cv2.putText(frame, f"count={count_total}", (10, 92), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 215, 255), 2)
+        cv2.putText(patch, f"count={count_total}", (10 - ox, 92 - oy), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 215, 255), 2)
         # Last event (bright cyan)
         if last_event:
-            cv2.putText(frame, last_event, (10, 122), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (200, 255, 255), 2)
+            cv2.putText(patch, last_event, (10 - ox, 122 - oy), cv2.FONT_HERSHEY_SIMPLEX, 0.65, (200, 255, 255), 2)
         # Debug status (white)
-        cv2.putText(frame, f"debug={'ON' if self.debug else 'OFF'} (press D)", (10, 152), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (230, 230, 230), 2)
+        cv2.putText(patch, f"debug={'ON' if self.debug else 'OFF'} (press D)", (10 - ox, 152 - oy), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (230, 230, 230), 2)
+        return patch
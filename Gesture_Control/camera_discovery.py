@@ -0,0 +1,236 @@
+"""Camera discovery with a persistent cache.
+
+Opening the camera used to cost an `ffmpeg -list_devices` subprocess (macOS)
+plus sequential probing of indices 0-4 on every start. The device list and
+the source/backend that worked are now cached in ~/.gesture_control.json
+under a fingerprint of the machine's video devices; a cached entry is tried
+first and discovery only runs again when it no longer opens. Index probing
+tries the preferred index first, then the others one at a time, skipping
+devices whose name matches EXCLUDE_KEYWORDS (phones, network cameras), so
+no other camera is woken up once one works.
+
+The capture profile negotiated for a source (size / FPS / FOURCC / buffer
+depth, see capture_config.py) is kept in the same entry under "profiles".
+"""
+import glob
+import hashlib
+import json
+import os
+import platform
+import re
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+CONFIG_PATH = os.path.expanduser("~/.gesture_control.json")
+PROBE_INDICES = range(0, 5)
+
+PREFER_KEYWORDS = ("FaceTime", "Built-in", "iSight", "Camera", "USB")
+EXCLUDE_KEYWORDS = ("iPhone", "Phone", "Android", "IPWebcam", "Raspi")
+
+# backend name -> cv2 constant (resolved on use: no OpenCV import for load/save_config)
+_BACKENDS = {"any": "CAP_ANY", "avfoundation": "CAP_AVFOUNDATION"}
+
+
+def load_config(path: str = CONFIG_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            cfg = json.load(f)
+        return cfg if isinstance(cfg, dict) else {}
+    except Exception:
+        return {}
+
+
+def save_config(updates: Dict[str, Any], path: str = CONFIG_PATH) -> None:
+    """Merge `updates` into the config file (atomic replace)."""
+    cfg = load_config(path)
+    cfg.update(updates)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(cfg, f, indent=2)
+    os.replace(tmp, path)
+
+
+def device_fingerprint() -> str:
+    """Cheap identity of this machine + its video devices (no subprocess).
+
+    Linux exposes the device names in sysfs; elsewhere the host identity is
+    used and a stale cache entry is detected when it fails to open.
+    """
+    parts = [platform.system(), platform.node()]
+    for p in sorted(glob.glob("/sys/class/video4linux/video*/name")):
+        try:
+            with open(p) as f:
+                parts.append(f"{os.path.basename(os.path.dirname(p))}={f.read().strip()}")
+        except OSError:
+            pass
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+def list_avfoundation_devices() -> List[Tuple[int, str]]:
+    """[(index, name)] of AVFoundation video devices via ffmpeg (slow: ~0.5 s)."""
+    try:
+        proc = subprocess.run(
+            ["ffmpeg", "-f", "avfoundation", "-list_devices", "true", "-i", ""],
+            capture_output=True,
+            text=True,
+        )
+    except (FileNotFoundError, OSError):
+        return []
+    out = proc.stderr or proc.stdout or ""
+    video_section = False
+    devices = []
+    for line in out.splitlines():
+        if "AVFoundation video devices:" in line:
+            video_section = True
+            continue
+        if video_section:
+            if "AVFoundation audio devices:" in line:
+                break
+            m = re.search(r"\[(\d+)\] (.+)", line)
+            if m:
+                devices.append((int(m.group(1)), m.group(2).strip()))
+    return devices
+
+
+def list_v4l2_devices() -> List[Tuple[int, str]]:
+    """[(index, name)] of the Linux video devices, from sysfs (no subprocess)."""
+    devices = []
+    for p in glob.glob("/sys/class/video4linux/video*/name"):
+        m = re.search(r"video(\d+)$", os.path.dirname(p))
+        if not m:
+            continue
+        try:
+            with open(p) as f:
+                devices.append((int(m.group(1)), f.read().strip()))
+        except OSError:
+            pass
+    return sorted(devices)
+
+
+def _excluded(name: str) -> bool:
+    nlower = name.lower()
+    return any(k.lower() in nlower for k in EXCLUDE_KEYWORDS)
+
+
+def _choose_device(devices: List[Tuple[int, str]]) -> Optional[str]:
+    for _, name in devices:
+        if _excluded(name):
+            continue
+        nlower = name.lower()
+        if any(k.lower() in nlower for k in PREFER_KEYWORDS):
+            return name
+    return None
+
+
+def _open(source: Any, backend: str) -> Optional[Any]:
+    import cv2
+
+    try:
+        c = cv2.VideoCapture(source, getattr(cv2, _BACKENDS[backend]))
+    except Exception:
+        return None
+    if c is not None and c.isOpened():
+        return c
+    if c is not None:
+        c.release()
+    return None
+
+
+def probe_indices(
+    backend: str = "any",
+    indices: Any = PROBE_INDICES,
+    preferred: Optional[int] = None,
+    devices: Sequence[Tuple[int, str]] = (),
+) -> Tuple[Optional[Any], Optional[int]]:
+    """Open the indices one at a time, `preferred` first, and return the first
+    that works. Indices whose device name (from `devices`) matches
+    EXCLUDE_KEYWORDS are skipped, unless it is the preferred one."""
+    excluded = {i for i, name in devices if _excluded(name)}
+    order = [i for i in indices if i != preferred and i not in excluded]
+    if preferred is not None:
+        order.insert(0, preferred)
+    for i in order:
+        cap = _open(i, backend)
+        if cap is not None:
+            return cap, i
+    return None, None
+
+
+def _discover(preferred_index: int) -> Tuple[Optional[Any], Any, Dict[str, Any]]:
+    entry: Dict[str, Any] = {"devices": []}
+    if platform.system() == "Darwin":
+        devices = list_avfoundation_devices()
+        entry["devices"] = devices
+        chosen = _choose_device(devices)
+        if chosen:
+            cap = _open(chosen, "avfoundation")
+            if cap is not None:
+                entry.update(source=chosen, backend="avfoundation")
+                return cap, chosen, entry
+        cap, idx = probe_indices("avfoundation", preferred=preferred_index, devices=devices)
+        if cap is not None:
+            entry.update(source=idx, backend="avfoundation")
+            return cap, idx, entry
+    else:
+        entry["devices"] = list_v4l2_devices()
+
+    cap, idx = probe_indices("any", preferred=preferred_index, devices=entry["devices"])
+    if cap is not None:
+        entry.update(source=idx, backend="any")
+    return cap, idx, entry
+
+
+def open_camera(preferred_index: int = 0, use_cache: bool = True) -> Tuple[Optional[Any], Any]:
+    """Open the built-in camera; returns (cap, source) or (None, None)."""
+    cap, source, _ = open_camera_backend(preferred_index, use_cache)
+    return cap, source
+
+
+def open_camera_backend(preferred_index: int = 0, use_cache: bool = True) -> Tuple[Optional[Any], Any, Optional[str]]:
+    """Like open_camera(), plus the backend name: reopen the same device
+    later with `_open(source, backend)` (an AVFoundation device name does not
+    open with the default backend)."""
+    fp = device_fingerprint()
+    if use_cache:
+        entry = load_config().get("devices", {}).get(fp)
+        if isinstance(entry, dict) and "source" in entry and entry.get("backend") in _BACKENDS:
+            cap = _open(entry["source"], entry["backend"])
+            if cap is not None:
+                return cap, entry["source"], entry["backend"]
+
+    cap, source, entry = _discover(preferred_index)
+    if cap is None:
+        return None, None, None
+    try:
+        devices = load_config().get("devices", {})
+        entry["ts"] = time.time()
+        cached = devices.get(fp)
+        # merge: keep what else is stored for this machine (capture "profiles")
+        devices[fp] = {**cached, **entry} if isinstance(cached, dict) else entry
+        save_config({"devices": devices})
+    except Exception as e:
+        print(f"Failed to cache camera discovery: {e}")
+    return cap, source, entry["backend"]
+
+
+def load_profile(source: Any, path: str = CONFIG_PATH) -> Optional[Dict[str, Any]]:
+    """Saved capture profile of `source` on this machine, if any."""
+    entry = load_config(path).get("devices", {}).get(device_fingerprint())
+    if not isinstance(entry, dict):
+        return None
+    prof = entry.get("profiles", {}).get(str(source))
+    return prof if isinstance(prof, dict) else None
+
+
+def save_profile(source: Any, profile: Dict[str, Any], path: str = CONFIG_PATH) -> None:
+    """Store the capture profile of `source` with the camera cache entry."""
+    fp = device_fingerprint()
+    devices = load_config(path).get("devices", {})
+    entry = devices.get(fp)
+    if not isinstance(entry, dict):
+        entry = devices[fp] = {"devices": []}
+    entry.setdefault("profiles", {})[str(source)] = {**profile, "ts": time.time()}
+    save_config({"devices": devices}, path)
@@ -0,0 +1,111 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass
+class CapturedFrame:
+    frame_bgr: Any
+    ts: float
+    seq: int
+    mono: float = 0.0  # time.monotonic() at capture (latency vs the event "mono")
+
+
+class FrameGrabber:
+    """Background capture thread that only keeps the newest frame.
+
+    `cap.read()` runs on its own thread and overwrites a single slot, so
+    when inference is slower than the camera the stale frames are dropped
+    here instead of piling up in the driver buffer. The consumer always
+    gets the freshest image.
+    """
+
+    def __init__(self, cap: Any, metrics: Optional[Any] = None):
+        self._cap = cap
+        self._metrics = metrics
+        self._cond = threading.Condition()
+        self._slot: Optional[CapturedFrame] = None
+        self._running = False
+        self._eof = False
+        self._thread: Optional[threading.Thread] = None
+
+        # counters (read them from any thread, they are only informative)
+        self.captured = 0
+        self.dropped = 0
+        self.processed = 0
+
+    def start(self) -> "FrameGrabber":
+        if self._thread is not None:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="frame-grabber", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        seq = 0
+        metrics = self._metrics
+        while self._running:
+            t0 = time.perf_counter()
+            ok, frame = self._cap.read()
+            ts, mono = time.time(), time.monotonic()
+            if metrics is not None:
+                metrics.lap("read", t0)
+            if not ok:
+                break
+            seq += 1
+            with self._cond:
+                # the previous frame was never picked up: it is stale now
+                if self._slot is not None:
+                    self.dropped += 1
+                self._slot = CapturedFrame(frame_bgr=frame, ts=ts, seq=seq, mono=mono)
+                self.captured += 1
+                self._cond.notify()
+        with self._cond:
+            self._eof = True
+            self._cond.notify_all()
+
+    def read(self, timeout: Optional[float] = None) -> Optional[CapturedFrame]:
+        """Block until a frame newer than the last one returned is available.
+
+        Returns None when the camera stream ended (or on timeout).
+        """
+        with self._cond:
+            while self._slot is None:
+                if self._eof or not self._running:
+                    return None
+                if not self._cond.wait(timeout):
+                    return None
+            item = self._slot
+            self._slot = None
+            self.processed += 1
+            return item
+
+    @property
+    def ended(self) -> bool:
+        """True once the camera stream ended (tells EOF apart from a read timeout)."""
+        return self._eof
+
+    def stats(self) -> dict:
+        return {"captured": self.captured, "dropped": self.dropped, "processed": self.processed}
+
+    def stop(self, release: bool = False, timeout: float = 5.0) -> bool:
+        """Stop the capture thread; with `release`, release the capture too.
+
+        The capture is only released once the thread has left `cap.read()`
+        (releasing it under a running read is undefined in several OpenCV
+        backends). Returns False if the thread is still stuck in a read after
+        `timeout`: the capture is then left alone for process exit to reclaim.
+        """
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+            self._thread = None
+        if release:
+            self._cap.release()
+        return True
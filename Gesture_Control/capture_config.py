@@ -0,0 +1,170 @@
+"""Capture property negotiation and latency auto-tuning.
+
+OpenCV opens a camera with whatever the driver defaults to (often a large
+YUYV mode at a low frame rate, with several buffered frames of latency).
+`negotiate()` requests a CaptureProfile (FOURCC first: some drivers reset
+the size when the codec changes, then size, FPS and buffer depth) and reads
+back what the driver actually accepted; properties it ignores are listed in
+the report rather than silently assumed.
+
+`auto_tune()` walks RESOLUTION_LADDER downwards, measuring per frame the
+decode (`retrieve`) plus flip plus HandDetector.process time, and keeps the
+first resolution whose p90 fits the frame budget. Waiting for the camera
+(`grab`) is not counted: the capture thread overlaps it with inference.
+The chosen profile is stored with the camera cache (camera_discovery.py).
+"""
+import time
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+RESOLUTION_LADDER: Tuple[Tuple[int, int], ...] = (
+    (1920, 1080),
+    (1280, 720),
+    (960, 540),
+    (848, 480),
+    (640, 480),
+    (640, 360),
+    (424, 240),
+    (320, 240),
+)
+
+
+@dataclass
+class CaptureProfile:
+    # 0 / "" = leave the driver default
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    fourcc: str = ""
+    buffer_size: int = 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "CaptureProfile":
+        known = {k: d[k] for k in cls.__dataclass_fields__ if k in d}
+        return cls(**known)
+
+    def merged(self, **overrides: Any) -> "CaptureProfile":
+        """Copy with the given fields replaced, None = keep (CLI flags over a saved profile)."""
+        return replace(self, **{k: v for k, v in overrides.items() if v is not None})
+
+
+def fourcc_str(code: float) -> str:
+    c = int(code)
+    if c <= 0:
+        return ""
+    return "".join(chr((c >> (8 * i)) & 0xFF) for i in range(4)).strip("\0 ")
+
+
+def read_properties(cap: Any) -> Dict[str, Any]:
+    import cv2
+
+    return {
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": round(float(cap.get(cv2.CAP_PROP_FPS)), 2),
+        "fourcc": fourcc_str(cap.get(cv2.CAP_PROP_FOURCC)),
+        "buffer_size": int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+    }
+
+
+def negotiate(cap: Any, profile: CaptureProfile) -> Dict[str, Any]:
+    """Apply `profile` to an open capture; returns the negotiated values plus
+    the requested properties the driver did not take."""
+    import cv2
+
+    requested: Dict[str, Any] = {}
+    if profile.fourcc:
+        requested["fourcc"] = profile.fourcc.upper()
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*requested["fourcc"][:4].ljust(4)))
+    if profile.width > 0 and profile.height > 0:
+        requested["width"], requested["height"] = profile.width, profile.height
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, profile.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, profile.height)
+    if profile.fps > 0:
+        requested["fps"] = profile.fps
+        cap.set(cv2.CAP_PROP_FPS, profile.fps)
+    if profile.buffer_size > 0:
+        requested["buffer_size"] = profile.buffer_size
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, profile.buffer_size)
+
+    actual = read_properties(cap)
+    ignored = []
+    for k, v in requested.items():
+        got = actual[k]
+        # drivers round the frame rate (30 -> 29.97): close enough counts
+        same = abs(got - v) <= 0.5 if k == "fps" else got == v
+        if not same:
+            ignored.append(k)
+    return {**actual, "requested": requested, "ignored": ignored}
+
+
+def _measure(cap: Any, detector: Any, frames: int, warmup: int) -> Optional[Dict[str, float]]:
+    import cv2
+
+    costs: List[float] = []
+    for i in range(warmup + frames):
+        if not cap.grab():
+            return None
+        t = time.perf_counter()
+        ok, frame = cap.retrieve()
+        if not ok or frame is None:
+            return None
+        detector.process(cv2.flip(frame, 1), time.time())
+        if i >= warmup:
+            costs.append(time.perf_counter() - t)
+    ms = np.array(costs) * 1000.0
+    return {"p50_ms": float(np.percentile(ms, 50)), "p90_ms": float(np.percentile(ms, 90))}
+
+
+def auto_tune(
+    cap: Any,
+    detector: Any,
+    budget_ms: float,
+    base: Optional[CaptureProfile] = None,
+    ladder: Sequence[Tuple[int, int]] = RESOLUTION_LADDER,
+    frames: int = 20,
+    warmup: int = 5,
+) -> Tuple[CaptureProfile, Dict[str, Any]]:
+    """Step the resolution down until decode + inference fits `budget_ms` (p90).
+
+    Starts at the base profile's size (or the top of the ladder) and leaves
+    the capture negotiated to the chosen profile. Returns (profile, report).
+    """
+    base = base or CaptureProfile()
+    start = 0
+    if base.width > 0:
+        fitting = [i for i, (w, _) in enumerate(ladder) if w <= base.width]
+        start = fitting[0] if fitting else len(ladder) - 1
+    steps: List[Dict[str, Any]] = []
+    tried = set()
+    best: Optional[Tuple[CaptureProfile, Dict[str, Any]]] = None
+    for w, h in ladder[start:]:
+        prof = replace(base, width=w, height=h)
+        neg = negotiate(cap, prof)
+        size = (neg["width"], neg["height"])
+        if size in tried:
+            # the driver mapped this request onto a mode already measured
+            continue
+        tried.add(size)
+        m = _measure(cap, detector, frames, warmup)
+        if m is None:
+            continue
+        steps.append({"width": size[0], "height": size[1], **m})
+        # keep what the driver really gave (it may round the size)
+        best = (replace(prof, width=size[0], height=size[1]), neg)
+        if m["p90_ms"] <= budget_ms:
+            break
+    if best is None:
+        raise RuntimeError("auto-tune: the camera returned no frames")
+    profile, neg = best
+    cur = read_properties(cap)
+    if (cur["width"], cur["height"]) != (profile.width, profile.height):
+        # a later step was requested but gave no frames: back to the chosen one
+        neg = negotiate(cap, profile)
+    fits = steps[-1]["p90_ms"] <= budget_ms
+    return profile, {**neg, "budget_ms": budget_ms, "fits": fits, "steps": steps}
@@ -0,0 +1,477 @@
+"""Resident gesture service driven over a local Unix socket.
+
+`main.py --daemon` loads and warms the MediaPipe graph once and then waits
+for commands; events keep going to stdout exactly like the one-shot mode.
+Control protocol: one JSON object per line in each direction.
+
+    {"cmd": "start"}        open the camera and run
+    {"cmd": "pause"}        stop and release the camera (model stays loaded)
+    {"cmd": "resume"}       reopen the camera (last working source) and run
+    {"cmd": "reconfigure", "settings": {"debounce_frames": 5, ...}}
+    {"cmd": "status"}
+    {"cmd": "dump"}         dump the flight recorder
+    {"cmd": "shutdown"}
+
+Replies: {"ok": true, "state": "running", ...} or {"ok": false, "error": "..."}.
+`DaemonClient` below (or `python daemon.py pause`) speaks it.
+"""
+import argparse
+import json
+import os
+import queue
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, fields, replace
+from typing import Any, Dict, Optional, get_args
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "gesture_control.sock")
+
+STATE_IDLE = "idle"
+STATE_RUNNING = "running"
+STATE_PAUSED = "paused"
+
+
+@dataclass
+class DaemonSettings:
+    cam_index: Optional[int] = None
+    wave_permissive: bool = False
+    emit_popup_debug: bool = False
+    level_events: bool = False
+    debounce_frames: int = 3
+    debounce_ms: float = 0.0
+    hold_interval_s: float = 0.0
+    detect_width: int = 0
+    roi_tracking: bool = False
+    metrics_interval: float = 5.0
+    # shared-memory frame ring for previews (frame_ring.py); None = off
+    publish_frames: Optional[str] = None
+    publish_fps: float = 15.0
+    publish_overlay: bool = False
+
+
+_SETTING_TYPES = {f.name: f.type for f in fields(DaemonSettings)}
+
+
+def _coerce(name: str, value: Any) -> Any:
+    """`value` converted to the type of setting `name` (ValueError if it does not fit)."""
+    tp = _SETTING_TYPES[name]
+    args = get_args(tp)
+    if type(None) in args:
+        if value is None:
+            return None
+        tp = next(a for a in args if a is not type(None))
+    if tp is bool:
+        if isinstance(value, bool):
+            return value
+    elif tp is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+    elif tp is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    elif isinstance(value, tp):
+        return value
+    raise ValueError(f"bad value for {name}: {value!r} (expected {tp.__name__})")
+
+
+class _Command:
+    __slots__ = ("req", "reply", "done")
+
+    def __init__(self, req: Dict[str, Any]):
+        self.req = req
+        self.reply: Dict[str, Any] = {}
+        self.done = threading.Event()
+
+
+class GestureDaemon:
+    """Frame loop + control socket. Commands are queued by the socket threads
+    and executed by the loop between frames, so the camera and the detectors
+    are only ever touched from one thread."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, settings: Optional[DaemonSettings] = None, event_format: str = "jsonl", flight_seconds: float = 30.0):
+        self.socket_path = socket_path
+        self.settings = settings or DaemonSettings()
+        self.event_format = event_format
+        self.flight_seconds = float(flight_seconds)
+        self.state = STATE_IDLE
+        self._cmds: "queue.Queue[_Command]" = queue.Queue()
+        self._stop = threading.Event()
+        self._sock: Optional[socket.socket] = None
+        self._cap = None
+        self._grabber = None
+        # what opened last time, reused on resume: (source, backend name)
+        self._source: Any = None
+        self._backend: Optional[str] = None
+        self._flight = None
+        self._publisher = None
+        self._dropped_reported = 0
+        # (seq, ts) of the last processed frame: end events sent on release
+        self._last_frame = (0, 0.0)
+
+    # -- control socket ---------------------------------------------------
+
+    def _listen(self) -> None:
+        if os.path.exists(self.socket_path):
+            # stale socket from a previous run (a live daemon would answer)
+            try:
+                with DaemonClient(self.socket_path, timeout=0.5) as c:
+                    c.status()
+            except OSError:
+                os.unlink(self.socket_path)
+            else:
+                raise RuntimeError(f"another daemon is listening on {self.socket_path}")
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        sock.listen(4)
+        self._sock = sock
+        threading.Thread(target=self._accept_loop, name="daemon-accept", daemon=True).start()
+
+    def _accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._serve_conn, args=(conn,), name="daemon-conn", daemon=True).start()
+
+    def _serve_conn(self, conn: socket.socket) -> None:
+        with conn, conn.makefile("rwb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    req = json.loads(line)
+                    if not isinstance(req, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as e:
+                    reply = {"ok": False, "error": f"bad request: {e}"}
+                else:
+                    cmd = _Command(req)
+                    self._cmds.put(cmd)
+                    if not cmd.done.wait(timeout=10.0):
+                        reply = {"ok": False, "error": "timeout"}
+                    else:
+                        reply = cmd.reply
+                f.write(json.dumps(reply).encode() + b"\n")
+                f.flush()
+
+    # -- commands (frame-loop thread) --------------------------------------
+
+    def _handle(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        name = req.get("cmd")
+        if name in ("start", "resume"):
+            if self.state != STATE_RUNNING:
+                t = time.perf_counter()
+                self._open_camera()
+                self.state = STATE_RUNNING
+                return self._status(attach_ms=(time.perf_counter() - t) * 1000.0)
+        elif name == "pause":
+            if self.state == STATE_RUNNING:
+                self._release_camera()
+                self.state = STATE_PAUSED
+        elif name == "reconfigure":
+            self._reconfigure(req.get("settings") or {})
+        elif name == "dump":
+            if self._flight is None:
+                raise ValueError("flight recorder disabled")
+            return self._status(path=self._flight.dump())
+        elif name == "shutdown":
+            self._stop.set()
+        elif name != "status":
+            raise ValueError(f"unknown command {name!r}")
+        return self._status()
+
+    def _status(self, **extra: Any) -> Dict[str, Any]:
+        st = {"ok": True, "state": self.state, "source": self._source, "backend": self._backend, "settings": asdict(self.settings)}
+        if self._grabber is not None:
+            st["capture"] = self._grabber.stats()
+        st.update(extra)
+        return st
+
+    def _reconfigure(self, changes: Dict[str, Any]) -> None:
+        unknown = sorted(set(changes) - set(_SETTING_TYPES))
+        if unknown:
+            raise ValueError(f"unknown settings: {', '.join(unknown)}")
+        # all or nothing: a bad value leaves the running settings untouched
+        new = replace(self.settings, **{k: _coerce(k, v) for k, v in changes.items()})
+        old_cam = self.settings.cam_index
+        self.settings = new
+        self._end_poses()  # the tracker is replaced below
+        self._build_logic()
+        self.metrics.interval_s = float(self.settings.metrics_interval)
+        self.hd.detect_width = int(self.settings.detect_width)
+        self.hd.roi_tracking = bool(self.settings.roi_tracking)
+        self.hd.reset_tracking()
+        if self.settings.cam_index != old_cam:
+            self._source = self._backend = None
+            if self.state == STATE_RUNNING:
+                self._release_camera()
+                try:
+                    self._open_camera()
+                except Exception:
+                    self.state = STATE_PAUSED
+                    raise
+
+    # -- pipeline ---------------------------------------------------------
+
+    def _build_logic(self) -> None:
+        from gesture_detector import EdgeTracker, GestureDetector
+        from hud import HudState, PopupSnapshot
+
+        s = self.settings
+        edges = None if s.level_events else EdgeTracker(debounce_frames=s.debounce_frames, debounce_ms=s.debounce_ms, hold_interval_s=s.hold_interval_s)
+        self.gd = GestureDetector(wave_permissive=s.wave_permissive, edges=edges)
+        self.hud = HudState()
+        self.popup = PopupSnapshot(self.hud, interval_s=0.25)
+        if s.emit_popup_debug:
+            self.popup.subscribe()
+        if self._publisher is not None and self._publisher.path != s.publish_frames:
+            self._publisher.close()
+            self._publisher = None
+        if self._publisher is not None:
+            # same ring: keep it, readers polling with after= keep getting frames
+            self._publisher.configure(s.publish_fps, s.publish_overlay)
+        elif s.publish_frames:
+            from frame_ring import FramePublisher
+
+            self._publisher = FramePublisher(s.publish_frames, max_fps=s.publish_fps, overlay=s.publish_overlay, metrics=self.metrics)
+
+    def _open_camera(self) -> None:
+        from camera_discovery import _open, load_profile, open_camera_backend
+        from capture import FrameGrabber
+        from capture_config import CaptureProfile, negotiate
+
+        s = self.settings
+        if self._source is not None:
+            # reattach to what worked last time, with the same backend: no discovery
+            cap = _open(self._source, self._backend)
+        elif s.cam_index is not None:
+            self._source, self._backend = int(s.cam_index), "any"
+            cap = _open(self._source, self._backend)
+        else:
+            cap, self._source, self._backend = open_camera_backend(0)
+        if cap is None or not cap.isOpened():
+            self._source = self._backend = None
+            raise RuntimeError("Unable to open any camera")
+        # same capture mode as main.py (saved / auto-tuned profile of this source)
+        saved = load_profile(self._source)
+        self.out.capture(negotiate(cap, CaptureProfile.from_dict(saved) if saved else CaptureProfile()))
+        self._cap = cap
+        self._grabber = FrameGrabber(cap, metrics=self.metrics).start()
+        self._dropped_reported = 0
+
+    def _release_camera(self) -> None:
+        if self._grabber is not None:
+            # releases the capture once the grab thread is out of cap.read()
+            if not self._grabber.stop(release=True):
+                print("Capture thread did not stop: camera not released", file=sys.stderr)
+            self._grabber = None
+        elif self._cap is not None:
+            self._cap.release()
+        self._cap = None
+        self._end_poses()
+        if self._publisher is not None:
+            # previews must not keep showing the last frame while paused
+            self._publisher.clear()
+        self.hd.reset_tracking()
+
+    def _end_poses(self) -> None:
+        # a pose held when the frames stop would otherwise never get its "end"
+        if self.gd.edges is None:
+            return
+        seq, ts = self._last_frame
+        for ev in self.gd.edges.flush(ts):
+            self.out.gesture(ev, seq)
+
+    def _process_frame(self, cv2: Any) -> None:
+        grabber, out, metrics = self._grabber, self.out, self.metrics
+        cf = grabber.read(timeout=0.05)
+        if cf is None:
+            if grabber.ended:
+                print("Camera stream ended, pausing", file=sys.stderr)
+                self._release_camera()
+                self.state = STATE_PAUSED
+                out.state(self.state)
+            return
+        t_frame = t = metrics.clock()
+        frame = cv2.flip(cf.frame_bgr, 1)
+        metrics.lap("flip", t)
+        hp = self.hd.process(frame, cf.ts, cf.seq, cf.mono)
+        t = metrics.clock()
+        events, per_hand, total = self.gd.process(hp.hands, hp.ts)
+        metrics.lap("gesture", t)
+        self._last_frame = (hp.seq, hp.ts)
+        for ev in events:
+            if ev.name != "count":
+                out.gesture(ev, hp.seq, captured=hp.mono)
+        if self._flight is not None:
+            self._flight.append(hp.seq, hp.ts, hp.hands, per_hand)
+        self.hud.observe(events, hp.ts)
+        pub = self._publisher
+        publish = pub is not None and pub.due()
+        hud_text = ""
+        if publish and pub.overlay:
+            hud_text = self.hud.text(per_hand, hp.ts, False)
+        if self.popup.active:
+            t = metrics.clock()
+            self.popup.publish((frame.shape[1], frame.shape[0]), hp.hands, total, per_hand, False, hp.ts)
+            payload = self.popup.pull()
+            if payload is not None:
+                out.popup(**payload)
+            metrics.lap("popup", t)
+        if publish:
+            pub.publish(hp.frame_bgr, hp.ts, hp.seq, hp.hands, hud_text, total)
+        metrics.lap("frame", t_frame)
+        metrics.frame_done()
+        if metrics.due():
+            dropped = grabber.dropped
+            out.metrics(metrics.summary(dropped=dropped - self._dropped_reported))
+            self._dropped_reported = dropped
+
+    def serve_forever(self) -> None:
+        import cv2
+        from diagnostics import FlightRecorder
+        from hand_detector import HandDetector
+        from metrics import StageMetrics
+        from protocol import EventWriter
+
+        t = time.perf_counter()
+        self.out = EventWriter(sys.stdout, self.event_format)
+        self.metrics = StageMetrics(("read", "flip", "cvt", "mediapipe", "gesture", "popup", "publish", "frame"), interval_s=self.settings.metrics_interval)
+        self.hd = HandDetector(metrics=self.metrics, detect_width=self.settings.detect_width, roi_tracking=self.settings.roi_tracking)
+        self.hd.warm_up()
+        self._build_logic()
+        self._flight = FlightRecorder(self.flight_seconds, out_dir=os.path.join(os.getcwd(), "wave_records")) if self.flight_seconds > 0 else None
+        self._listen()
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        print(f"Gesture daemon ready on {self.socket_path} (model loaded in {(time.perf_counter() - t) * 1000.0:.0f} ms)", file=sys.stderr)
+        self.out.state(self.state)
+        self.out.flush()
+        try:
+            while not self._stop.is_set():
+                try:
+                    # idle / paused: nothing to do but wait for a command
+                    cmd = self._cmds.get(timeout=0.2) if self.state != STATE_RUNNING else self._cmds.get_nowait()
+                except queue.Empty:
+                    cmd = None
+                if cmd is not None:
+                    prev = self.state
+                    try:
+                        cmd.reply = self._handle(cmd.req)
+                    except Exception as e:
+                        cmd.reply = {"ok": False, "error": str(e), "state": self.state}
+                    cmd.done.set()
+                    if self.state != prev:
+                        self.out.state(self.state)
+                if self.state == STATE_RUNNING:
+                    self._process_frame(cv2)
+                self.out.flush()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            self._release_camera()
+            if self._publisher is not None:
+                self._publisher.close()
+            if self._sock is not None:
+                self._sock.close()
+                try:
+                    os.unlink(self.socket_path)
+                except OSError:
+                    pass
+            self.out.state("stopped")
+            self.out.flush()
+
+
+class DaemonClient:
+    """Blocking client for the control socket (one connection, reused)."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, timeout: float = 10.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._f = None
+
+    def _connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self._sock = sock
+        self._f = sock.makefile("rwb")
+
+    def request(self, cmd: str, **fields: Any) -> Dict[str, Any]:
+        if self._sock is None:
+            self._connect()
+        self._f.write(json.dumps({"cmd": cmd, **fields}).encode() + b"\n")
+        self._f.flush()
+        line = self._f.readline()
+        if not line:
+            self.close()
+            raise ConnectionError("daemon closed the connection")
+        return json.loads(line)
+
+    def start(self) -> Dict[str, Any]:
+        return self.request("start")
+
+    def pause(self) -> Dict[str, Any]:
+        return self.request("pause")
+
+    def resume(self) -> Dict[str, Any]:
+        return self.request("resume")
+
+    def reconfigure(self, **settings: Any) -> Dict[str, Any]:
+        return self.request("reconfigure", settings=settings)
+
+    def status(self) -> Dict[str, Any]:
+        return self.request("status")
+
+    def dump(self) -> Dict[str, Any]:
+        return self.request("dump")
+
+    def shutdown(self) -> Dict[str, Any]:
+        return self.request("shutdown")
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._f.close()
+            self._sock.close()
+            self._sock = None
+            self._f = None
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send a command to a running gesture daemon (main.py --daemon)")
+    parser.add_argument("cmd", choices=("start", "pause", "resume", "status", "dump", "shutdown", "reconfigure"))
+    parser.add_argument("settings", nargs="*", metavar="KEY=VALUE", help="For reconfigure (values parsed as JSON when possible)")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    args = parser.parse_args()
+
+    kw: Dict[str, Any] = {}
+    for item in args.settings:
+        k, _, v = item.partition("=")
+        try:
+            kw[k] = json.loads(v)
+        except ValueError:
+            kw[k] = v
+    with DaemonClient(args.socket) as client:
+        reply = client.reconfigure(**kw) if args.cmd == "reconfigure" else client.request(args.cmd)
+    print(json.dumps(reply, indent=2))
+    sys.exit(0 if reply.get("ok") else 1)
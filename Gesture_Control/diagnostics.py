@@ -0,0 +1,255 @@
+"""Per-frame gesture diagnostics: streaming recorder + flight recorder.
+
+Records are fixed-size typed rows (one per hand, or one HAND_NONE row for a
+frame without hands), so a file opens with np.memmap like the landmark log:
+
+    frame, hand, mask (5-bit finger states), count, flips, ts, score,
+    amp_norm, open_ratio, conf, lms (21, 2)
+
+- DiagnosticsWriter appends rows from a background thread: no size or time
+  cap, and the frame loop never touches the file (the thread opens and
+  closes it too, so starting / stopping a recording never blocks).
+- FlightRecorder keeps the last N seconds in memory, always on; dump it with
+  SIGUSR1 (or request_dump()) right after a misdetection. It keeps references
+  to the frame's hands / per-hand results and builds the rows only when it
+  dumps, so being always on costs the frame loop a deque append.
+
+Read a file back with `python diagnostics.py FILE`.
+"""
+import argparse
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from gestures import FINGERS
+from landmark_log import HAND_NONE, HAND_UNKNOWN, _HAND_CODES, _HAND_NAMES
+
+MAGIC = b"RHDG"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHQ")  # magic, version, record size, reserved
+
+DIAG_DTYPE = np.dtype(
+    [
+        ("frame", "<u4"),
+        ("hand", "u1"),
+        ("mask", "u1"),
+        ("count", "u1"),
+        ("flips", "<u2"),
+        ("ts", "<f8"),
+        ("score", "<f4"),
+        ("amp_norm", "<f4"),
+        ("open_ratio", "<f4"),
+        ("conf", "<f4"),
+        ("lms", "<f4", (21, 2)),
+    ]
+)
+
+
+def diag_records(frame: int, ts: float, hands: Sequence[Any], per_hand: Dict[str, Any]) -> np.ndarray:
+    """Rows for one frame from the HandsPacket hands and GestureDetector per_hand."""
+    rows = [h for h in hands if h.handedness in per_hand]
+    rec = np.zeros(max(len(rows), 1), dtype=DIAG_DTYPE)
+    rec["frame"] = frame
+    rec["ts"] = ts
+    if not rows:
+        rec["hand"] = HAND_NONE
+    for i, h in enumerate(rows):
+        ph = per_hand[h.handedness]
+        amp_norm, flips, open_ratio, conf = ph.wave or (0.0, 0, 0.0, 0.0)
+        r = rec[i]
+        r["hand"] = _HAND_CODES.get(h.handedness, HAND_UNKNOWN)
+        r["mask"] = sum(1 << j for j, f in enumerate(FINGERS) if ph.states.get(f))
+        r["count"] = ph.count
+        r["flips"] = flips
+        r["score"] = ph.score
+        r["amp_norm"] = amp_norm
+        r["open_ratio"] = open_ratio
+        r["conf"] = conf
+        r["lms"] = h.landmarks
+    return rec
+
+
+def _write_file(path: str, chunks: Sequence[np.ndarray]) -> int:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    n = 0
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, DIAG_DTYPE.itemsize, 0))
+        for c in chunks:
+            f.write(c.tobytes())
+            n += len(c)
+    return n
+
+
+class DiagnosticsWriter:
+    """Stream diagnostics rows to files from a background thread.
+
+    The thread owns the files: `start(path)` / `stop()` only queue a command,
+    so a recording can be toggled from the frame loop. Create the writer
+    before the loop and `close()` it (joins the thread) at exit.
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_interval_s: float = 1.0):
+        self.path: Optional[str] = None  # file being recorded, None = idle
+        self.flush_interval_s = float(flush_interval_s)
+        self.rows = 0  # rows written to the current (or last) file
+        self._q: "queue.SimpleQueue[Union[None, np.ndarray, Tuple[str, Optional[str]]]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = threading.Thread(target=self._run, name="diag-writer", daemon=True)
+        self._thread.start()
+        if path:
+            self.start(path)
+
+    @property
+    def recording(self) -> bool:
+        return self.path is not None
+
+    def start(self, path: str) -> None:
+        if self.path is not None:
+            self.stop()
+        self.path = path
+        self._q.put(("open", path))
+
+    def stop(self) -> Optional[str]:
+        """Stop recording; the file is closed (and reported) on the writer thread."""
+        path, self.path = self.path, None
+        if path is not None:
+            self._q.put(("close", path))
+        return path
+
+    def write(self, rec: np.ndarray) -> None:
+        # never blocks: the queue is unbounded and drained by the writer thread
+        if self.path is not None:
+            self._q.put(rec)
+
+    def _run(self) -> None:
+        f = None
+        last_flush = time.monotonic()
+        while True:
+            item = self._q.get()
+            if item is None:
+                break
+            if isinstance(item, tuple):
+                cmd, path = item
+                if cmd == "open":
+                    self.rows = 0
+                    try:
+                        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                        f = open(path, "wb")
+                        f.write(_HEADER.pack(MAGIC, VERSION, DIAG_DTYPE.itemsize, 0))
+                    except OSError as e:
+                        print(f"Diagnostics: cannot record to {path}: {e}", file=sys.stderr)
+                        f = None
+                elif f is not None:
+                    f.close()
+                    f = None
+                    print(f"Saved {self.rows} diagnostics rows to {path} (read it with diagnostics.py)", file=sys.stderr)
+                continue
+            if f is None:
+                continue
+            f.write(item.tobytes())
+            self.rows += len(item)
+            now = time.monotonic()
+            if now - last_flush >= self.flush_interval_s:
+                f.flush()
+                last_flush = now
+        if f is not None:
+            f.close()
+
+    def close(self) -> None:
+        """Stop recording and end the writer thread (waits for the queued rows)."""
+        if self._thread is not None:
+            self.stop()
+            self._q.put(None)
+            self._thread.join()
+            self._thread = None
+
+
+class FlightRecorder:
+    """Always-on ring buffer of the last `seconds` of frames, written as
+    diagnostics rows when dumped."""
+
+    def __init__(self, seconds: float = 30.0, out_dir: str = "wave_records"):
+        self.seconds = float(seconds)
+        self.out_dir = out_dir
+        # (frame, ts, hands, per_hand): the detectors build fresh objects every
+        # frame, so holding references is safe and rows are made at dump time
+        self._buf: Deque[Tuple[int, float, Sequence[Any], Dict[str, Any]]] = deque()
+        self._dump_requested = threading.Event()
+        self.dumps = 0
+
+    def append(self, frame: int, ts: float, hands: Sequence[Any], per_hand: Dict[str, Any]) -> None:
+        buf = self._buf
+        buf.append((frame, ts, hands, per_hand))
+        limit = ts - self.seconds
+        while buf and buf[0][1] < limit:
+            buf.popleft()
+        if self._dump_requested.is_set():
+            self._dump_requested.clear()
+            self.dump()
+
+    def request_dump(self) -> None:
+        """Safe from signal handlers / other threads: the next append() dumps."""
+        self._dump_requested.set()
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """Write the current window to a file from a background thread."""
+        frames = list(self._buf)
+        if path is None:
+            path = os.path.join(self.out_dir, f"flight_{int(time.time())}_{self.dumps}.bin")
+        self.dumps += 1
+
+        def _job() -> None:
+            try:
+                n = _write_file(path, [diag_records(*f) for f in frames])
+                print(f"Flight recorder: saved {n} rows to {path}", file=sys.stderr)
+            except Exception as e:
+                print(f"Flight recorder: failed to save {path}: {e}", file=sys.stderr)
+
+        threading.Thread(target=_job, name="flight-dump", daemon=True).start()
+        return path
+
+
+def load_diagnostics(path: str) -> np.ndarray:
+    """Memory-map a diagnostics file as a structured array of DIAG_DTYPE."""
+    with open(path, "rb") as f:
+        head = f.read(_HEADER.size)
+    if len(head) < _HEADER.size:
+        raise ValueError(f"{path}: not a diagnostics file (truncated header)")
+    magic, version, rec_size, _ = _HEADER.unpack(head)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a diagnostics file (bad magic)")
+    if version != VERSION or rec_size != DIAG_DTYPE.itemsize:
+        raise ValueError(f"{path}: unsupported diagnostics version {version} (record size {rec_size})")
+    # a file still being written may end with a partial row
+    n = (os.path.getsize(path) - _HEADER.size) // rec_size
+    if n == 0:
+        return np.zeros(0, dtype=DIAG_DTYPE)
+    return np.memmap(path, dtype=DIAG_DTYPE, mode="r", offset=_HEADER.size, shape=(n,))
+
+
+def format_row(r: Any) -> str:
+    hand = int(r["hand"])
+    if hand == HAND_NONE:
+        return f"{float(r['ts']):.3f}\t-"
+    states = "".join(f[0].upper() if (int(r["mask"]) >> j) & 1 else "." for j, f in enumerate(FINGERS))
+    return (
+        f"{float(r['ts']):.3f}\t{_HAND_NAMES[hand]}\tstates={states}\tcount={int(r['count'])}\t"
+        f"amp={float(r['amp_norm']):.4f}\tflips={int(r['flips'])}\topen={float(r['open_ratio']):.3f}\tconf={float(r['conf']):.3f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Print a diagnostics / flight-recorder file")
+    parser.add_argument("path")
+    parser.add_argument("--skip-empty", action="store_true", help="Hide frames without hands")
+    args = parser.parse_args()
+    for r in load_diagnostics(args.path):
+        if args.skip_empty and int(r["hand"]) == HAND_NONE:
+            continue
+        print(format_row(r))
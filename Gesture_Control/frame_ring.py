@@ -0,0 +1,290 @@
+"""Latest-frame ring in a memory-mapped file, for local previews.
+
+The vision loop copies each published frame once into one of `slots` slots
+of a shared file (on /dev/shm where available) and moves on: no locks, no
+sockets, no waiting for readers. Readers (the Node backend, preview.py, a
+debugging script) map the same file and look at the newest complete slot
+without a second camera open.
+
+Layout (little endian):
+
+    header, 64 bytes: magic "GCFR", u16 version, u16 slots, u32 slot payload
+                      capacity, u32 slot stride, u64 latest frame number
+                      (0 = none yet), u32 writer pid
+    slot i at 64 + i * stride, 64-byte header then the pixels:
+                      u64 gen, f64 ts, u32 width, u32 height, u16 channels,
+                      u16 flags, u32 nbytes, u64 capture seq
+
+`latest` goes back to 0 when the writer has no live frame to offer (camera
+released); frame numbers keep counting when publishing resumes.
+
+`gen` is a per-slot sequence lock: 2n-1 while frame n is being written, 2n
+once it is complete. A reader takes `latest`, reads its slot, and trusts the
+pixels only if `gen` was 2n before and after. With several slots the writer
+only comes back to a slot `slots` frames later, so a reader has that long to
+use a zero-copy view. When the frame size outgrows the slots the writer
+replaces the file; readers notice the new inode and remap.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Sequence
+
+import numpy as np
+
+MAGIC = b"GCFR"
+VERSION = 1
+DEFAULT_PATH = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "gesture_control.frames")
+
+_HEADER = struct.Struct("<4sHHIIQI")
+_LATEST = struct.Struct("<Q")
+_LATEST_OFF = 16
+_SLOT = struct.Struct("<QdIIHHIQ")
+_HEADER_SIZE = 64
+_SLOT_HEADER = 64
+
+# flags
+FLAG_OVERLAY = 1  # landmarks / HUD drawn on the frame
+
+
+def _stride(capacity: int) -> int:
+    return _SLOT_HEADER + (capacity + 63) // 64 * 64
+
+
+def _release(mm: mmap.mmap) -> None:
+    try:
+        mm.close()
+    except BufferError:
+        # numpy views of it are still alive: unmapped when they are collected
+        pass
+
+
+@dataclass(slots=True)
+class RingFrame:
+    number: int  # frame number in the ring (1, 2, ...)
+    seq: int  # capture sequence number (FrameGrabber)
+    ts: float
+    flags: int
+    image: np.ndarray  # (h, w, c) uint8; a view into the ring unless copied
+
+
+class FrameRing:
+    """Writer side. `publish()` never blocks and never waits for readers."""
+
+    def __init__(self, path: str = DEFAULT_PATH, slots: int = 3):
+        self.path = path
+        self.slots = max(2, int(slots))
+        self.frames = 0
+        self._mm: Optional[mmap.mmap] = None
+        self._capacity = 0
+        self._stride = 0
+
+    def _create(self, capacity: int) -> None:
+        stride = _stride(capacity)
+        size = _HEADER_SIZE + self.slots * stride
+        # build the new file aside and swap it in: readers of the old one keep
+        # a valid (stale) mapping until they notice the inode change
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(fd, size)
+            mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        _HEADER.pack_into(mm, 0, MAGIC, VERSION, self.slots, capacity, stride, 0, os.getpid())
+        os.replace(tmp, self.path)
+        if self._mm is not None:
+            _release(self._mm)
+        # frame numbers keep counting: readers wait for numbers > the last seen
+        self._mm, self._capacity, self._stride = mm, capacity, stride
+
+    def publish(self, frame: np.ndarray, ts: float, seq: int = 0, flags: int = 0, draw: Optional[Callable[[np.ndarray], None]] = None) -> np.ndarray:
+        """Copy `frame` into the next slot and make it the latest.
+
+        `draw` is called on the slot view before the frame is committed, so
+        overlays land in shared memory without touching `frame` or copying
+        it again. Returns that view (valid until the slot is reused).
+        """
+        frame = np.asarray(frame, dtype=np.uint8)
+        h, w = frame.shape[:2]
+        c = frame.shape[2] if frame.ndim == 3 else 1
+        nbytes = h * w * c
+        if self._mm is None or nbytes > self._capacity:
+            self._create(nbytes)
+        mm = self._mm
+        n = self.frames + 1
+        base = _HEADER_SIZE + (n % self.slots) * self._stride
+
+        _SLOT.pack_into(mm, base, 2 * n - 1, ts, w, h, c, flags, nbytes, seq)
+        view = np.ndarray((h, w, c), dtype=np.uint8, buffer=mm, offset=base + _SLOT_HEADER)
+        np.copyto(view, frame.reshape(h, w, c))
+        if draw is not None:
+            draw(view if frame.ndim == 3 else view[..., 0])
+        _SLOT.pack_into(mm, base, 2 * n, ts, w, h, c, flags, nbytes, seq)
+        _LATEST.pack_into(mm, _LATEST_OFF, n)
+        self.frames = n
+        return view
+
+    def clear(self) -> None:
+        """No current frame (the camera was released): readers get None
+        instead of the last frame until the next publish()."""
+        if self._mm is not None:
+            _LATEST.pack_into(self._mm, _LATEST_OFF, 0)
+
+    def close(self, unlink: bool = True) -> None:
+        if self._mm is not None:
+            _release(self._mm)
+            self._mm = None
+            if unlink:
+                try:
+                    os.unlink(self.path)
+                except OSError:
+                    pass
+
+
+class FrameRingReader:
+    """Reader side: zero-copy views of the newest complete frame."""
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        self.path = path
+        self._mm: Optional[mmap.mmap] = None
+        self._ino = None
+        self._slots = 0
+        self._stride = 0
+
+    def _map(self) -> bool:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        if self._mm is not None and st.st_ino == self._ino:
+            return True
+        if self._mm is not None:
+            _release(self._mm)
+            self._mm = None
+        if st.st_size < _HEADER_SIZE:
+            return False
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, slots, _, stride, _, _ = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION or len(mm) < _HEADER_SIZE + slots * stride:
+            mm.close()
+            return False
+        self._mm, self._ino, self._slots, self._stride = mm, st.st_ino, slots, stride
+        return True
+
+    @property
+    def latest_number(self) -> int:
+        """Number of the newest complete frame (0 = none yet / no ring)."""
+        if not self._map():
+            return 0
+        return _LATEST.unpack_from(self._mm, _LATEST_OFF)[0]
+
+    def latest(self, after: int = 0, copy: bool = False) -> Optional[RingFrame]:
+        """Newest complete frame, or None if there is none newer than `after`.
+
+        Without `copy` the image is a view into shared memory: call `valid()`
+        after using it to know whether the writer reused the slot meanwhile.
+        """
+        n = self.latest_number
+        if n == 0 or n <= after:
+            return None
+        mm = self._mm
+        base = _HEADER_SIZE + (n % self._slots) * self._stride
+        gen, ts, w, h, c, flags, nbytes, seq = _SLOT.unpack_from(mm, base)
+        if gen != 2 * n or nbytes != w * h * c:
+            # overwritten already (reader too slow) or torn header
+            return None
+        image = np.ndarray((h, w, c), dtype=np.uint8, buffer=mm, offset=base + _SLOT_HEADER)
+        if copy:
+            image = image.copy()
+        frame = RingFrame(number=n, seq=seq, ts=ts, flags=flags, image=image)
+        return frame if self.valid(frame) else None
+
+    def valid(self, frame: RingFrame) -> bool:
+        """True if the slot still holds `frame` (its pixels were not overwritten)."""
+        if self._mm is None:
+            return False
+        base = _HEADER_SIZE + (frame.number % self._slots) * self._stride
+        return _SLOT.unpack_from(self._mm, base)[0] == 2 * frame.number
+
+    def close(self) -> None:
+        if self._mm is not None:
+            _release(self._mm)
+            self._mm = None
+
+
+class FramePublisher:
+    """Rate-limited FrameRing publishing for the frame loop, with optional
+    overlay (same drawing as the OpenCV window) done on the ring copy."""
+
+    def __init__(self, path: str = DEFAULT_PATH, max_fps: float = 15.0, overlay: bool = False, slots: int = 3, metrics: Optional[Any] = None):
+        self.ring = FrameRing(path, slots=slots)
+        self.configure(max_fps, overlay)
+        self._metrics = metrics
+        self._last = 0.0
+        self._ui = None
+
+    def configure(self, max_fps: float, overlay: bool) -> None:
+        """Change rate / overlay in place: the ring and its frame numbers stay."""
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.overlay = bool(overlay)
+
+    @property
+    def path(self) -> str:
+        return self.ring.path
+
+    def due(self) -> bool:
+        return (time.perf_counter() - self._last) >= self.min_interval
+
+    def publish(self, frame: np.ndarray, ts: float, seq: int = 0, hands: Sequence[Any] = (), hud_text: str = "", total: int = 0) -> None:
+        self._last = time.perf_counter()
+        m = self._metrics
+        t = m.clock() if m is not None else 0.0
+        draw = None
+        if self.overlay:
+            if self._ui is None:
+                from camera import CameraUI
+
+                self._ui = CameraUI()
+            ui = self._ui
+
+            def draw(img: np.ndarray) -> None:
+                for h in hands:
+                    if h.handedness in ("left", "right"):
+                        ui.draw_hand(img, h.landmarks, h.handedness)
+                ui.draw_hud(img, hud_text, total)
+
+        self.ring.publish(frame, ts, seq, FLAG_OVERLAY if self.overlay else 0, draw)
+        if m is not None:
+            m.lap("publish", t)
+
+    def clear(self) -> None:
+        self.ring.clear()
+
+    def close(self) -> None:
+        self.ring.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Watch a frame ring (main.py --publish-frames)")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    reader = FrameRingReader(args.path)
+    last, got, t_end = 0, 0, time.time() + args.seconds
+    while time.time() < t_end:
+        fr = reader.latest(after=last)
+        if fr is None:
+            time.sleep(0.005)
+            continue
+        got += 1
+        last = fr.number
+        print(f"frame {fr.number} seq={fr.seq} ts={fr.ts:.3f} {fr.image.shape[1]}x{fr.image.shape[0]}x{fr.image.shape[2]} flags={fr.flags}")
+    print(f"{got} frames in {args.seconds:.1f} s")
@@ -1,23 +1,125 @@
-from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple, Optional
 
-from gestures import GestureEvent, WaveTracker, finger_states, count_fingers, is_open_palm, is_yolo_shaka, is_peace, dist
+import numpy as np
+
+from gesture_registry import DEFAULT_REGISTRY, GestureRegistry, finger_masks
+from gestures import GestureEvent, WaveTracker, hand_geometry, states_dict, count_fingers
 
 Vec2 = Tuple[float, float]
 
 
-@dataclass
+@dataclass(slots=True)
 class PerHandResult:
     handedness: str
     score: float
     states: Dict[str, bool]
     count: int
     center: Vec2
-    wave_stats: Optional[Dict[str, float]] = None
+    # raw (amp_norm, flips, open_ratio, conf) from the WaveTracker
+    wave: Optional[Tuple[float, int, float, float]] = None
+    # gestures recognized on this hand in this frame (level, not edges)
+    gestures: List[str] = field(default_factory=list)
+
+    @property
+    def wave_stats(self) -> Optional[Dict[str, float]]:
+        # built on access: most frames nobody looks at it
+        if self.wave is None:
+            return None
+        amp_norm, flips, open_ratio, conf = self.wave
+        return {"amp_norm": amp_norm, "flips": flips, "open_ratio": open_ratio, "conf": conf}
+
+
+# gestures that are events by themselves (already fired once + cooldown)
+PULSE_GESTURES = ("wave",)
+
+
+class _PoseState:
+    __slots__ = ("present", "absent", "since", "active", "started", "last_emit", "conf", "payload")
+
+    def __init__(self, ts: float):
+        self.present = 0
+        self.absent = 0
+        self.since = ts
+        self.active = False
+        self.started = 0.0
+        self.last_emit = 0.0
+        self.conf = 0.0
+        self.payload: Dict[str, Any] = {}
+
+
+class EdgeTracker:
+    """Turns per-frame pose detections into start / hold / end transitions.
+
+    A pose is confirmed ("start") after it was seen for `debounce_frames`
+    consecutive frames and at least `debounce_ms`; it ends after
+    `release_frames` consecutive frames without it. With hold_interval_s > 0
+    an active pose also emits a low-rate "hold" heartbeat. Pulse gestures
+    (wave) go through unchanged with phase "pulse".
+    """
+
+    def __init__(self, debounce_frames: int = 3, debounce_ms: float = 0.0, release_frames: Optional[int] = None, hold_interval_s: float = 0.0):
+        self.debounce_frames = max(1, int(debounce_frames))
+        self.debounce_s = float(debounce_ms) / 1000.0
+        self.release_frames = max(1, int(release_frames if release_frames is not None else debounce_frames))
+        self.hold_interval_s = float(hold_interval_s)
+        self._poses: Dict[Tuple[str, str], _PoseState] = {}
+
+    def update(self, level: List[GestureEvent], ts: float) -> List[GestureEvent]:
+        out: List[GestureEvent] = []
+        seen = set()
+        for ev in level:
+            if ev.name in PULSE_GESTURES:
+                ev.phase = "pulse"
+                out.append(ev)
+                continue
+            key = (ev.hand, ev.name)
+            seen.add(key)
+            st = self._poses.get(key)
+            if st is None:
+                st = self._poses[key] = _PoseState(ts)
+            if st.present == 0:
+                st.since = ts
+            st.present += 1
+            st.absent = 0
+            st.conf = ev.confidence
+            st.payload = ev.payload
+            if not st.active:
+                if st.present >= self.debounce_frames and (ts - st.since) >= self.debounce_s:
+                    st.active = True
+                    st.started = ts
+                    st.last_emit = ts
+                    out.append(GestureEvent(name=ev.name, hand=ev.hand, confidence=ev.confidence, ts=ts, payload=ev.payload, phase="start"))
+            elif self.hold_interval_s > 0 and ts - st.last_emit >= self.hold_interval_s:
+                st.last_emit = ts
+                out.append(GestureEvent(name=ev.name, hand=ev.hand, confidence=ev.confidence, ts=ts, payload=ev.payload, phase="hold"))
+
+        for key, st in list(self._poses.items()):
+            if key in seen:
+                continue
+            st.present = 0
+            st.absent += 1
+            if st.active and st.absent >= self.release_frames:
+                hand, name = key
+                out.append(GestureEvent(name=name, hand=hand, confidence=st.conf, ts=ts, payload={"duration_s": ts - st.started}, phase="end"))
+                st.active = False
+            if not st.active:
+                del self._poses[key]
+        return out
+
+    def flush(self, ts: float) -> List[GestureEvent]:
+        """End every active pose now (frames stopped coming) and forget the rest."""
+        out = [
+            GestureEvent(name=name, hand=hand, confidence=st.conf, ts=ts, payload={"duration_s": ts - st.started}, phase="end")
+            for (hand, name), st in self._poses.items()
+            if st.active
+        ]
+        self._poses.clear()
+        return out
 
 
 class GestureDetector:
-    def __init__(self, wave_permissive: bool = False, *, min_score: float = 0.50, min_palm_scale: float = 0.04, center_margin: float = 0.02, suppress_open_after_wave_s: float = 1.5, emit_wave_dbg: bool = False):
+    def __init__(self, wave_permissive: bool = False, *, min_score: float = 0.50, min_palm_scale: float = 0.04, center_margin: float = 0.02, suppress_open_after_wave_s: float = 1.5, emit_wave_dbg: bool = False, edges: Optional[EdgeTracker] = None, registry: Optional[GestureRegistry] = None):
         # Configuration: tune to avoid false positives (shoulder / tiny detections)
         self.min_score = float(min_score)
         self.min_palm_scale = float(min_palm_scale)
@@ -30,56 +132,32 @@ class GestureDetector:
         self._wave = {"left": WaveTracker(), "right": WaveTracker()}
         # per-hand timestamp when a wave was last fired; used to suppress open_palm
         self._last_wave_ts = {"left": -1e9, "right": -1e9}
-
-    def _center(self, lms: List[Vec2]) -> Vec2:
-        sx = 0.0
-        sy = 0.0
-        for x, y in lms:
-            sx += x
-            sy += y
-        n = float(len(lms)) if lms else 1.0
-        return (sx / n, sy / n)
-
-    def _thumbs_up(self, lms: List[Vec2], states: Dict[str, bool]) -> bool:
-        if len(lms) < 21:
-            return False
-        wrist = lms[0]
-        thumb_tip = lms[4]
-        thumb_ip = lms[3]
-        thumb_vertical = (thumb_tip[1] < thumb_ip[1]) and (thumb_tip[1] < wrist[1])
-        others_down = (not states["index"]) and (not states["middle"]) and (not states["ring"]) and (not states["pinky"])
-        return bool(states["thumb"] and thumb_vertical and others_down)
-
-    
-
-    def _middle_finger(self, states: Dict[str, bool]) -> bool:
-        # Recognize middle finger gesture when the middle finger is extended
-        # and index/ring/pinky are not extended. Allow the thumb to be either
-        # extended or not (user may show middle + thumb).
-        return states["middle"] and (not states["index"]) and (not states["ring"]) and (not states["pinky"])
-
-    def _rock(self, states: Dict[str, bool]) -> bool:
-        """Rock-and-roll: index + pinky extended, middle and ring down.
-
-        Thumb may be either up or down (user preference). We treat both as
-        valid rock gestures per request.
-        """
-        return states.get("index", False) and states.get("pinky", False) and (not states.get("middle", False)) and (not states.get("ring", False))
-
-    def process(self, hands: List[Dict[str, Any]], ts: float) -> Tuple[List[GestureEvent], Dict[str, PerHandResult], int]:
+        # optional start/hold/end state machine; None keeps one event per frame
+        self.edges = edges
+        # static gestures (finger pattern + geometry), see gesture_registry.py
+        self.registry = registry if registry is not None else DEFAULT_REGISTRY
+
+    def process(self, hands: Sequence[Any], ts: float) -> Tuple[List[GestureEvent], Dict[str, PerHandResult], int]:
+        """Run one frame. `hands` are HandObs-like objects exposing
+        `landmarks` ((21, 2) array), `handedness` and `score`."""
         per_hand: Dict[str, PerHandResult] = {}
         events: List[GestureEvent] = []
 
-        for h in hands:
-            lms: List[Vec2] = h["landmarks"]
-            handed = h["handedness"]
-            score = float(h["score"])
-            if handed not in ("left", "right"):
-                continue
+        hands = [h for h in hands if h.handedness in ("left", "right")]
+        if hands:
+            # one vectorized pass for every hand in the frame
+            lms_all = np.stack([np.asarray(h.landmarks, dtype=np.float64) for h in hands])
+            states_all, centers_all, palm_all = hand_geometry(lms_all, [h.handedness for h in hands])
+            masks = finger_masks(states_all)
+
+        for i, h in enumerate(hands):
+            lms = lms_all[i]
+            handed = h.handedness
+            score = float(h.score)
 
-            states = finger_states(lms, handed)
+            states = states_dict(states_all[i])
             cnt = count_fingers(states)
-            center = self._center(lms)
+            center = (float(centers_all[i, 0]), float(centers_all[i, 1]))
 
             per_hand[handed] = PerHandResult(
                 handedness=handed,
@@ -89,10 +167,8 @@ class GestureDetector:
                 center=center,
             )
 
-            # Compute wrist/palm and palm_scale early (used for sanity checks)
-            wrist = lms[0] if len(lms) > 0 else center
-            palm = lms[9] if len(lms) > 9 else wrist
-            palm_scale = dist(wrist, palm)
+            # wrist->palm distance (used for sanity checks and wave normalization)
+            palm_scale = float(palm_all[i])
 
             # Sanity checks: avoid false positives when detection is weak or hand is off-frame
             center_x, center_y = center
@@ -107,49 +183,25 @@ class GestureDetector:
 
             if not valid_hand:
                 # reset wave buffers for this hand to avoid leftover partial buffers
-                try:
-                    self._wave[handed].xbuf.clear()
-                    self._wave[handed].openbuf.clear()
-                except Exception:
-                    pass
+                self._wave[handed].reset()
                 # do not register gesture events for invalid/weak detections
             else:
-                if is_open_palm(states):
-                    # suppress open_palm for a short period after a detected wave
-                    if ts - self._last_wave_ts.get(handed, -1e9) >= self.suppress_open_after_wave_s:
-                        events.append(GestureEvent(name="open_palm", hand=handed, confidence=score, ts=ts, payload={"count": cnt}))
-
-                if self._thumbs_up(lms, states):
-                    events.append(GestureEvent(name="thumbs_up", hand=handed, confidence=score, ts=ts, payload={}))
-
-                if self._middle_finger(states):
-                    events.append(GestureEvent(name="middle_finger", hand=handed, confidence=score, ts=ts, payload={}))
-
-                if is_yolo_shaka(states):
-                    events.append(GestureEvent(name="yolo", hand=handed, confidence=score, ts=ts, payload={"style": "shaka"}))
-
-                # peace gesture (index + middle)
-                if is_peace(states):
-                    events.append(GestureEvent(name="peace", hand=handed, confidence=score, ts=ts, payload={}))
-
-                # rock-and-roll (index + pinky), thumb may be either up/down
-                if self._rock(states):
-                    events.append(GestureEvent(name="rock", hand=handed, confidence=score, ts=ts, payload={}))
+                recent_wave = ts - self._last_wave_ts.get(handed, -1e9) < self.suppress_open_after_wave_s
+                for spec in self.registry.classify(int(masks[i]), lms):
+                    if spec.suppressed_by_wave and recent_wave:
+                        continue
+                    events.append(GestureEvent(name=spec.name, hand=handed, confidence=score, ts=ts, payload=dict(spec.payload)))
 
             # For wave detection we require the hand to be mostly open, but
             # allow 4 or 5 fingers (some people keep the thumb slightly in).
             open_palm = (cnt >= 4)
             # Prefer palm center (landmark 9) as x source; it's more stable
             # than the wrist or the centroid of all points.
-            wrist = lms[0] if len(lms) > 0 else center
-            palm = lms[9] if len(lms) > 9 else wrist
-            palm_scale = dist(wrist, palm)
-
             fired, amp_norm, flips, open_ratio, conf = self._wave[handed].update(
-                x=palm[0], is_open=open_palm, palm_scale=palm_scale, ts=ts
+                x=float(lms[9, 0]), is_open=open_palm, palm_scale=palm_scale, ts=ts
             )
-            # attach normalized wave stats to per-hand result for debug/inspection
-            per_hand[handed].wave_stats = {"amp_norm": amp_norm, "flips": flips, "open_ratio": open_ratio, "conf": conf}
+            # normalized wave stats for debug/inspection (dict built lazily, see wave_stats)
+            per_hand[handed].wave = (amp_norm, flips, open_ratio, conf)
             # Lightweight debug: print when there is notable motion or flips
             if self.emit_wave_dbg and ((flips > 0) or (amp_norm >= 0.15)):
                 print(f"[WAVE_DBG] ts={ts:.2f} hand={handed} amp={amp_norm:.3f} flips={flips} open_ratio={open_ratio:.2f} fired={fired}")
@@ -171,23 +223,34 @@ class GestureDetector:
                 except Exception:
                     pass
 
-        left_cnt = per_hand["left"].count if "left" in per_hand else 0
-        right_cnt = per_hand["right"].count if "right" in per_hand else 0
-        total = left_cnt + right_cnt
-        if total > 10:
-            total = 10
-
-        hands_tag = "both" if ("left" in per_hand and "right" in per_hand) else ("left" if "left" in per_hand else ("right" if "right" in per_hand else "none"))
-        conf_count = 1.0 if hands_tag != "none" else 0.0
-
-        events.append(
-            GestureEvent(
-                name="count",
-                hand=hands_tag,
-                confidence=conf_count,
-                ts=ts,
-                payload={"left": left_cnt, "right": right_cnt, "total": total},
-            )
+        return finish_frame(events, per_hand, ts, self.edges)
+
+
+def finish_frame(events: List[GestureEvent], per_hand: Dict[str, PerHandResult], ts: float, edges: Optional[EdgeTracker]) -> Tuple[List[GestureEvent], Dict[str, PerHandResult], int]:
+    """Common end of a frame: tag per-hand gestures, run the edge tracker and
+    append the finger "count" event."""
+    for ev in events:
+        per_hand[ev.hand].gestures.append(ev.name)
+    if edges is not None:
+        events = edges.update(events, ts)
+
+    left_cnt = per_hand["left"].count if "left" in per_hand else 0
+    right_cnt = per_hand["right"].count if "right" in per_hand else 0
+    total = left_cnt + right_cnt
+    if total > 10:
+        total = 10
+
+    hands_tag = "both" if ("left" in per_hand and "right" in per_hand) else ("left" if "left" in per_hand else ("right" if "right" in per_hand else "none"))
+    conf_count = 1.0 if hands_tag != "none" else 0.0
+
+    events.append(
+        GestureEvent(
+            name="count",
+            hand=hands_tag,
+            confidence=conf_count,
+            ts=ts,
+            payload={"left": left_cnt, "right": right_cnt, "total": total},
         )
+    )
 
-        return events, per_hand, total
+    return events, per_hand, total
@@ -0,0 +1,99 @@
+"""Declarative static-gesture table.
+
+Each gesture is a finger pattern (up / down / don't care per finger) plus an
+optional geometric predicate over the (21, 2) landmarks. The registry is
+compiled into a 32-entry table indexed by the 5-bit finger mask (bit i =
+FINGERS[i] extended), so classifying a hand is one lookup; predicates only
+run for the candidates of that mask.
+
+Adding a gesture:
+
+    DEFAULT_REGISTRY.register(GestureSpec("call_me", up=("thumb", "pinky"), down=("index", "middle", "ring")))
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from gestures import FINGERS
+
+Predicate = Callable[[np.ndarray], bool]
+
+_BIT = {name: 1 << i for i, name in enumerate(FINGERS)}
+_WEIGHTS = np.array([1 << i for i in range(len(FINGERS))], dtype=np.int64)
+
+
+@dataclass(frozen=True)
+class GestureSpec:
+    name: str
+    up: Tuple[str, ...] = ()
+    down: Tuple[str, ...] = ()
+    # extra check on the landmarks, run only when the finger pattern matches
+    predicate: Optional[Predicate] = None
+    payload: Dict[str, Any] = field(default_factory=dict)
+    # hidden for a while after a wave on the same hand (an open palm is part of the wave)
+    suppressed_by_wave: bool = False
+
+    def matches(self, mask: int) -> bool:
+        need_up = sum(_BIT[f] for f in self.up)
+        need_down = sum(_BIT[f] for f in self.down)
+        return (mask & need_up) == need_up and (mask & need_down) == 0
+
+
+def finger_masks(states: np.ndarray) -> np.ndarray:
+    """(n, 5) bool finger states -> (n,) int 5-bit masks."""
+    return np.asarray(states, dtype=np.int64) @ _WEIGHTS
+
+
+class GestureRegistry:
+    def __init__(self, specs: Sequence[GestureSpec] = ()):
+        self._specs: List[GestureSpec] = []
+        self._table: Optional[List[Tuple[GestureSpec, ...]]] = None
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: GestureSpec) -> GestureSpec:
+        for f in spec.up + spec.down:
+            if f not in _BIT:
+                raise ValueError(f"{spec.name}: unknown finger {f!r} (expected one of {FINGERS})")
+        if set(spec.up) & set(spec.down):
+            raise ValueError(f"{spec.name}: a finger cannot be both up and down")
+        if any(s.name == spec.name for s in self._specs):
+            raise ValueError(f"gesture {spec.name!r} already registered")
+        self._specs.append(spec)
+        self._table = None
+        return spec
+
+    @property
+    def specs(self) -> Tuple[GestureSpec, ...]:
+        return tuple(self._specs)
+
+    def table(self) -> List[Tuple[GestureSpec, ...]]:
+        # compiled lazily, again after every register(); registration order
+        # is kept inside each entry (it is the event order)
+        if self._table is None:
+            self._table = [tuple(s for s in self._specs if s.matches(m)) for m in range(1 << len(FINGERS))]
+        return self._table
+
+    def classify(self, mask: int, lms: np.ndarray) -> List[GestureSpec]:
+        return [s for s in self.table()[mask] if s.predicate is None or s.predicate(lms)]
+
+
+def _thumb_vertical(lms: np.ndarray) -> bool:
+    # thumb tip above its IP joint and above the wrist (image y grows downwards)
+    return bool(lms[4, 1] < lms[3, 1] and lms[4, 1] < lms[0, 1])
+
+
+DEFAULT_REGISTRY = GestureRegistry(
+    [
+        GestureSpec("open_palm", up=FINGERS, payload={"count": 5}, suppressed_by_wave=True),
+        GestureSpec("thumbs_up", up=("thumb",), down=("index", "middle", "ring", "pinky"), predicate=_thumb_vertical),
+        # thumb free: people often show it together with the middle finger
+        GestureSpec("middle_finger", up=("middle",), down=("index", "ring", "pinky")),
+        GestureSpec("yolo", up=("thumb", "pinky"), down=("index", "middle", "ring"), payload={"style": "shaka"}),
+        # thumb free (some hold it up while showing the peace sign)
+        GestureSpec("peace", up=("index", "middle"), down=("ring", "pinky")),
+        # rock-and-roll: index + pinky, thumb either way
+        GestureSpec("rock", up=("index", "pinky"), down=("middle", "ring")),
+    ]
+)
@@ -1,8 +1,10 @@
 from dataclasses import dataclass
 from collections import deque
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Sequence, Tuple
 import math
 
+import numpy as np
+
 Vec2 = Tuple[float, float]
 
 @dataclass
@@ -12,6 +14,9 @@ class GestureEvent:
     confidence: float
     ts: float
     payload: Dict[str, Any]
+    # "" for per-frame detections; "start" / "hold" / "end" / "pulse" when
+    # GestureDetector runs with an EdgeTracker
+    phase: str = ""
 
 def dist(a: Vec2, b: Vec2) -> float:
     return math.hypot(a[0] - b[0], a[1] - b[1])
@@ -22,56 +27,69 @@ def to_px(p: Vec2, w: int, h: int) -> Tuple[int, int]:
 def _clamp01(x: float) -> float:
     return 0.0 if x < 0.0 else (1.0 if x > 1.0 else x)
 
-def finger_states(lms: List[Vec2], handedness: str) -> Dict[str, bool]:
-    if len(lms) < 21:
-        return {"thumb": False, "index": False, "middle": False, "ring": False, "pinky": False}
+FINGERS = ("thumb", "index", "middle", "ring", "pinky")
 
-    wrist = lms[0]
+# landmark ids of each finger tip and of the joint it is compared against
+# (thumb uses the MCP, the other fingers use the PIP)
+_TIP_IDS = np.array([4, 8, 12, 16, 20])
+_REF_IDS = np.array([2, 6, 10, 14, 18])
+_MARGIN_K = np.array([0.06, 0.08, 0.08, 0.08, 0.08])
 
-    thumb_tip, thumb_ip, thumb_mcp = lms[4], lms[3], lms[2]
-    index_tip, index_pip = lms[8], lms[6]
-    middle_tip, middle_pip = lms[12], lms[10]
-    ring_tip, ring_pip = lms[16], lms[14]
-    pinky_tip, pinky_pip = lms[20], lms[18]
 
-    palm_scale = dist(wrist, lms[9])
-    if palm_scale < 1e-6:
-        palm_scale = 0.1
+def hand_geometry(lms: np.ndarray, handedness: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized finger states, centroid and palm scale for a batch of hands.
 
-    m = 0.08 * palm_scale
+    `lms` is a (hands, 21, 2) array of normalized landmarks. Returns
+    (states, centers, palm_scale) with shapes (hands, 5) bool, (hands, 2)
+    and (hands,). Finger order in `states` follows FINGERS.
+    """
+    pts = np.asarray(lms, dtype=np.float64)
+    n = pts.shape[0]
+    if n == 0:
+        return np.zeros((0, 5), dtype=bool), np.zeros((0, 2)), np.zeros(0)
 
-    idx = dist(wrist, index_tip) > dist(wrist, index_pip) + m
-    mid = dist(wrist, middle_tip) > dist(wrist, middle_pip) + m
-    rng = dist(wrist, ring_tip) > dist(wrist, ring_pip) + m
-    pky = dist(wrist, pinky_tip) > dist(wrist, pinky_pip) + m
+    rel = pts - pts[:, 0:1, :]
+    d = np.hypot(rel[..., 0], rel[..., 1])  # distance of every landmark from the wrist
 
-    thb = dist(wrist, thumb_tip) > dist(wrist, thumb_mcp) + (0.06 * palm_scale)
-    if handedness in ("left", "right"):
-        th_dir = (thumb_tip[0] > thumb_ip[0]) if handedness == "left" else (thumb_tip[0] < thumb_ip[0])
-        thb = thb and th_dir
+    palm_scale = d[:, 9]
+    ps = np.where(palm_scale < 1e-6, 0.1, palm_scale)
 
-    return {"thumb": thb, "index": idx, "middle": mid, "ring": rng, "pinky": pky}
+    states = d[:, _TIP_IDS] > d[:, _REF_IDS] + _MARGIN_K * ps[:, None]
 
-def count_fingers(states: Dict[str, bool]) -> int:
-    return int(states["thumb"]) + int(states["index"]) + int(states["middle"]) + int(states["ring"]) + int(states["pinky"])
+    # thumb must also point outwards: left -> tip right of IP, right -> tip left of IP
+    side = np.array([1.0 if h == "left" else (-1.0 if h == "right" else 0.0) for h in handedness])
+    dx = pts[:, 4, 0] - pts[:, 3, 0]
+    states[:, 0] &= (side == 0.0) | (dx * side > 0.0)
 
-def is_open_palm(states: Dict[str, bool]) -> bool:
-    return states["thumb"] and states["index"] and states["middle"] and states["ring"] and states["pinky"]
+    centers = pts.mean(axis=1)
+    return states, centers, palm_scale
 
-def is_yolo_shaka(states: Dict[str, bool]) -> bool:
-    return states["thumb"] and (not states["index"]) and (not states["middle"]) and (not states["ring"]) and states["pinky"]
 
+def states_dict(row: Sequence[bool]) -> Dict[str, bool]:
+    return dict(zip(FINGERS, (bool(v) for v in row)))
 
-def is_peace(states: Dict[str, bool]) -> bool:
-    """Detect 'peace' gesture: index and middle extended, ring and pinky down.
 
-    The thumb is allowed to be either extended or not (some people hold the
-    thumb up while showing the peace sign). We therefore only require index
-    and middle to be True and ring/pinky to be False.
-    """
-    return states.get("index", False) and states.get("middle", False) and (not states.get("ring", False)) and (not states.get("pinky", False))
+def finger_states(lms: Sequence[Vec2], handedness: str) -> Dict[str, bool]:
+    if len(lms) < 21:
+        return {"thumb": False, "index": False, "middle": False, "ring": False, "pinky": False}
+    states, _, _ = hand_geometry(np.asarray(lms, dtype=np.float64)[None, :21], (handedness,))
+    return states_dict(states[0])
+
+def count_fingers(states: Dict[str, bool]) -> int:
+    return int(states["thumb"]) + int(states["index"]) + int(states["middle"]) + int(states["ring"]) + int(states["pinky"])
 
 class WaveTracker:
+    """Wave detector over a sliding window of smoothed palm x positions.
+
+    Window statistics are kept incrementally: monotonic deques give the
+    window min/max, a running counter gives the open-hand ratio, and the
+    window is also kept as its turning points (oldest sample, local
+    extremes, newest sample), updated as samples enter and leave. The
+    centerline and deadband move every frame, so crossings are recounted
+    on those turning points, and only when both window extremes lie
+    outside the deadband (otherwise there cannot be any crossing).
+    """
+
     def __init__(
         self,
         window: int = 12,
@@ -95,21 +113,81 @@ class WaveTracker:
         self.cooldown_until = 0.0
         self._x_smooth = None
 
-    def _crossings(self, xs: List[float], deadband: float) -> int:
+        # incremental window bookkeeping
+        self._seq = 0
+        self._maxq: deque = deque()  # (seq, x), x decreasing
+        self._minq: deque = deque()  # (seq, x), x increasing
+        self._turns: deque = deque()  # (seq, x): oldest, turning points, newest
+        self._open_count = 0
+
+    def reset(self) -> None:
+        """Drop the window (keeps smoothing state and cooldown, like clearing the buffers)."""
+        self.xbuf.clear()
+        self.openbuf.clear()
+        self._maxq.clear()
+        self._minq.clear()
+        self._turns.clear()
+        self._open_count = 0
+
+    def _push(self, x: float, is_open: int) -> None:
+        if len(self.openbuf) == self.window:
+            self._open_count -= self.openbuf[0]
+        self.xbuf.append(x)
+        self.openbuf.append(is_open)
+        self._open_count += is_open
+
+        seq = self._seq
+        self._seq += 1
+        oldest = seq - self.window + 1
+
+        maxq = self._maxq
+        while maxq and maxq[-1][1] <= x:
+            maxq.pop()
+        maxq.append((seq, x))
+        if maxq[0][0] < oldest:
+            maxq.popleft()
+
+        minq = self._minq
+        while minq and minq[-1][1] >= x:
+            minq.pop()
+        minq.append((seq, x))
+        if minq[0][0] < oldest:
+            minq.popleft()
+
+        # between two turning points x is monotonic, and a monotonic run
+        # changes the hysteresis state exactly like its two ends do
+        turns = self._turns
+        if len(turns) >= 2 and (x - turns[-1][1]) * (turns[-1][1] - turns[-2][1]) >= 0:
+            turns[-1] = (seq, x)  # same direction: the run gets longer
+        else:
+            turns.append((seq, x))
+        if turns[0][0] < oldest:
+            if turns[1][0] == oldest:
+                turns.popleft()
+            else:
+                # the new oldest sample lies on the first run
+                turns[0] = (oldest, self.xbuf[0])
+
+    def _crossings(self, deadband: float, hi: float, lo: float) -> int:
         """
         Count robust centerline crossings with hysteresis (deadband).
         This detects macro oscillations (go-and-return) even when per-frame
-        dx is small after smoothing.
+        dx is small after smoothing. `hi`/`lo` are the window max/min.
         """
-        if len(xs) < 4:
+        if len(self.xbuf) < 4:
+            return 0
+        mid = (hi + lo) * 0.5
+        up = mid + deadband
+        down = mid - deadband
+        # a crossing needs samples on both sides of the deadband
+        if not (hi > up and lo < down):
             return 0
-        mid = (max(xs) + min(xs)) * 0.5
         crossings = 0
         state = 0
-        for x in xs:
-            if x > mid + deadband:
+        for _, x in self._turns:
+            if x > up:
                 new_state = 1
-            elif x < mid - deadband:
+            elif x < down:
                 new_state = -1
             else:
                 new_state = state
@@ -132,20 +210,20 @@ class WaveTracker:
         else:
             self._x_smooth = (1.0 - self.smooth_k) * self._x_smooth + self.smooth_k * x
 
-        self.xbuf.append(self._x_smooth)
-        self.openbuf.append(1 if is_open else 0)
+        self._push(self._x_smooth, 1 if is_open else 0)
 
         if len(self.xbuf) < self.window:
             return (False, 0.0, 0, 0.0, 0.0)
 
-        xs = list(self.xbuf)
-        amp = max(xs) - min(xs)
+        hi = self._maxq[0][1]
+        lo = self._minq[0][1]
+        amp = hi - lo
         amp_norm = amp / ps
 
         # robust crossings-based flips count
-        flips = self._crossings(xs, deadband=deadband)
+        flips = self._crossings(deadband, hi, lo)
 
-        open_ratio = sum(self.openbuf) / float(len(self.openbuf))
+        open_ratio = self._open_count / float(len(self.openbuf))
         conf = _clamp01(0.55 + 0.45 * min(1.0, amp_norm / (self.amp_thr_norm * 1.5)))
 
         # Primary strict condition: require sufficient amplitude, crossings and open hand
@@ -161,8 +239,7 @@ class WaveTracker:
 
         ok = ok_primary or ok_fallback
         if ok:
-            self.xbuf.clear()
-            self.openbuf.clear()
+            self.reset()
             self.cooldown_until = ts + self.cooldown_s
             return (True, amp_norm, flips, open_ratio, conf)
 
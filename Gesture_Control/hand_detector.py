@@ -1,21 +1,34 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, List, Optional, Tuple
-import cv2
-import mediapipe as mp
+import numpy as np
 
 Vec2 = Tuple[float, float]
 
-@dataclass
+NUM_LANDMARKS = 21
+
+
+@dataclass(slots=True)
 class HandObs:
-    landmarks: List[Vec2]
+    # (21, 2) float32 view into HandsPacket.landmarks
+    landmarks: np.ndarray
     handedness: str
     score: float
 
-@dataclass
+
+@dataclass(slots=True)
 class HandsPacket:
     hands: List[HandObs]
     ts: float
     frame_bgr: Any
+    # contiguous (hands, 21, 2) float32 array backing every HandObs.landmarks
+    landmarks: np.ndarray = field(default_factory=lambda: np.zeros((0, NUM_LANDMARKS, 2), dtype=np.float32))
+    # capture seq / monotonic time of the frame (CapturedFrame), passed through
+    seq: int = 0
+    mono: float = 0.0
+
+
+Box = Tuple[int, int, int, int]  # x0, y0, x1, y1 in pixels
+
 
 class HandDetector:
     def __init__(
@@ -24,7 +37,36 @@ class HandDetector:
         model_complexity: int = 1,
         min_detection_confidence: float = 0.6,
         min_tracking_confidence: float = 0.6,
+        metrics: Optional[Any] = None,
+        *,
+        detect_width: int = 0,
+        roi_tracking: bool = False,
+        roi_margin: float = 0.35,
+        roi_min_size: float = 0.25,
+        full_scan_every: int = 15,
     ):
+        # optional StageMetrics: times cvtColor and the MediaPipe graph separately
+        self._metrics = metrics
+        self.max_num_hands = int(max_num_hands)
+        # Inference cost knobs. detect_width > 0 downscales whatever is fed to
+        # MediaPipe to at most that width. With roi_tracking, once hands are
+        # found only an expanded box around their last landmarks is fed in
+        # (a full-frame scan still runs every full_scan_every frames to pick
+        # up new hands, and whenever the crop loses them).
+        self.detect_width = int(detect_width)
+        self.roi_tracking = bool(roi_tracking)
+        self.roi_margin = float(roi_margin)
+        self.roi_min_size = float(roi_min_size)
+        self.full_scan_every = int(full_scan_every)
+        self._roi: Optional[Box] = None
+        self._since_full = 0
+
+        # heavy imports deferred to the first detector: HandObs / HandsPacket
+        # stay importable without OpenCV or MediaPipe installed
+        import cv2
+        import mediapipe as mp
+
+        self._cv2 = cv2
         self._mp_hands = mp.solutions.hands
         self._hands = self._mp_hands.Hands(
             static_image_mode=False,
@@ -34,20 +76,90 @@ class HandDetector:
             min_tracking_confidence=min_tracking_confidence,
         )
 
-    def process(self, frame_bgr: Any, ts: float) -> HandsPacket:
-        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+    def warm_up(self, shape: Tuple[int, ...] = (480, 640, 3)) -> None:
+        """Run the graph once on a blank frame (model load / allocations),
+        without touching metrics or ROI state."""
+        self._hands.process(np.zeros(shape, dtype=np.uint8))
+
+    def reset_tracking(self) -> None:
+        """Forget the ROI (e.g. after the camera was released): next frame is a full scan."""
+        self._roi = None
+        self._since_full = 0
+
+    def _infer(self, frame_bgr: Any, box: Optional[Box]) -> Any:
+        cv2 = self._cv2
+        m = self._metrics
+        t = m.clock() if m is not None else 0.0
+        img = frame_bgr
+        if box is not None:
+            x0, y0, x1, y1 = box
+            img = img[y0:y1, x0:x1]
+        if self.detect_width > 0 and img.shape[1] > self.detect_width:
+            ih, iw = img.shape[:2]
+            img = cv2.resize(img, (self.detect_width, max(1, round(ih * self.detect_width / iw))), interpolation=cv2.INTER_AREA)
+        frame_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        if m is not None:
+            t = m.lap("cvt", t)
         res = self._hands.process(frame_rgb)
+        if m is not None:
+            m.lap("mediapipe", t)
+        return res
+
+    def _roi_from(self, arr: np.ndarray, w: int, h: int) -> Optional[Box]:
+        xs = arr[..., 0] * w
+        ys = arr[..., 1] * h
+        bx0, bx1 = float(xs.min()), float(xs.max())
+        by0, by1 = float(ys.min()), float(ys.max())
+        side = max(bx1 - bx0, by1 - by0) * (1.0 + 2.0 * self.roi_margin)
+        side = max(side, self.roi_min_size * min(w, h))
+        cx = (bx0 + bx1) * 0.5
+        cy = (by0 + by1) * 0.5
+        x0 = int(max(0, cx - side * 0.5))
+        y0 = int(max(0, cy - side * 0.5))
+        x1 = int(min(w, cx + side * 0.5))
+        y1 = int(min(h, cy + side * 0.5))
+        # not worth cropping if the box is (almost) the whole frame
+        if x1 - x0 < 16 or y1 - y0 < 16 or (x1 - x0) * (y1 - y0) >= 0.8 * w * h:
+            return None
+        return (x0, y0, x1, y1)
+
+    def process(self, frame_bgr: Any, ts: float, seq: int = 0, mono: float = 0.0) -> HandsPacket:
+        fh, fw = frame_bgr.shape[:2]
+        box = self._roi if self.roi_tracking else None
+        res = self._infer(frame_bgr, box)
+        if box is not None and not res.multi_hand_landmarks:
+            # lost the hands inside the crop: rescan the whole frame right away
+            box = None
+            res = self._infer(frame_bgr, None)
 
         hands: List[HandObs] = []
-        if res.multi_hand_landmarks:
-            for i, lmset in enumerate(res.multi_hand_landmarks):
-                lms: List[Vec2] = [(lm.x, lm.y) for lm in lmset.landmark]
-                handed = "unknown"
-                score = 0.0
-                if res.multi_handedness and i < len(res.multi_handedness):
-                    cls = res.multi_handedness[i].classification[0]
-                    handed = cls.label.lower()
-                    score = float(cls.score)
-                hands.append(HandObs(landmarks=lms, handedness=handed, score=score))
-
-        return HandsPacket(hands=hands, ts=ts, frame_bgr=frame_bgr)
+        lmsets = res.multi_hand_landmarks or []
+        arr = np.empty((len(lmsets), NUM_LANDMARKS, 2), dtype=np.float32)
+        for i, lmset in enumerate(lmsets):
+            row = arr[i]
+            row[:] = [(lm.x, lm.y) for lm in lmset.landmark]
+            handed = "unknown"
+            score = 0.0
+            if res.multi_handedness and i < len(res.multi_handedness):
+                cls = res.multi_handedness[i].classification[0]
+                handed = cls.label.lower()
+                score = float(cls.score)
+            hands.append(HandObs(landmarks=row, handedness=handed, score=score))
+
+        if box is not None:
+            # crop-normalized -> full-frame normalized coordinates
+            x0, y0, x1, y1 = box
+            arr[..., 0] = (x0 + arr[..., 0] * (x1 - x0)) / fw
+            arr[..., 1] = (y0 + arr[..., 1] * (y1 - y0)) / fh
+
+        if self.roi_tracking:
+            self._since_full = 0 if box is None else self._since_full + 1
+            if len(hands) == 0:
+                self._roi = None
+            elif len(hands) < self.max_num_hands and self._since_full >= self.full_scan_every:
+                # periodically look at the whole frame for hands entering the scene
+                self._roi = None
+            else:
+                self._roi = self._roi_from(arr, fw, fh)
+
+        return HandsPacket(hands=hands, ts=ts, frame_bgr=frame_bgr, landmarks=arr, seq=seq, mono=mono)
@@ -0,0 +1,175 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from gestures import to_px
+
+# include 'rock' so the rock-and-roll gesture is shown on the HUD
+PRIORITY = ["wave", "thumbs_up", "middle_finger", "rock", "peace", "open_palm", "yolo"]
+
+
+class HudState:
+    """Builds the HUD "last event" line (pure string work, no drawing).
+
+    `observe()` runs every frame and only notes the wave events; the string
+    is built by `text()`, called only by what draws or sends it this frame
+    (the window, an overlay / preview frame that is due, a popup pull).
+    """
+
+    def __init__(self, event_hold_s: float = 2.0, wave_display_s: float = 0.8):
+        self.event_hold_s = event_hold_s
+        # Keep waves visible for a short window even if detection was a
+        # single-frame spike. This prevents the "blink" effect where a
+        # wave is detected but only shows up for a millisecond.
+        self.wave_display_s = wave_display_s
+        self.wave_display_expires: Dict[str, float] = {}
+        self.wave_display_payloads: Dict[str, Dict[str, Any]] = {}
+        self.last_event = ""
+        self.last_event_ts = 0.0
+        # appended to the line, e.g. "RECORDING (120 rows)"
+        self.status = ""
+        self._cached: Optional[tuple] = None
+
+    def observe(self, events: List[Any], ts: float) -> None:
+        # Register any new wave events to keep them visible for a short
+        # time window (wave_display_s) even if subsequent frames don't
+        # re-fire the detector.
+        for ev in events:
+            if ev.name == "wave":
+                self.wave_display_expires[ev.hand] = ts + self.wave_display_s
+                self.wave_display_payloads[ev.hand] = ev.payload
+
+    def text(self, per_hand: Dict[str, Any], ts: float, debug: bool) -> str:
+        key = (ts, debug, self.status)
+        if self._cached is not None and self._cached[0] == key:
+            # several consumers on the same frame
+            return self._cached[1]
+        txt = self._build(per_hand, ts, debug)
+        if self.status:
+            txt = (txt + " | " if txt else "") + self.status
+        self._cached = (key, txt)
+        return txt
+
+    def _build(self, per_hand: Dict[str, Any], ts: float, debug: bool) -> str:
+        perhand_best = {}
+        for side in ("right", "left"):
+            if side not in per_hand:
+                continue
+
+            names = per_hand[side].gestures
+            chosen = None
+            for p in PRIORITY:
+                if p in names:
+                    chosen = p
+                    break
+
+            if not chosen:
+                cnt = per_hand[side].count
+                if cnt > 0:
+                    chosen = f"{cnt} fingers"
+                else:
+                    chosen = "hand"
+
+            perhand_best[side] = chosen.replace("_", " ")
+
+        # Build a human-readable wave_info from any active wave displays
+        wave_info = None
+        for side, exp in list(self.wave_display_expires.items()):
+            if ts <= exp and side in self.wave_display_payloads:
+                p = self.wave_display_payloads[side]
+                wave_info = f"{side} wave amp={p.get('amp_norm', 0):.3f} flips={p.get('flips', 0)} open={p.get('open_ratio', 0):.2f}"
+                break
+            else:
+                # expired, clean up
+                self.wave_display_expires.pop(side, None)
+                self.wave_display_payloads.pop(side, None)
+
+        combined = " | ".join([f"{side}: {perhand_best[side]}" for side in ("right", "left") if side in perhand_best])
+
+        if wave_info:
+            combined = (combined + " | " + wave_info) if combined else wave_info
+
+        # If debug is on, append live wave statistics for each hand (amp/flips/open_ratio)
+        if debug:
+            dbg_lines = []
+            for side in ("right", "left"):
+                if side in per_hand and per_hand[side].wave is not None:
+                    amp, flips, open_ratio, _ = per_hand[side].wave
+                    dbg_lines.append(f"{side} amp={amp:.3f} flips={flips} open={open_ratio:.2f}")
+            if dbg_lines:
+                dbg_txt = " | ".join(dbg_lines)
+                combined = (combined + " | " + dbg_txt) if combined else dbg_txt
+
+        if combined:
+            self.last_event = combined
+            self.last_event_ts = ts
+        elif ts - self.last_event_ts > self.event_hold_s:
+            self.last_event = ""
+
+        return self.last_event
+
+
+# keypoints shown in the popup hand lines (same as CameraUI.draw_hand)
+POPUP_KEYPOINTS = ((0, "W"), (4, "T"), (8, "I"), (12, "M"), (16, "R"), (20, "P"))
+
+
+def format_hand_popup_line(handedness: str, pts: Sequence[Tuple[int, int]]) -> str:
+    txt = " ".join(f"{label}({cx},{cy})" for (_, label), (cx, cy) in zip(POPUP_KEYPOINTS, pts))
+    return f"{handedness.upper()} {txt}".strip()
+
+
+class PopupSnapshot:
+    """Pull-based source of the popup debug payload (EV POPUP lines).
+
+    The frame loop only publish()es references to the latest data, and only
+    while somebody is subscribed. Strings, the HUD line included (through
+    `hud`), are built in pull(), at most every `interval_s`, and pull()
+    returns None when nothing visible changed since the previous payload.
+    """
+
+    def __init__(self, hud: HudState, interval_s: float = 0.25):
+        self.hud = hud
+        self.interval_s = float(interval_s)
+        self.subscribers = 0
+        self._latest: Optional[tuple] = None
+        self._last_pull_ts = float("-inf")
+        self._last_key: Optional[tuple] = None
+
+    @property
+    def active(self) -> bool:
+        return self.subscribers > 0
+
+    def subscribe(self) -> None:
+        self.subscribers += 1
+
+    def unsubscribe(self) -> None:
+        self.subscribers = max(0, self.subscribers - 1)
+        if not self.subscribers:
+            self._latest = None
+            self._last_key = None
+
+    def publish(self, frame_size: Tuple[int, int], hands: Sequence[Any], total: int, per_hand: Dict[str, Any], debug: bool, ts: float) -> None:
+        self._latest = (frame_size, hands, total, per_hand, debug, ts)
+
+    def pull(self) -> Optional[Dict[str, Any]]:
+        if self._latest is None:
+            return None
+        (w, h), hands, total, per_hand, debug, ts = self._latest
+        if ts - self._last_pull_ts < self.interval_s:
+            return None
+        self._last_pull_ts = ts
+        hud_text = self.hud.text(per_hand, ts, debug)
+        pts = tuple(
+            (hd.handedness, tuple(to_px(hd.landmarks[i], w, h) for i, _ in POPUP_KEYPOINTS))
+            for hd in hands
+            if hd.handedness in ("left", "right")
+        )
+        key = (pts, total, hud_text, debug)
+        if key == self._last_key:
+            return None
+        self._last_key = key
+        return {
+            "hands": {side: format_hand_popup_line(side, p) for side, p in pts},
+            "count": total,
+            "last_event": hud_text,
+            "debug": debug,
+            "ts": ts,
+        }
@@ -0,0 +1,75 @@
+"""Import-time budget check.
+
+Every module listed below is imported in a fresh interpreter
+(`python -X importtime`); the check fails when an import takes longer than
+its budget or drags in OpenCV / MediaPipe. Those are only loaded by the code
+that uses them (HandDetector, CameraUI drawing, the capture path in main()).
+
+    python import_budget.py [--scale 2.0]
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# module -> budget in ms (cumulative, cold, numpy included)
+BUDGETS_MS: Dict[str, float] = {
+    "gestures": 150.0,
+    "gesture_registry": 150.0,
+    "gesture_detector": 150.0,
+    "batch_detector": 150.0,
+    "landmark_log": 150.0,
+    "replay": 200.0,
+    "hand_detector": 150.0,
+    "hud": 150.0,
+    "protocol": 100.0,
+    "frame_ring": 150.0,
+    "preview": 150.0,
+    "capture_config": 150.0,
+    "main": 250.0,
+}
+HEAVY = ("cv2", "mediapipe")
+
+_PROBE = "import sys, {mod}; print(','.join(m for m in {heavy!r} if m in sys.modules))"
+
+
+def measure(mod: str) -> Tuple[float, List[str]]:
+    """(cumulative import ms, heavy modules loaded) for `mod` in a fresh interpreter."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE.format(mod=mod, heavy=HEAVY)],
+        capture_output=True,
+        text=True,
+        cwd=here,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {mod} failed:\n{proc.stderr.strip().splitlines()[-1]}")
+    cum_us = 0
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == mod:
+            cum_us = int(parts[1])
+    heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return cum_us / 1000.0, heavy
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check module import times against their budgets")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget (slow machines / CI)")
+    args = parser.parse_args()
+
+    failed = 0
+    for mod, budget in BUDGETS_MS.items():
+        ms, heavy = measure(mod)
+        limit = budget * args.scale
+        ok = ms <= limit and not heavy
+        failed += not ok
+        extra = f" loads {', '.join(heavy)}" if heavy else ""
+        print(f"{'ok  ' if ok else 'FAIL'} {mod:<18} {ms:7.1f} ms (budget {limit:.0f} ms){extra}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
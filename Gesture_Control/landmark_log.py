@@ -0,0 +1,110 @@
+"""Compact binary log of the HandsPacket landmark stream.
+
+Layout: a 16 byte header followed by fixed-size little-endian records, one
+per detected hand (frames without hands get a single record with
+hand == HAND_NONE so the replay sees the same frame cadence). Because the
+records are fixed-size the whole file can be opened with np.memmap.
+"""
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Tuple
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"RHLM"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHQ")  # magic, version, record size, reserved
+
+HAND_LEFT = 0
+HAND_RIGHT = 1
+HAND_UNKNOWN = 2
+HAND_NONE = 255
+
+_HAND_CODES = {"left": HAND_LEFT, "right": HAND_RIGHT}
+_HAND_NAMES = {HAND_LEFT: "left", HAND_RIGHT: "right", HAND_UNKNOWN: "unknown"}
+
+RECORD_DTYPE = np.dtype(
+    [
+        ("frame", "<u4"),
+        ("hand", "u1"),
+        ("ts", "<f8"),
+        ("score", "<f4"),
+        ("lms", "<f4", (21, 2)),
+    ]
+)
+
+
+@dataclass(slots=True)
+class RecordedHand:
+    landmarks: np.ndarray
+    handedness: str
+    score: float
+
+
+class LandmarkRecorder:
+    """Append HandsPacket landmarks to a binary log file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, "wb")
+        self._f.write(_HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, 0))
+        self._frame = 0
+        self.frames = 0
+
+    def write(self, hands: List[Any], ts: float) -> None:
+        n = len(hands)
+        rec = np.zeros(max(n, 1), dtype=RECORD_DTYPE)
+        rec["frame"] = self._frame
+        rec["ts"] = ts
+        if n == 0:
+            rec["hand"] = HAND_NONE
+        for i, h in enumerate(hands):
+            rec["hand"][i] = _HAND_CODES.get(h.handedness, HAND_UNKNOWN)
+            rec["score"][i] = h.score
+            rec["lms"][i] = h.landmarks
+        self._f.write(rec.tobytes())
+        self._frame += 1
+        self.frames += 1
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+def load_recording(path: str) -> np.ndarray:
+    """Memory-map a recording as a structured array of RECORD_DTYPE."""
+    with open(path, "rb") as f:
+        head = f.read(_HEADER.size)
+    if len(head) < _HEADER.size:
+        raise ValueError(f"{path}: not a landmark recording (truncated header)")
+    magic, version, rec_size, _ = _HEADER.unpack(head)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a landmark recording (bad magic)")
+    if version != VERSION or rec_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: unsupported recording version {version} (record size {rec_size})")
+    # a recording cut short (crash, SIGTERM mid-write) may end with a partial record
+    n = (os.path.getsize(path) - _HEADER.size) // rec_size
+    if n == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=_HEADER.size, shape=(n,))
+
+
+def iter_frames(rec: np.ndarray) -> Iterator[Tuple[float, List[RecordedHand]]]:
+    """Yield (ts, hands) per recorded frame, in file order."""
+    if len(rec) == 0:
+        return
+    frames = rec["frame"]
+    # boundaries where the frame counter changes
+    starts = np.flatnonzero(np.r_[True, frames[1:] != frames[:-1]])
+    ends = np.r_[starts[1:], len(rec)]
+    for a, b in zip(starts.tolist(), ends.tolist()):
+        chunk = rec[a:b]
+        ts = float(chunk["ts"][0])
+        hands = [
+            RecordedHand(landmarks=np.asarray(r["lms"]), handedness=_HAND_NAMES[int(r["hand"])], score=float(r["score"]))
+            for r in chunk
+            if int(r["hand"]) != HAND_NONE
+        ]
+        yield ts, hands
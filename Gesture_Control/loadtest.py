@@ -0,0 +1,163 @@
+"""Load test for GestureDetector on synthetic hands (synthetic.py).
+
+Runs S independent detector sessions (one per simulated camera / user) in
+each of P processes, every session fed its own synthetic stream as fast as
+possible, and reports throughput, cost per frame and per hand, and memory
+growth (RSS sampled while running, plus the tracemalloc delta of one
+session with --tracemalloc).
+
+    python loadtest.py --sessions 1,8,64 --frames 5000
+    python loadtest.py --sessions 16 --procs 4
+    python loadtest.py --sessions 64 --batch      # BatchGestureDetector
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import numpy as np
+
+from batch_detector import BatchGestureDetector
+from gesture_detector import EdgeTracker, GestureDetector
+from synthetic import generate
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # no procfs (macOS): peak RSS is the best we have
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def run_sessions(sessions: int, frames: int, seed: int = 0, edges: bool = True, samples: int = 20, batch: bool = False) -> Dict[str, Any]:
+    """Drive `sessions` detectors round-robin for `frames` frames each
+    (batch=True: one BatchGestureDetector call per round, its cost split
+    evenly over the sessions)."""
+    # streams are generated up front: only the detectors are timed
+    streams = [list(generate(frames, seed=seed + i)) for i in range(sessions)]
+    detectors = [GestureDetector(edges=EdgeTracker() if edges else None) for _ in range(sessions)]
+    bd = BatchGestureDetector(edges=EdgeTracker if edges else None, capacity=sessions)
+    hands = sum(len(h) for s in streams for _, h in s)
+
+    lat = np.empty(frames * sessions)
+    rss: List[float] = [_rss_mb()]
+    every = max(1, frames // samples)
+    k = 0
+    t_start = time.perf_counter()
+    for i in range(frames):
+        if batch:
+            rows = [(s, h.landmarks, h.handedness, h.score, streams[s][i][0]) for s in range(sessions) for h in streams[s][i][1]]
+            t0 = time.perf_counter()
+            bd.process_batch(rows, {s: streams[s][i][0] for s in range(sessions)})
+            lat[k : k + sessions] = (time.perf_counter() - t0) / sessions
+            k += sessions
+        else:
+            for s in range(sessions):
+                ts, hs = streams[s][i]
+                t0 = time.perf_counter()
+                detectors[s].process(hs, ts)
+                lat[k] = time.perf_counter() - t0
+                k += 1
+        if (i + 1) % every == 0:
+            rss.append(_rss_mb())
+    elapsed = time.perf_counter() - t_start
+
+    # memory growth: slope of RSS over the second half (after warm-up)
+    half = rss[len(rss) // 2 :]
+    growth_kb_per_kframe = 0.0
+    if len(half) >= 2:
+        x = np.arange(len(half)) * every * sessions / 1000.0
+        growth_kb_per_kframe = float(np.polyfit(x, np.array(half) * 1024.0, 1)[0])
+    p50, p99 = np.percentile(lat * 1e6, [50, 99])
+    return {
+        "sessions": sessions,
+        "frames": k,
+        "hands": hands,
+        "elapsed_s": elapsed,
+        "fps": k / elapsed,
+        "p50_us": float(p50),
+        "p99_us": float(p99),
+        "us_per_hand": float(lat.sum() * 1e6 / max(hands, 1)),
+        "rss_mb": rss[-1],
+        "rss_growth_kb_per_kframe": growth_kb_per_kframe,
+    }
+
+
+def session_footprint(frames: int, seed: int = 0) -> Dict[str, float]:
+    """tracemalloc view of one session: retained bytes after warm-up and after `frames` frames."""
+    stream = list(generate(frames, seed=seed))
+    tracemalloc.start()
+    gd = GestureDetector(edges=EdgeTracker())
+    warm = min(300, frames // 2)
+    for ts, hs in stream[:warm]:
+        gd.process(hs, ts)
+    mid = tracemalloc.get_traced_memory()[0]
+    for ts, hs in stream[warm:]:
+        gd.process(hs, ts)
+    end = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"session_kb": mid / 1024.0, "growth_kb": (end - mid) / 1024.0}
+
+
+def _proc_main(args: tuple, out: Any) -> None:
+    out.put(run_sessions(*args))
+
+
+def run(sessions: int, frames: int, procs: int, seed: int = 0, edges: bool = True, batch: bool = False) -> Dict[str, Any]:
+    if procs <= 1:
+        return run_sessions(sessions, frames, seed, edges, batch=batch)
+    ctx = mp.get_context("spawn")
+    q = ctx.Queue()
+    ps = [ctx.Process(target=_proc_main, args=((sessions, frames, seed + 1000 * i, edges, 20, batch), q)) for i in range(procs)]
+    t = time.perf_counter()
+    for p in ps:
+        p.start()
+    res = [q.get() for _ in ps]
+    for p in ps:
+        p.join()
+    wall = time.perf_counter() - t
+    frames_total = sum(r["frames"] for r in res)
+    return {
+        "sessions": sessions * procs,
+        "frames": frames_total,
+        "hands": sum(r["hands"] for r in res),
+        "elapsed_s": wall,
+        # wall clock includes process start-up: aggregate of per-process rates too
+        "fps": frames_total / wall,
+        "fps_sum": sum(r["fps"] for r in res),
+        "p50_us": float(np.median([r["p50_us"] for r in res])),
+        "p99_us": max(r["p99_us"] for r in res),
+        "us_per_hand": float(np.mean([r["us_per_hand"] for r in res])),
+        "rss_mb": sum(r["rss_mb"] for r in res),
+        "rss_growth_kb_per_kframe": max(r["rss_growth_kb_per_kframe"] for r in res),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GestureDetector load test on synthetic hands")
+    parser.add_argument("--sessions", default="1,4,16,64", help="Comma-separated detector counts per process")
+    parser.add_argument("--frames", type=int, default=3000, help="Frames per session")
+    parser.add_argument("--procs", type=int, default=1, help="Processes, each running --sessions detectors")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--level-events", action="store_true", help="Skip the EdgeTracker")
+    parser.add_argument("--batch", action="store_true", help="One BatchGestureDetector per process instead of a detector per session")
+    parser.add_argument("--tracemalloc", action="store_true", help="Also report the retained memory of one session")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} {'frames':>8} {'fps':>9} {'p50 us':>8} {'p99 us':>8} {'us/hand':>8} {'rss MB':>7} {'KB/kframe':>9}")
+    for n in (int(x) for x in args.sessions.split(",") if x.strip()):
+        r = run(n, args.frames, args.procs, args.seed, edges=not args.level_events, batch=args.batch)
+        print(
+            f"{r['sessions']:>8} {r['frames']:>8} {r['fps']:>9.0f} {r['p50_us']:>8.1f} {r['p99_us']:>8.1f} "
+            f"{r['us_per_hand']:>8.1f} {r['rss_mb']:>7.1f} {r['rss_growth_kb_per_kframe']:>9.2f}"
+        )
+    if args.tracemalloc:
+        fp = session_footprint(args.frames, args.seed)
+        print(f"one session: {fp['session_kb']:.1f} KB after warm-up, +{fp['growth_kb']:.1f} KB over the rest of the run")
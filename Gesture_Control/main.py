@@ -1,18 +1,27 @@
 import time
-import cv2
-import platform
+_T0 = time.perf_counter()  # startup timings are relative to this (includes the imports below)
 import argparse
-import subprocess
-import re
 import os
-import json
-import csv
+from concurrent.futures import ThreadPoolExecutor
 import sys
+import signal
 
 from hand_detector import HandDetector
-from gesture_detector import GestureDetector
+from gesture_detector import EdgeTracker, GestureDetector
 from camera import CameraUI
-from gestures import to_px
+from camera_discovery import CONFIG_PATH, load_config, load_profile, open_camera, save_config, save_profile
+from capture_config import CaptureProfile, auto_tune, negotiate
+from hud import HudState, PopupSnapshot
+from renderer import Renderer
+from capture import FrameGrabber
+from landmark_log import LandmarkRecorder
+from diagnostics import DiagnosticsWriter, FlightRecorder, diag_records
+from frame_ring import DEFAULT_PATH as FRAME_RING_PATH, FramePublisher
+from metrics import StageMetrics
+from motion_gate import MotionGatedDetector
+from multicam import parse_sources, run_multicam
+from pipeline import ParallelHandDetector
+from protocol import EventWriter
 
 # Optional Arduino hook: if present, use it to send a 'W' when a wave is detected.
 #try:
@@ -21,97 +30,12 @@ from gestures import to_px
 #    arduino_ctrl = None
 arduino_ctrl = None
 
-def emit_gesture(name: str, hand: str | None = None):
-    h = (hand or "").strip().lower()
-    if h:
-        sys.stdout.write(f"EV GESTURE {h} {name}\n")
-    else:
-        sys.stdout.write(f"EV GESTURE {name}\n")
-    sys.stdout.flush()
-
-
-def open_camera(preferred_index: int = 0):
-    cap = None
-    system = platform.system()
-
-    if system == "Darwin":
-        try:
-            proc = subprocess.run(
-                ["ffmpeg", "-f", "avfoundation", "-list_devices", "true", "-i", ""],
-                capture_output=True,
-                text=True,
-            )
-            out = proc.stderr or proc.stdout or ""
-            video_section = False
-            devices = []
-            for line in out.splitlines():
-                if "AVFoundation video devices:" in line:
-                    video_section = True
-                    continue
-                if video_section:
-                    m = re.search(r"\[(\d+)\] (.+)", line)
-                    if m:
-                        idx = int(m.group(1))
-                        name = m.group(2).strip()
-                        devices.append((idx, name))
-                    if "AVFoundation audio devices:" in line:
-                        break
-
-            prefer_keywords = ("FaceTime", "Built-in", "iSight", "Camera", "USB")
-            exclude_keywords = ("iPhone", "Phone", "Android", "IPWebcam", "Raspi")
-
-            chosen = None
-            for idx, name in devices:
-                nlower = name.lower()
-                if any(k.lower() in nlower for k in exclude_keywords):
-                    continue
-                if any(k.lower() in nlower for k in prefer_keywords):
-                    chosen = name
-                    break
-
-            if chosen:
-                try:
-                    cap = cv2.VideoCapture(chosen, cv2.CAP_AVFOUNDATION)
-                    if cap is not None and cap.isOpened():
-                        return cap, chosen
-                except Exception:
-                    cap = None
-
-        except FileNotFoundError:
-            pass
-        except Exception:
-            pass
-
-        for i in range(0, 5):
-            try:
-                c = cv2.VideoCapture(i, cv2.CAP_AVFOUNDATION)
-                if c is not None and c.isOpened():
-                    return c, i
-            except Exception:
-                pass
-
-    for i in range(0, 5):
-        try:
-            c = cv2.VideoCapture(i)
-            if c is not None and c.isOpened():
-                return c, i
-        except Exception:
-            continue
-
-    return None, None
-
-
-def _format_hand_popup_line(frame, lms, handedness: str) -> str:
-    h, w = frame.shape[:2]
-    key_ids = [0, 4, 8, 12, 16, 20]
-    labels = {0: "W", 4: "T", 8: "I", 12: "M", 16: "R", 20: "P"}
-    parts = []
-    for idx in key_ids:
-        if idx < len(lms):
-            cx, cy = to_px(lms[idx], w, h)
-            parts.append(f"{labels[idx]}({cx},{cy})")
-    txt = " ".join(parts)
-    return f"{handedness.upper()} {txt}".strip()
+def _build_detector(metrics, detect_width: int, roi_tracking: bool):
+    # runs while the camera opens: graph construction + one blank inference
+    t = time.perf_counter()
+    hd = HandDetector(metrics=metrics, detect_width=detect_width, roi_tracking=roi_tracking)
+    hd.warm_up()
+    return hd, (time.perf_counter() - t) * 1000.0
 
 
 def main(
@@ -120,112 +44,196 @@ def main(
     show_ui: bool = True,
     emit_popup_debug: bool = False,
     emit_wave_dbg: bool = False,
+    record_landmarks: str | None = None,
+    metrics_interval: float = 5.0,
+    detect_width: int = 0,
+    roi_tracking: bool = False,
+    motion_gate: bool = False,
+    max_skip: int = 5,
+    render_fps: float = 30.0,
+    event_format: str = "text",
+    level_events: bool = False,
+    debounce_frames: int = 3,
+    debounce_ms: float = 0.0,
+    hold_interval_s: float = 0.0,
+    workers: int = 1,
+    diag_path: str | None = None,
+    flight_seconds: float = 30.0,
+    publish_path: str | None = None,
+    publish_fps: float = 15.0,
+    publish_overlay: bool = False,
+    preview_port: int | None = None,
+    preview_host: str = "127.0.0.1",
+    preview_fps: float = 15.0,
+    capture_width: int | None = None,
+    capture_height: int | None = None,
+    capture_fps: float | None = None,
+    fourcc: str | None = None,
+    buffer_size: int | None = None,
+    auto_tune_ms: float = 0.0,
 ):
+    import cv2  # only the capture path needs it (see import_budget.py)
+
+    t_main = time.perf_counter()
     # Load persisted config (preferred camera index)
-    cfg_path = os.path.expanduser("~/.gesture_control.json")
-    cfg = {}
-    if os.path.exists(cfg_path):
-        try:
-            with open(cfg_path, "r") as f:
-                cfg = json.load(f)
-        except Exception:
-            cfg = {}
+    cfg = load_config()
 
     # If no cam_index provided, prefer saved config
     if cam_index is None and isinstance(cfg.get("cam_index"), int):
         cam_index = cfg.get("cam_index")
 
-    if cam_index is None:
-        cap, used_idx = open_camera(0)
-    else:
-        cap = cv2.VideoCapture(int(cam_index))
-        used_idx = int(cam_index)
-
-    if cap is None or not cap.isOpened():
-        raise RuntimeError("Unable to open any camera")
+    # Per-stage frame timings, summarized every metrics_interval seconds as
+    # "EV METRICS ..." lines (the backend relays them like any other line).
+    metrics = StageMetrics(
+        ("read", "flip", "cvt", "mediapipe", "gesture", "draw_hand", "draw_hud", "popup", "publish", "preview", "show", "frame"),
+        interval_s=metrics_interval,
+    )
 
-    hd = HandDetector()
-    gd = GestureDetector(wave_permissive=wave_permissive, emit_wave_dbg=emit_wave_dbg)
+    # The MediaPipe graph is built and warmed while the camera opens
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="hd-warmup") as ex:
+        hd_future = ex.submit(_build_detector, metrics, detect_width, roi_tracking) if workers <= 1 else None
+        t = time.perf_counter()
+        if cam_index is None:
+            cap, used_idx = open_camera(0)
+        else:
+            cap = cv2.VideoCapture(int(cam_index))
+            used_idx = int(cam_index)
+        camera_ms = (time.perf_counter() - t) * 1000.0
+        if cap is None or not cap.isOpened():
+            raise RuntimeError("Unable to open any camera")
+
+        # capture mode: saved profile of this source, overridden by the flags
+        saved = load_profile(used_idx)
+        profile = (CaptureProfile.from_dict(saved) if saved else CaptureProfile()).merged(
+            width=capture_width, height=capture_height, fps=capture_fps, fourcc=fourcc, buffer_size=buffer_size
+        )
+        capture_info = negotiate(cap, profile)
+
+        if workers > 1:
+            # N MediaPipe processes in parallel, results reassembled in frame order
+            pool = ParallelHandDetector(workers, metrics=metrics, detect_width=detect_width, roi_tracking=roi_tracking)
+            fw, fh = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            if fw > 0 and fh > 0:
+                pool.warm_up((fh, fw, 3))
+            hd, model_ms = pool, 0.0
+        else:
+            pool = None
+            hd, model_ms = hd_future.result()
+    startup = {"import_ms": (t_main - _T0) * 1000.0, "camera_ms": camera_ms, "model_ms": model_ms}
+
+    if auto_tune_ms > 0:
+        if pool is not None:
+            print("Auto-tune measures a single detector: skipped with --workers > 1", file=sys.stderr)
+            capture_info = {**capture_info, "auto_tune": "skipped"}
+        else:
+            t = time.perf_counter()
+            profile, capture_info = auto_tune(cap, hd, auto_tune_ms, base=profile)
+            hd.reset_tracking()
+            startup["tune_ms"] = (time.perf_counter() - t) * 1000.0
+            steps = ", ".join(f"{s['width']}x{s['height']}={s['p90_ms']:.1f}ms" for s in capture_info["steps"])
+            print(f"Auto-tune ({auto_tune_ms:.1f} ms budget, p90): {steps} -> {profile.width}x{profile.height}", file=sys.stderr)
+            try:
+                save_profile(used_idx, {**profile.to_dict(), "budget_ms": auto_tune_ms, "steps": capture_info["steps"]})
+            except Exception as e:
+                print(f"Failed to save capture profile: {e}", file=sys.stderr)
+    dropped_reported = 0
+
+    if motion_gate:
+        # skip inference on static frames, at most max_skip in a row
+        hd = MotionGatedDetector(hd, max_skip=max_skip)
+    # Poses are reported on transitions (start/hold/end) instead of on every
+    # frame they are held, unless level_events asks for the old behaviour.
+    edges = None if level_events else EdgeTracker(debounce_frames=debounce_frames, debounce_ms=debounce_ms, hold_interval_s=hold_interval_s)
+    gd = GestureDetector(wave_permissive=wave_permissive, emit_wave_dbg=emit_wave_dbg, edges=edges)
     ui = CameraUI()
-
-    event_hold_s = 2.0
-    last_event = ""
-    last_event_ts = 0.0
-
-    # Recording (toggle with 'p') - collects per-frame diagnostics while recording
-    is_recording = False
-    record_buffer = []
-    record_start_ts = 0.0
-    record_max_s = 5.0  # auto-stop after this many seconds
+    # The OpenCV window is the only place frames are drawn on; headless runs
+    # skip all overlay drawing and HUD string building.
+    renderer = Renderer(ui, max_fps=render_fps, metrics=metrics) if show_ui else None
+    # Latest frames in a shared-memory ring for local previews (frame_ring.py)
+    publisher = FramePublisher(publish_path, max_fps=publish_fps, overlay=publish_overlay, metrics=metrics) if publish_path else None
+    # MJPEG preview over HTTP; encoding runs on the server's own threads
+    preview = None
+    if preview_port is not None:
+        from preview import PreviewServer
+
+        preview = PreviewServer(preview_host, preview_port, max_fps=preview_fps, metrics=metrics).start()
+        print(f"Preview on {preview.url}", file=sys.stderr)
+    hud = HudState()
+    # popup debug payload: built on pull, only while subscribed and changed
+    popup = PopupSnapshot(hud, interval_s=0.25)
+    if emit_popup_debug:
+        popup.subscribe()
+    # everything a frame emits goes out in one write (see protocol.py)
+    out = EventWriter(sys.stdout, event_format)
+    out.capture(capture_info)
+
+    # Optional raw landmark stream recording (replay it with replay.py)
+    lm_rec = LandmarkRecorder(record_landmarks) if record_landmarks else None
+
+    # Diagnostics: stream per-hand rows to a file (--diag, or toggle with 'p')
+    # and keep the last flight_seconds in memory, dumped on SIGUSR1 / 'f'.
     record_dir = os.path.join(os.getcwd(), "wave_records")
-    # Keep waves visible for a short window even if detection was a
-    # single-frame spike. This prevents the "blink" effect where a
-    # wave is detected but only shows up for a millisecond.
-    wave_display_s = 0.8
-    wave_display_expires = {}
-    wave_display_payloads = {}
+    # the writer thread is started here, so 'p' only queues open / close
+    diag = DiagnosticsWriter(diag_path) if (diag_path or show_ui) else None
+    flight = FlightRecorder(flight_seconds, out_dir=record_dir) if flight_seconds > 0 else None
+    if flight is not None and hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda *_: flight.request_dump())
     # per-gesture cooldown to avoid spamming Arduino/LCD
     gesture_last_sent = {}
     gesture_send_cooldown = 1.0  # seconds
 
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            break
-
-        # Mirror horizontally (selfie-style) only. Use flipCode=1.
-        frame = cv2.flip(frame, 1)
-        ts = time.time()
-
-        hp = hd.process(frame, ts)
-        hands = [{"landmarks": h.landmarks, "handedness": h.handedness, "score": h.score} for h in hp.hands]
-
-        events, per_hand, total = gd.process(hands, ts)
-
-        for h in hands:
-            if h["handedness"] in ("left", "right"):
-                ui.draw_hand(frame, h["landmarks"], h["handedness"])
-
-        # include 'rock' so the rock-and-roll gesture is shown on the HUD
-        priority = ["wave", "thumbs_up", "middle_finger", "rock", "peace", "open_palm", "yolo"]
-        perhand_best = {}
-
-        for side in ("right", "left"):
-            if side not in per_hand:
-                continue
-
-            names = [ev.name for ev in events if ev.hand == side and ev.name != "count"]
-            chosen = None
-            for p in priority:
-                if p in names:
-                    chosen = p
-                    break
+    # Capture runs on its own thread and only keeps the newest frame, so a
+    # slow MediaPipe pass drops stale frames instead of accumulating latency.
+    grabber = FrameGrabber(cap, metrics=metrics).start()
 
-            if not chosen:
-                cnt = per_hand[side].count
-                if cnt > 0:
-                    chosen = f"{cnt} fingers"
-                else:
-                    chosen = "hand"
+    drained: list = []
+    try:
+        while True:
+            if drained:
+                hp = drained.pop(0)
+                t_frame = metrics.clock()
+            else:
+                cf = grabber.read()
+                if cf is None:
+                    # stream ended: the worker pool still holds the last frames
+                    drain = getattr(hd, "drain", None)
+                    drained = drain() if drain is not None else []
+                    if not drained:
+                        break
+                    continue
+                if startup is not None and "first_frame_ms" not in startup:
+                    startup["first_frame_ms"] = (time.perf_counter() - _T0) * 1000.0
+                t_frame = t = metrics.clock()
 
-            perhand_best[side] = chosen.replace("_", " ")
+                # Mirror horizontally (selfie-style) only. Use flipCode=1.
+                frame = cv2.flip(cf.frame_bgr, 1)
+                metrics.lap("flip", t)
 
-        # Register any new wave events to keep them visible for a short
-        # time window (wave_display_s) even if subsequent frames don't
-        # re-fire the detector.
-        if not hands:
-            events = []
-        else:
+                hp = hd.process(frame, cf.ts, cf.seq, cf.mono)
+                if hp is None:
+                    # the worker pool is still filling its pipeline
+                    continue
+            # with the worker pool this is an earlier frame than the one just
+            # read: frame, ts and seq all come from the packet
+            frame, ts = hp.frame_bgr, hp.ts
+            hands = hp.hands
+            if lm_rec is not None:
+                lm_rec.write(hands, ts)
+
+            t = metrics.clock()
+            events, per_hand, total = gd.process(hands, ts)
+            metrics.lap("gesture", t)
+            if startup is not None:
+                # the first frame made it through detection and gesture
+                # classification (events can be emitted from here on)
+                startup["first_classified_ms"] = (time.perf_counter() - _T0) * 1000.0
+                out.startup(startup)
+                startup = None
 
             for ev in events:
-                # Keep wave HUD visible briefly
                 if ev.name == "count":
-                    continue    
-                emit_gesture(ev.name, ev.hand) # chiamo la funzione per arduino per ogni gesto
-
-                if ev.name == "wave":
-                  wave_display_expires[ev.hand] = ts + wave_display_s
-                  wave_display_payloads[ev.hand] = ev.payload
+                    continue
+                out.gesture(ev, hp.seq, captured=hp.mono) # chiamo la funzione per arduino per ogni gesto
 
             # Send a message/command to Arduino for notable gestures (not 'count')
             
@@ -239,189 +247,208 @@ def main(
             #        except Exception as e:
             #            print(f"Failed to send Arduino gesture '{ev.name}': {e}")
 
-        # Build a human-readable wave_info from any active wave displays
-        wave_info = None
-        for side, exp in list(wave_display_expires.items()):
-            if ts <= exp and side in wave_display_payloads:
-                p = wave_display_payloads[side]
-                wave_info = f"{side} wave amp={p.get('amp_norm', 0):.3f} flips={p.get('flips', 0)} open={p.get('open_ratio', 0):.2f}"
-                break
-            else:
-                # expired, clean up
-                wave_display_expires.pop(side, None)
-                wave_display_payloads.pop(side, None)
-
-        combined = " | ".join([f"{side}: {perhand_best[side]}" for side in ("right", "left") if side in perhand_best])
-
-        if wave_info:
-            combined = (combined + " | " + wave_info) if combined else wave_info
-
-    # If debug is on, append live wave statistics for each hand (amp/flips/open_ratio)
-        if ui.debug:
-            dbg_lines = []
-            for side in ("right", "left"):
-                if side in per_hand and getattr(per_hand[side], "wave_stats", None):
-                    ws = per_hand[side].wave_stats
-                    amp = ws.get("amp_norm", ws.get("amp_x", 0))
-                    dbg_lines.append(f"{side} amp={amp:.3f} flips={ws['flips']} open={ws['open_ratio']:.2f}")
-            if dbg_lines:
-                dbg_txt = " | ".join(dbg_lines)
-                combined = (combined + " | " + dbg_txt) if combined else dbg_txt
-
-        if combined:
-            last_event = combined
-            last_event_ts = ts
-        elif ts - last_event_ts > event_hold_s:
-            last_event = ""
-
-        # If currently recording, append per-hand diagnostics to buffer
-        if is_recording:
-            for side, ph in per_hand.items():
-                ws = getattr(ph, "wave_stats", None) or {}
-                record_buffer.append(
-                    {
-                        "ts": ts,
-                        "side": side,
-                        "states": getattr(ph, "states", None),
-                        "count": getattr(ph, "count", None),
-                        "amp_norm": ws.get("amp_norm", ws.get("amp_x", 0)),
-                        "flips": ws.get("flips", 0),
-                        "open_ratio": ws.get("open_ratio", 0),
-                        "conf": ws.get("conf", 0),
-                    }
-                )
-
-        # Show recording status in HUD
-        hud_text = last_event
-        if is_recording:
-            hud_text = (hud_text + " | " if hud_text else "") + f"RECORDING ({len(record_buffer)} samples)"
-
-        ui.draw_hud(frame, hud_text, total)
-
-        # Emit the same "popup window" debug strings over stdout (throttled),
-        # so the web UI can show identical parameters without opening OpenCV windows.
-        if emit_popup_debug:
-            if not hasattr(main, "_last_popup_emit_ts"):
-                main._last_popup_emit_ts = 0.0
-            if ts - main._last_popup_emit_ts >= 0.25:
-                main._last_popup_emit_ts = ts
-                try:
-                    # Hand debug lines (match CameraUI.draw_hand text)
-                    for h in hands:
-                        handed = h.get("handedness")
-                        if handed in ("left", "right"):
-                            txt_full = _format_hand_popup_line(frame, h.get("landmarks", []), handed)
-                            sys.stdout.write(f"EV POPUP HAND {handed} {txt_full}\n")
-                    # HUD lines (match CameraUI.draw_hud text)
-                    sys.stdout.write(f"EV POPUP HUD count=count={total}\n")
-                    if hud_text:
-                        sys.stdout.write(f"EV POPUP HUD last_event={hud_text}\n")
-                    sys.stdout.write(f"EV POPUP HUD debug={'ON' if ui.debug else 'OFF'} (press D)\n")
-                    sys.stdout.flush()
-                except Exception:
-                    pass
-
-        if show_ui:
-            cv2.imshow("gesture_detector", frame)
-            k = cv2.waitKey(1) & 0xFF
-            if k == 27 or k == ord("q"):
-                break
-            if k == ord("d"):
-                ui.debug = not ui.debug
-            if k == ord("p"):
-                # Toggle recording mode: start/stop collecting per-frame diagnostics
-                if not is_recording:
-                    is_recording = True
-                    record_buffer = []
-                    record_start_ts = ts
-                    print(f"Started recording diagnostics at {record_start_ts:.3f} (max {record_max_s}s). Press 'p' again to stop.")
-                else:
-                    # Stop and dump buffer
-                    is_recording = False
-                    print(f"Stopped recording at {ts:.3f}. Collected {len(record_buffer)} samples.")
-                    if record_buffer:
-                        # Print collected samples to terminal (human readable)
-                        for rec in record_buffer:
-                            print(f"{rec['ts']:.3f}\t{rec['side']}\tstates={rec['states']}\tcount={rec['count']}\tamp={rec['amp_norm']:.4f}\tflips={rec['flips']}\topen={rec['open_ratio']:.3f}\tconf={rec['conf']:.3f}")
-
-                        # Save to CSV for easy sharing
-                        try:
-                            os.makedirs(record_dir, exist_ok=True)
-                            fname = os.path.join(record_dir, f"wave_record_{int(record_start_ts)}.csv")
-                            with open(fname, "w", newline="") as cf:
-                                writer = csv.writer(cf)
-                                writer.writerow(["ts", "side", "states", "count", "amp_norm", "flips", "open_ratio", "conf"])
-                                for rec in record_buffer:
-                                    writer.writerow([
-                                        f"{rec['ts']:.6f}",
-                                        rec["side"],
-                                        str(rec["states"]),
-                                        rec["count"],
-                                        f"{rec['amp_norm']:.6f}",
-                                        rec["flips"],
-                                        f"{rec['open_ratio']:.6f}",
-                                        f"{rec['conf']:.6f}",
-                                    ])
-                            print(f"Saved recording to {fname}")
-                        except Exception as e:
-                            print(f"Failed to save recording: {e}")
-        else:
-            # No OpenCV window in headless mode
-            time.sleep(0.001)
-
-        # Auto-stop recording when exceeding max duration
-        if is_recording and (ts - record_start_ts) > record_max_s:
-            is_recording = False
-            print(f"Auto-stopped recording after {record_max_s}s. Collected {len(record_buffer)} samples.")
-            if record_buffer:
-                try:
-                    os.makedirs(record_dir, exist_ok=True)
-                    fname = os.path.join(record_dir, f"wave_record_{int(record_start_ts)}.csv")
-                    with open(fname, "w", newline="") as cf:
-                        writer = csv.writer(cf)
-                        writer.writerow(["ts", "side", "states", "count", "amp_norm", "flips", "open_ratio", "conf"])
-                        for rec in record_buffer:
-                            writer.writerow([
-                                f"{rec['ts']:.6f}",
-                                rec["side"],
-                                str(rec["states"]),
-                                rec["count"],
-                                f"{rec['amp_norm']:.6f}",
-                                rec["flips"],
-                                f"{rec['open_ratio']:.6f}",
-                                f"{rec['conf']:.6f}",
-                            ])
-                    print(f"Saved recording to {fname}")
-                except Exception as e:
-                    print(f"Failed to save recording: {e}")
-
-    cap.release()
-    cv2.destroyAllWindows()
+            hud.observe(events, ts)
+            if flight is not None:
+                flight.append(hp.seq, ts, hands, per_hand)
+            recording = diag is not None and diag.recording
+            if recording:
+                diag.write(diag_records(hp.seq, ts, hands, per_hand))
+
+            # the HUD line is only built for what draws it on this frame
+            draw_window = renderer is not None and renderer.due()
+            offer_preview = preview is not None and preview.want()
+            publish = publisher is not None and publisher.due()
+            draws_hud = draw_window or offer_preview or (publish and publisher.overlay)
+            if draws_hud or popup.active:
+                hud.status = f"RECORDING ({diag.rows} rows)" if recording else ""
+            hud_text = hud.text(per_hand, ts, ui.debug) if draws_hud else ""
+
+            # Same parameters as the OpenCV window, over stdout for the web UI
+            if popup.active:
+                popup.publish((frame.shape[1], frame.shape[0]), hands, total, per_hand, ui.debug, ts)
+                t = metrics.clock()
+                payload = popup.pull()
+                if payload is not None:
+                    out.popup(**payload)
+                metrics.lap("popup", t)
+
+            # before the window draws its overlays onto `frame`
+            if publish:
+                publisher.publish(frame, ts, hp.seq, hands, hud_text, total)
+            if offer_preview:
+                t = metrics.clock()
+                # encoders read the frame later: the window would draw on it meanwhile
+                preview.offer(frame if renderer is None else frame.copy(), hands, hud_text, total)
+                metrics.lap("preview", t)
+
+            if draw_window:
+                k = renderer.render(frame, hands, hud_text, total)
+                if k == 27 or k == ord("q"):
+                    break
+                if k == ord("d"):
+                    ui.debug = not ui.debug
+                if k == ord("p"):
+                    # Toggle streaming diagnostics (no size / time cap)
+                    if not diag.recording:
+                        diag.start(os.path.join(record_dir, f"diag_{int(ts)}.bin"))
+                        print(f"Started recording diagnostics to {diag.path}. Press 'p' again to stop.")
+                    else:
+                        print(f"Stopped recording diagnostics to {diag.stop()}")
+                if k == ord("f") and flight is not None:
+                    flight.request_dump()
+
+            metrics.lap("frame", t_frame)
+            metrics.frame_done()
+            if metrics.due():
+                dropped = grabber.dropped
+                out.metrics(metrics.summary(dropped=dropped - dropped_reported))
+                dropped_reported = dropped
+            out.flush()
+    finally:
+        # also on KeyboardInterrupt / errors: buffered recordings get flushed
+        if not grabber.stop(release=True):
+            print("Capture thread did not stop: camera not released", file=sys.stderr)
+        if pool is not None:
+            pool.close()
+            print(f"Worker pool: workers={pool.workers} lost={pool.lost}", file=sys.stderr)
+        if publisher is not None:
+            publisher.close()
+        if preview is not None:
+            preview.close()
+        if diag is not None:
+            # reports the rows of an open recording itself
+            diag.close()
+        if lm_rec is not None:
+            lm_rec.close()
+            print(f"Saved {lm_rec.frames} landmark frames to {lm_rec.path}", file=sys.stderr)
+        st = grabber.stats()
+        # stdout is the event channel: end-of-run summaries go to stderr
+        print(f"Capture stats: captured={st['captured']} processed={st['processed']} dropped={st['dropped']}", file=sys.stderr)
+        if motion_gate:
+            print(f"Motion gate: inferred={hd.inferred} skipped={hd.skipped}", file=sys.stderr)
+        if renderer is not None:
+            renderer.close()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Gesture detector")
     parser.add_argument("--cam", type=int, default=None, help="Camera index to use (default: auto-detect built-in)")
+    parser.add_argument("--daemon", action="store_true", help="Stay resident with the model loaded; start/pause/resume/reconfigure/shutdown over --socket (see daemon.py)")
+    parser.add_argument("--socket", default=None, help="Control socket path for --daemon (default: <tmpdir>/gesture_control.sock)")
+    parser.add_argument("--cams", default=None, help="Comma-separated camera indices/sources, one worker process each (e.g. 0,1); merged event stream, headless")
+    parser.add_argument("--cam-dedup", type=float, default=0.3, help="With --cams, merge the cameras' start/end transitions and drop one-shot events (wave) seen by another camera within this many seconds (0 = off)")
     parser.add_argument("--save-cam", action="store_true", help="Save the chosen --cam index to ~/.gesture_control.json for future runs")
     parser.add_argument("--wave-permissive", action="store_true", help="Enable very permissive wave detection (more sensitive)")
     parser.add_argument("--headless", action="store_true", help="Run without opening the OpenCV window")
+    parser.add_argument("--render-fps", type=float, default=30.0, help="Max refresh rate of the OpenCV window (0 = every frame)")
     parser.add_argument("--emit-popup-debug", action="store_true", help="Emit popup-identical debug lines over stdout (throttled)")
+    parser.add_argument("--events", choices=("text", "jsonl"), default="text", help="Event output format on stdout (jsonl = versioned JSON lines)")
+    parser.add_argument("--level-events", action="store_true", help="Emit every pose on every frame it is held (no start/end transitions)")
+    parser.add_argument("--debounce-frames", type=int, default=3, help="Frames a pose must be held before its start event")
+    parser.add_argument("--debounce-ms", type=float, default=0.0, help="Also require a pose to be held this many ms before its start event (0 = frames only)")
+    parser.add_argument("--hold-interval", type=float, default=0.0, help="Seconds between hold heartbeats of an active pose (0 = none)")
     parser.add_argument("--emit-wave-dbg", action="store_true", help="Emit [WAVE_DBG] lines over stdout (noisy)")
+    parser.add_argument("--detect-width", type=int, default=0, help="Downscale frames to this width before MediaPipe (0 = full resolution)")
+    parser.add_argument("--roi", action="store_true", help="Track hands and run MediaPipe only on a crop around them")
+    parser.add_argument("--workers", type=int, default=1, help="Run MediaPipe in N worker processes (pipelined, frame order preserved)")
+    parser.add_argument("--motion-gate", action="store_true", help="Skip MediaPipe on static frames (hold/extrapolate the last hands)")
+    parser.add_argument("--max-skip", type=int, default=5, help="With --motion-gate, max consecutive frames without inference")
+    parser.add_argument("--metrics-interval", type=float, default=5.0, help="Seconds between EV METRICS stage-timing lines (0 disables)")
+    parser.add_argument("--diag", metavar="PATH", default=None, help="Stream per-hand diagnostics to PATH from the start (read with diagnostics.py)")
+    parser.add_argument("--flight-seconds", type=float, default=30.0, help="Keep the last N seconds of diagnostics in memory, dumped on SIGUSR1 or 'f' (0 disables)")
+    parser.add_argument("--publish-frames", metavar="PATH", nargs="?", const=FRAME_RING_PATH, default=None, help=f"Publish frames to a shared-memory ring for local previews (default path {FRAME_RING_PATH})")
+    parser.add_argument("--publish-fps", type=float, default=15.0, help="Max rate of --publish-frames (0 = every frame)")
+    parser.add_argument("--publish-overlay", action="store_true", help="Draw landmarks and HUD on the published frames")
+    parser.add_argument("--preview", metavar="PORT", type=int, nargs="?", const=8090, default=None, help="Serve an annotated MJPEG preview on http://<preview-host>:PORT/ (default port 8090)")
+    parser.add_argument("--preview-host", default="127.0.0.1", help="Address the --preview server binds to")
+    parser.add_argument("--preview-fps", type=float, default=15.0, help="Max frame rate of the --preview stream")
+    parser.add_argument("--width", type=int, default=None, help="Capture width to request (with --height; default: saved profile / driver default)")
+    parser.add_argument("--height", type=int, default=None, help="Capture height to request")
+    parser.add_argument("--fps", type=float, default=None, help="Capture frame rate to request")
+    parser.add_argument("--fourcc", default=None, help="Capture codec to request, e.g. MJPG")
+    parser.add_argument("--buffer-size", type=int, default=None, help="Driver frame buffer depth (default 1; 0 = driver default)")
+    parser.add_argument("--auto-tune", metavar="BUDGET_MS", type=float, nargs="?", const=33.3, default=0.0, help="Step the capture resolution down until decode + inference fits BUDGET_MS per frame (default 33.3); saved with the camera config")
+    parser.add_argument("--record-landmarks", metavar="PATH", default=None, help="Record the raw landmark stream to PATH (replay with replay.py)")
     args = parser.parse_args()
     # If user passed --save-cam together with --cam, persist it
     if args.save_cam and args.cam is not None:
-        cfg_path = os.path.expanduser("~/.gesture_control.json")
         try:
-            with open(cfg_path, "w") as f:
-                json.dump({"cam_index": int(args.cam)}, f)
-            print(f"Saved preferred camera index {args.cam} to {cfg_path}")
+            save_config({"cam_index": int(args.cam)})
+            print(f"Saved preferred camera index {args.cam} to {CONFIG_PATH}")
         except Exception as e:
             print(f"Failed to save config: {e}")
 
+    if args.daemon:
+        from daemon import DEFAULT_SOCKET, DaemonSettings, GestureDaemon
+
+        GestureDaemon(
+            args.socket or DEFAULT_SOCKET,
+            DaemonSettings(
+                cam_index=args.cam,
+                wave_permissive=args.wave_permissive,
+                emit_popup_debug=args.emit_popup_debug,
+                level_events=args.level_events,
+                debounce_frames=args.debounce_frames,
+                debounce_ms=args.debounce_ms,
+                hold_interval_s=args.hold_interval,
+                detect_width=args.detect_width,
+                roi_tracking=args.roi,
+                metrics_interval=args.metrics_interval,
+                publish_frames=args.publish_frames,
+                publish_fps=args.publish_fps,
+                publish_overlay=args.publish_overlay,
+            ),
+            event_format=args.events,
+            flight_seconds=args.flight_seconds,
+        ).serve_forever()
+        sys.exit(0)
+
+    if args.cams:
+        run_multicam(
+            parse_sources(args.cams),
+            dedup_window_s=args.cam_dedup,
+            event_format=args.events,
+            wave_permissive=args.wave_permissive,
+            detect_width=args.detect_width,
+            roi_tracking=args.roi,
+            level_events=args.level_events,
+            debounce_frames=args.debounce_frames,
+            debounce_ms=args.debounce_ms,
+            hold_interval_s=args.hold_interval,
+        )
+        sys.exit(0)
+
     main(
         args.cam,
         wave_permissive=args.wave_permissive,
         show_ui=(not args.headless),
         emit_popup_debug=args.emit_popup_debug,
         emit_wave_dbg=args.emit_wave_dbg,
+        record_landmarks=args.record_landmarks,
+        metrics_interval=args.metrics_interval,
+        detect_width=args.detect_width,
+        roi_tracking=args.roi,
+        motion_gate=args.motion_gate,
+        max_skip=args.max_skip,
+        render_fps=args.render_fps,
+        event_format=args.events,
+        level_events=args.level_events,
+        debounce_frames=args.debounce_frames,
+        debounce_ms=args.debounce_ms,
+        hold_interval_s=args.hold_interval,
+        workers=args.workers,
+        diag_path=args.diag,
+        flight_seconds=args.flight_seconds,
+        publish_path=args.publish_frames,
+        publish_fps=args.publish_fps,
+        publish_overlay=args.publish_overlay,
+        preview_port=args.preview,
+        preview_host=args.preview_host,
+        preview_fps=args.preview_fps,
+        capture_width=args.width,
+        capture_height=args.height,
+        capture_fps=args.fps,
+        fourcc=args.fourcc,
+        buffer_size=args.buffer_size,
+        auto_tune_ms=args.auto_tune,
     )
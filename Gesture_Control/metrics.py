@@ -0,0 +1,126 @@
+import math
+import time
+from typing import Any, Dict, Iterable, Optional
+
+
+class RollingHistogram:
+    """Log-bucketed latency histogram (seconds), cheap enough for every frame.
+
+    Buckets are spaced `per_octave` per doubling between `lo` and `hi`, so
+    percentiles are accurate to a few percent. `reset()` starts a new window.
+    """
+
+    def __init__(self, lo: float = 1e-6, hi: float = 10.0, per_octave: int = 8):
+        self.lo = lo
+        self.per_octave = per_octave
+        self._k = per_octave / math.log(2.0)
+        self.nbuckets = int(math.ceil(math.log2(hi / lo) * per_octave)) + 1
+        self.counts = [0] * self.nbuckets
+        self.n = 0
+        self.total = 0.0
+
+    def add(self, v: float) -> None:
+        if v <= self.lo:
+            i = 0
+        else:
+            i = int(math.log(v / self.lo) * self._k)
+            if i >= self.nbuckets:
+                i = self.nbuckets - 1
+        self.counts[i] += 1
+        self.n += 1
+        self.total += v
+
+    def percentile(self, q: float) -> float:
+        if self.n == 0:
+            return 0.0
+        target = q / 100.0 * self.n
+        acc = 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target and c:
+                # geometric middle of the bucket
+                return self.lo * 2.0 ** ((i + 0.5) / self.per_octave)
+        return self.lo * 2.0 ** ((self.nbuckets - 0.5) / self.per_octave)
+
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    def reset(self) -> None:
+        self.counts = [0] * self.nbuckets
+        self.n = 0
+        self.total = 0.0
+
+
+class StageMetrics:
+    """Per-stage timings of the frame loop, summarized as `EV METRICS` lines.
+
+    Usage:
+        t = metrics.clock()
+        ...stage work...
+        t = metrics.lap("flip", t)
+    """
+
+    def __init__(self, stages: Iterable[str] = (), interval_s: float = 5.0):
+        self.interval_s = float(interval_s)
+        self.hists: Dict[str, RollingHistogram] = {s: RollingHistogram() for s in stages}
+        self.frames = 0
+        self._window_start = time.perf_counter()
+
+    @staticmethod
+    def clock() -> float:
+        return time.perf_counter()
+
+    def lap(self, stage: str, t0: float) -> float:
+        now = time.perf_counter()
+        h = self.hists.get(stage)
+        if h is None:
+            h = self.hists[stage] = RollingHistogram()
+        h.add(now - t0)
+        return now
+
+    def add(self, stage: str, dt: float) -> None:
+        """Record a duration measured elsewhere (e.g. in a worker process)."""
+        h = self.hists.get(stage)
+        if h is None:
+            h = self.hists[stage] = RollingHistogram()
+        h.add(dt)
+
+    def frame_done(self) -> None:
+        self.frames += 1
+
+    def due(self) -> bool:
+        return self.interval_s > 0 and (time.perf_counter() - self._window_start) >= self.interval_s
+
+    def summary(self, dropped: Optional[int] = None) -> Dict[str, Any]:
+        """Summarize the current window and start a new one.
+
+        Stage values are [p50, p95, p99] in milliseconds.
+        """
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        out: Dict[str, Any] = {"fps": self.frames / elapsed if elapsed > 0 else 0.0, "frames": self.frames}
+        if dropped is not None:
+            out["dropped"] = dropped
+        stages = {}
+        for name, h in list(self.hists.items()):
+            if h.n == 0:
+                continue
+            stages[name] = [h.percentile(50) * 1e3, h.percentile(95) * 1e3, h.percentile(99) * 1e3]
+            h.reset()
+        out["stages"] = stages
+        self.frames = 0
+        self._window_start = now
+        return out
+
+    def format_line(self, dropped: Optional[int] = None) -> str:
+        return format_metrics_line(self.summary(dropped))
+
+
+def format_metrics_line(summary: Dict[str, Any]) -> str:
+    """EV METRICS fps=<f> frames=<n> [dropped=<n>] <stage>_ms=<p50>/<p95>/<p99> ..."""
+    parts = [f"fps={summary['fps']:.1f}", f"frames={summary['frames']}"]
+    if "dropped" in summary:
+        parts.append(f"dropped={summary['dropped']}")
+    for name, (p50, p95, p99) in summary["stages"].items():
+        parts.append(f"{name}_ms={p50:.2f}/{p95:.2f}/{p99:.2f}")
+    return "EV METRICS " + " ".join(parts)
@@ -0,0 +1,109 @@
+from typing import Any, List, Optional
+import numpy as np
+
+from hand_detector import HandObs, HandsPacket
+
+
+class MotionGatedDetector:
+    """Skip MediaPipe on static frames.
+
+    Wraps a HandDetector with the same `process(frame, ts)` interface. A tiny
+    grayscale thumbnail of every frame is compared with the one of the last
+    inferred frame; inference only runs when the scene changed, when tracked
+    hands are moving fast, or after `max_skip` consecutive skipped frames (so
+    WaveTracker never sees a gap longer than that). In between the last
+    HandsPacket is held, or extrapolated with the landmark velocity.
+    """
+
+    def __init__(
+        self,
+        detector: Any,
+        *,
+        diff_thr: float = 2.0,
+        velocity_thr: float = 0.5,
+        max_skip: int = 5,
+        extrapolate: bool = True,
+        max_extrapolate_s: float = 0.1,
+        thumb_size: tuple = (64, 36),
+    ):
+        self.detector = detector
+        self.diff_thr = float(diff_thr)  # mean abs gray-level difference (0..255)
+        self.velocity_thr = float(velocity_thr)  # landmark speed, normalized units / s
+        self.max_skip = int(max_skip)
+        self.extrapolate = bool(extrapolate)
+        self.max_extrapolate_s = float(max_extrapolate_s)
+        self.thumb_size = thumb_size
+        import cv2  # the wrapped detector needs it anyway
+
+        self._cv2 = cv2
+
+        self._ref_thumb: Optional[np.ndarray] = None
+        self._last: Optional[HandsPacket] = None
+        self._velocity: Optional[np.ndarray] = None
+        self._skipped = 0
+
+        self.inferred = 0
+        self.skipped = 0
+
+    def _thumb(self, frame_bgr: Any) -> np.ndarray:
+        cv2 = self._cv2
+        small = cv2.resize(frame_bgr, self.thumb_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def _needs_inference(self, thumb: np.ndarray) -> bool:
+        if self._last is None or self._ref_thumb is None:
+            return True
+        if self._skipped >= self.max_skip:
+            return True
+        if self._velocity is not None and float(np.abs(self._velocity).max()) >= self.velocity_thr:
+            return True
+        return float(np.abs(thumb - self._ref_thumb).mean()) >= self.diff_thr
+
+    def process(self, frame_bgr: Any, ts: float, seq: int = 0, mono: float = 0.0) -> Optional[HandsPacket]:
+        thumb = self._thumb(frame_bgr)
+        if self._needs_inference(thumb):
+            hp = self.detector.process(frame_bgr, ts, seq, mono)
+            if hp is None:
+                # pipelined detector still filling up
+                return None
+            self._update_velocity(hp)
+            self._ref_thumb = thumb
+            self._last = hp
+            self._skipped = 0
+            self.inferred += 1
+            return hp
+
+        self._skipped += 1
+        self.skipped += 1
+        return self._predict(frame_bgr, ts, seq, mono)
+
+    def drain(self) -> List[HandsPacket]:
+        """Packets still inside a pipelined detector (end of stream)."""
+        drain = getattr(self.detector, "drain", None)
+        packets = drain() if drain is not None else []
+        if packets:
+            self._last = packets[-1]
+        return packets
+
+    def _update_velocity(self, hp: HandsPacket) -> None:
+        prev = self._last
+        self._velocity = None
+        if prev is None or len(prev.hands) == 0 or len(prev.hands) != len(hp.hands):
+            return
+        if [h.handedness for h in prev.hands] != [h.handedness for h in hp.hands]:
+            return
+        dt = hp.ts - prev.ts
+        if dt <= 1e-6:
+            return
+        self._velocity = (hp.landmarks - prev.landmarks) / dt
+
+    def _predict(self, frame_bgr: Any, ts: float, seq: int, mono: float) -> HandsPacket:
+        last = self._last
+        arr = last.landmarks
+        if self.extrapolate and self._velocity is not None:
+            dt = min(ts - last.ts, self.max_extrapolate_s)
+            arr = np.clip(arr + self._velocity * dt, 0.0, 1.0).astype(np.float32)
+        else:
+            arr = arr.copy()
+        hands = [HandObs(landmarks=arr[i], handedness=h.handedness, score=h.score) for i, h in enumerate(last.hands)]
+        return HandsPacket(hands=hands, ts=ts, frame_bgr=frame_bgr, landmarks=arr, seq=seq, mono=mono)
@@ -0,0 +1,191 @@
+import multiprocessing as mp
+import queue
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+from gestures import GestureEvent
+from protocol import EventWriter
+
+
+def parse_sources(spec: str) -> List[Any]:
+    """"0,1,rtsp://..." -> [0, 1, "rtsp://..."] (ints are camera indices)."""
+    out: List[Any] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        out.append(int(part) if part.isdigit() else part)
+    return out
+
+
+def _camera_worker(cam_id: str, source: Any, cfg: Dict[str, Any], out_q: Any, stop: Any) -> None:
+    # heavy imports live in the worker: every camera owns its own pipeline
+    import cv2
+    from capture import FrameGrabber
+    from gesture_detector import EdgeTracker, GestureDetector
+    from hand_detector import HandDetector
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    cap = cv2.VideoCapture(source)
+    if cap is None or not cap.isOpened():
+        out_q.put(("error", cam_id, f"Unable to open camera {source!r}"))
+        return
+
+    hd = HandDetector(detect_width=cfg.get("detect_width", 0), roi_tracking=cfg.get("roi_tracking", False))
+    edges = None if cfg.get("level_events") else EdgeTracker(debounce_frames=cfg.get("debounce_frames", 3), debounce_ms=cfg.get("debounce_ms", 0.0), hold_interval_s=cfg.get("hold_interval_s", 0.0))
+    gd = GestureDetector(wave_permissive=cfg.get("wave_permissive", False), edges=edges)
+    grabber = FrameGrabber(cap).start()
+    out_q.put(("ready", cam_id, str(source)))
+    try:
+        while not stop.is_set():
+            cf = grabber.read(timeout=0.5)
+            if cf is None:
+                if grabber.ended:
+                    break
+                continue
+            frame = cv2.flip(cf.frame_bgr, 1)
+            hp = hd.process(frame, cf.ts, cf.seq, cf.mono)
+            events, _, _ = gd.process(hp.hands, cf.ts)
+            batch = [(ev.name, ev.hand, ev.confidence, ev.ts, ev.payload, ev.phase) for ev in events if ev.name != "count"]
+            if batch:
+                out_q.put(("events", cam_id, hp.seq, hp.mono, batch))
+    finally:
+        grabber.stop(release=True)
+        st = grabber.stats()
+        out_q.put(("stopped", cam_id, st))
+
+
+class CrossCameraDedup:
+    """Merges the per-camera event streams into one stream of transitions.
+
+    A (hand, name) pose is active while at least one camera holds it: its
+    `start` goes out when the first camera starts it, its `end` when the last
+    camera holding it ends, and `hold` heartbeats come from one owner camera
+    (handed over when the owner ends first). One-shot events (pulses like
+    wave, level events) are dropped when another camera reported the same
+    (hand, name, phase) within `window_s` seconds. `window_s` <= 0 passes
+    everything through unchanged.
+    """
+
+    def __init__(self, window_s: float = 0.3):
+        self.window_s = float(window_s)
+        # (hand, name) -> cameras holding it, the first one is the owner
+        self._active: Dict[Tuple[str, str], List[str]] = {}
+        self._last: Dict[Tuple[str, str, str], Tuple[str, float]] = {}
+        self.dropped = 0
+
+    def accept(self, cam_id: str, ev: GestureEvent) -> bool:
+        if self.window_s <= 0:
+            return True
+        if ev.phase in ("start", "hold", "end"):
+            ok = self._transition(cam_id, ev)
+        else:
+            key = (ev.hand, ev.name, ev.phase)
+            prev = self._last.get(key)
+            ok = prev is None or prev[0] == cam_id or abs(ev.ts - prev[1]) > self.window_s
+            if ok:
+                self._last[key] = (cam_id, ev.ts)
+        if not ok:
+            self.dropped += 1
+        return ok
+
+    def _transition(self, cam_id: str, ev: GestureEvent) -> bool:
+        key = (ev.hand, ev.name)
+        cams = self._active.get(key)
+        if ev.phase == "start":
+            if cams is None:
+                self._active[key] = [cam_id]
+                return True
+            if cam_id not in cams:
+                cams.append(cam_id)
+            return False
+        if cams is None or cam_id not in cams:
+            # a camera we never saw start it (or already ended)
+            return False
+        if ev.phase == "hold":
+            return cams[0] == cam_id
+        cams.remove(cam_id)
+        if cams:
+            return False
+        del self._active[key]
+        return True
+
+    def release(self, cam_id: str, ts: float) -> List[GestureEvent]:
+        """A camera went away: its poses end, and the `end` events of those
+        it was the last one holding are returned for forwarding."""
+        ends: List[GestureEvent] = []
+        for (hand, name), cams in list(self._active.items()):
+            if cam_id in cams:
+                ends.append(GestureEvent(name=name, hand=hand, confidence=0.0, ts=ts, payload={}, phase="end"))
+        return [ev for ev in ends if self._transition(cam_id, ev)]
+
+
+def run_multicam(
+    sources: Sequence[Any],
+    *,
+    dedup_window_s: float = 0.3,
+    event_format: str = "jsonl",
+    **cfg: Any,
+) -> None:
+    """One worker process per camera, events merged into a single stream.
+
+    Every camera has its own HandDetector/GestureDetector state. Events carry
+    the camera id (`cam` field in jsonl; text lines keep the historical
+    format). No OpenCV window in this mode.
+    """
+    ctx = mp.get_context("spawn")
+    out_q = ctx.Queue()
+    stop = ctx.Event()
+    procs = []
+    for i, src in enumerate(sources):
+        cam_id = f"cam{i}"
+        p = ctx.Process(target=_camera_worker, args=(cam_id, src, cfg, out_q, stop), name=f"camera-{cam_id}", daemon=True)
+        p.start()
+        procs.append(p)
+
+    # the backend stops us with SIGTERM: shut the workers down cleanly so
+    # they release their cameras
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    out = EventWriter(sys.stdout, event_format)
+    dedup = CrossCameraDedup(dedup_window_s)
+    alive = len(procs)
+    try:
+        while alive > 0:
+            try:
+                msg = out_q.get(timeout=0.5)
+            except queue.Empty:
+                if stop.is_set():
+                    break
+                continue
+            kind, cam_id = msg[0], msg[1]
+            if kind == "events":
+                seq, captured = msg[2], msg[3]
+                for name, hand, conf, ts, payload, phase in msg[4]:
+                    ev = GestureEvent(name=name, hand=hand, confidence=conf, ts=ts, payload=payload, phase=phase)
+                    if dedup.accept(cam_id, ev):
+                        out.gesture(ev, seq, cam=cam_id, captured=captured)
+                out.flush()
+            elif kind == "ready":
+                print(f"Camera {cam_id} opened ({msg[2]})", file=sys.stderr)
+            elif kind == "error":
+                print(msg[2], file=sys.stderr)
+                alive -= 1
+            elif kind == "stopped":
+                for ev in dedup.release(cam_id, time.time()):
+                    out.gesture(ev, cam=cam_id)
+                out.flush()
+                st = msg[2]
+                print(f"Camera {cam_id} stopped: captured={st['captured']} processed={st['processed']} dropped={st['dropped']}", file=sys.stderr)
+                alive -= 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for p in procs:
+            p.join(timeout=3.0)
+            if p.is_alive():
+                p.terminate()
+        print(f"Cross-camera dedup dropped {dedup.dropped} events", file=sys.stderr)
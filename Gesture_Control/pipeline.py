@@ -0,0 +1,224 @@
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from hand_detector import HandObs, HandsPacket
+
+
+def _worker_main(idx: int, shm_name: str, shape: Tuple[int, ...], slots: int, tasks: Any, results: Any, hd_kwargs: Dict[str, Any]) -> None:
+    # imported here: every worker builds its own MediaPipe graph
+    from hand_detector import HandDetector
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((slots,) + tuple(shape), dtype=np.uint8, buffer=shm.buf)
+    hd = HandDetector(**hd_kwargs)
+    hd.warm_up(tuple(shape))
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            seq, slot, ts = task
+            t0 = time.perf_counter()
+            hp = hd.process(ring[slot], ts)
+            dt = time.perf_counter() - t0
+            results.put((seq, hp.landmarks, [h.handedness for h in hp.hands], [h.score for h in hp.hands], dt, idx))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        del ring
+        shm.close()
+
+
+class ParallelHandDetector:
+    """HandDetector fanned out over N worker processes.
+
+    Frames are copied once into a shared-memory ring and handed to the
+    workers round-robin; each worker owns its own MediaPipe graph, so N
+    frames are in inference at the same time. Results are put back in
+    submission order (bounded reorder window) before they reach the
+    GestureDetector.
+
+    `process(frame, ts, seq, mono)` is pipelined: it returns the packet of an
+    earlier frame (in order), or None while the pipeline fills. The returned
+    packet carries that frame, its timestamp and its capture seq / mono, so
+    use `hp.seq`, not the seq of the frame just submitted. At the end of the
+    stream `drain()` returns the frames still in flight. Note that each worker only sees
+    every Nth frame, so MediaPipe's own tracking re-detects more often than
+    with a single detector.
+    """
+
+    def __init__(self, workers: int = 2, *, reorder_window: int = 8, result_timeout_s: float = 1.0, metrics: Optional[Any] = None, **hd_kwargs: Any):
+        self.workers = max(1, int(workers))
+        # frames in flight: a couple per worker keeps all of them busy
+        self.depth = 2 * self.workers
+        # ring slots: a spare one per worker, so a frame given up on keeps its
+        # slot (a slow worker may still be reading it) without stalling the rest
+        self.slots = self.depth + self.workers
+        self.reorder_window = max(1, int(reorder_window))
+        self.result_timeout_s = float(result_timeout_s)
+        self._metrics = metrics
+        self._hd_kwargs = hd_kwargs
+
+        self._ctx = mp.get_context("spawn")
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._ring: Optional[np.ndarray] = None
+        self._procs: List[Any] = []
+        self._tasks: List[Any] = []
+        self._results = None
+
+        self._next_submit = 0
+        self._next_release = 0
+        self._frames: Dict[int, Tuple[Any, float, int, float]] = {}
+        self._done: Dict[int, tuple] = {}
+        self._free: List[int] = []
+        self._slot_of: Dict[int, int] = {}
+
+        self.lost = 0
+
+    def _start(self, shape: Tuple[int, ...]) -> None:
+        nbytes = int(np.prod(shape)) * self.slots
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self._ring = np.ndarray((self.slots,) + tuple(shape), dtype=np.uint8, buffer=self._shm.buf)
+        self._free = list(range(self.slots))
+        self._slot_of = {}
+        self._results = self._ctx.Queue()
+        for i in range(self.workers):
+            q = self._ctx.Queue()
+            p = self._ctx.Process(
+                target=_worker_main,
+                args=(i, self._shm.name, shape, self.slots, q, self._results, self._hd_kwargs),
+                name=f"hand-worker-{i}",
+                daemon=True,
+            )
+            p.start()
+            self._tasks.append(q)
+            self._procs.append(p)
+
+    def warm_up(self, shape: Tuple[int, ...]) -> None:
+        """Start the workers now (they build and warm their graphs in parallel)
+        instead of on the first frame."""
+        if self._shm is None:
+            self._start(tuple(shape))
+
+    def _store(self, res: tuple) -> None:
+        # any result, late ones included, means the worker is done with the slot
+        slot = self._slot_of.pop(res[0], None)
+        if slot is not None:
+            self._free.append(slot)
+        # late results for frames already given up on are ignored
+        if res[0] >= self._next_release:
+            self._done[res[0]] = res
+
+    def _poll(self) -> None:
+        try:
+            while True:
+                self._store(self._results.get_nowait())
+        except queue.Empty:
+            pass
+
+    def _wait_for(self, seq: int) -> None:
+        deadline = time.monotonic() + self.result_timeout_s
+        while seq not in self._done:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                self._store(self._results.get(timeout=remaining))
+            except queue.Empty:
+                return
+
+    def _take_slot(self) -> Optional[int]:
+        # a slot is only reused once the worker that read it has answered
+        if not self._free:
+            self._poll()
+        deadline = time.monotonic() + self.result_timeout_s
+        while not self._free:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                self._store(self._results.get(timeout=remaining))
+            except queue.Empty:
+                return None
+        return self._free.pop()
+
+    def _release(self) -> Optional[HandsPacket]:
+        seq = self._next_release
+        res = self._done.pop(seq, None)
+        frame, ts, cap_seq, mono = self._frames.pop(seq)
+        self._next_release += 1
+        if res is None:
+            self.lost += 1
+            return None
+        _, arr, handed, scores, dt, _ = res
+        if self._metrics is not None:
+            self._metrics.add("mediapipe", dt)
+        hands = [HandObs(landmarks=arr[i], handedness=handed[i], score=scores[i]) for i in range(len(handed))]
+        return HandsPacket(hands=hands, ts=ts, frame_bgr=frame, landmarks=arr, seq=cap_seq, mono=mono)
+
+    def process(self, frame_bgr: Any, ts: float, seq: int = 0, mono: float = 0.0) -> Optional[HandsPacket]:
+        if self._shm is not None and self._next_submit == 0 and frame_bgr.shape != self._ring.shape[1:]:
+            # warmed up with the size the camera reported, but frames differ
+            self.close()
+        if self._shm is None:
+            self._start(frame_bgr.shape)
+        if frame_bgr.shape != self._ring.shape[1:]:
+            raise ValueError(f"frame shape changed from {self._ring.shape[1:]} to {frame_bgr.shape}")
+
+        slot = self._take_slot()
+        if slot is None:
+            # every slot still held by stuck workers: drop this frame
+            self.lost += 1
+        else:
+            n = self._next_submit
+            self._next_submit += 1
+            self._ring[slot] = frame_bgr
+            self._frames[n] = (frame_bgr, ts, seq, mono)
+            self._slot_of[n] = slot
+            self._tasks[n % self.workers].put((n, slot, ts))
+
+        self._poll()
+        if self._next_submit - self._next_release >= self.depth:
+            # pipeline full: wait for the oldest frame before taking more
+            self._wait_for(self._next_release)
+            return self._release()
+        if self._next_release in self._done:
+            return self._release()
+        if len(self._done) >= self.reorder_window:
+            # out-of-order results piling up behind a missing one: give up on it
+            return self._release()
+        return None
+
+    def drain(self) -> List[HandsPacket]:
+        """Wait for the frames still in flight and return them in order
+        (end of stream; frames lost to a timeout are skipped)."""
+        packets: List[HandsPacket] = []
+        while self._next_release < self._next_submit:
+            self._wait_for(self._next_release)
+            hp = self._release()
+            if hp is not None:
+                packets.append(hp)
+        return packets
+
+    def close(self) -> None:
+        for q in self._tasks:
+            try:
+                q.put(None)
+            except Exception:
+                pass
+        for p in self._procs:
+            p.join(timeout=2.0)
+            if p.is_alive():
+                p.terminate()
+        self._procs = []
+        self._tasks = []
+        if self._shm is not None:
+            self._ring = None
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
@@ -0,0 +1,286 @@
+"""Local MJPEG preview of the annotated camera frames (main.py --preview).
+
+The frame loop only hands over a reference to its newest frame (`offer()`),
+and only when somebody is watching and a frame is due. Drawing, resizing
+and JPEG encoding happen on a small pool of encoder threads (OpenCV releases
+the GIL while it works), and each HTTP client thread sends the newest JPEG
+when its socket is free: a slow client skips frames instead of queueing them,
+and never slows down the others or the detection loop.
+
+Adaptation, re-evaluated once per second:
+  - frame rate: at most max_fps, at most what the fastest client can take
+    (measured per-frame write time), and at most what max_cpu core worth of
+    encoding allows at the measured encode cost;
+  - resolution: steps down (1 -> 0.75 -> 0.5) when the typical client can
+    not keep up or there are many clients, and back up when they can.
+
+    http://127.0.0.1:8090/             viewer page
+    http://127.0.0.1:8090/stream.mjpg  multipart MJPEG stream
+    http://127.0.0.1:8090/snapshot.jpg newest frame
+"""
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence
+
+SCALES = (1.0, 0.75, 0.5)
+MANY_CLIENTS = 4
+_BOUNDARY = "gcframe"
+_PAGE = b"""<!doctype html><title>gesture preview</title>
+<body style="margin:0;background:#111"><img src="/stream.mjpg" style="display:block;margin:auto;max-width:100%"></body>"""
+
+
+@dataclass(slots=True)
+class _Pending:
+    number: int
+    frame: Any
+    hands: Sequence[Any]
+    hud_text: str
+    total: int
+
+
+@dataclass(slots=True)
+class _Client:
+    addr: str
+    write_s: float = 0.0  # EMA of the time to write one frame
+    sent: int = 0
+    skipped: int = 0
+
+
+def _ema(old: float, new: float, k: float = 0.2) -> float:
+    return new if old <= 0.0 else old + k * (new - old)
+
+
+class PreviewServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8090, max_fps: float = 15.0, quality: int = 70, workers: int = 2, max_cpu: float = 0.5, metrics: Optional[Any] = None):
+        self.max_fps = float(max_fps)
+        self.quality = int(quality)
+        self.workers = max(1, int(workers))
+        self.max_cpu = float(max_cpu)
+        self._metrics = metrics
+
+        self._cond = threading.Condition()
+        self._pending: Optional[_Pending] = None
+        self._offered = 0
+        self._jpeg: Optional[bytes] = None
+        self._jpeg_number = 0
+        self._clients: Dict[int, _Client] = {}
+        self._closed = False
+
+        self.fps = self.max_fps
+        self.scale = 1.0
+        self.encode_s = 0.0
+        self.encoded = 0
+        self.dropped = 0  # offered but replaced before an encoder got to it
+        self._next_due = 0.0
+        self._next_adapt = 0.0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                server._serve(self)
+
+        self._httpd = ThreadingHTTPServer((host, int(port)), Handler)
+        self._httpd.daemon_threads = True
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def start(self) -> "PreviewServer":
+        t = threading.Thread(target=self._httpd.serve_forever, name="preview-http", daemon=True)
+        t.start()
+        self._threads.append(t)
+        for i in range(self.workers):
+            t = threading.Thread(target=self._encode_loop, name=f"preview-enc-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    # -- frame loop side (must stay cheap) ----------------------------------
+
+    def want(self) -> bool:
+        """True when a frame should be offered now (someone watching, frame due)."""
+        return bool(self._clients) and time.perf_counter() >= self._next_due
+
+    def offer(self, frame: Any, hands: Sequence[Any] = (), hud_text: str = "", total: int = 0) -> None:
+        """Hand the newest frame to the encoders. `frame` is read later, on
+        another thread: the caller must not draw on it afterwards."""
+        now = time.perf_counter()
+        self._next_due = now + (1.0 / self.fps if self.fps > 0 else 0.0)
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._offered += 1
+            self._pending = _Pending(self._offered, frame, hands, hud_text, total)
+            self._cond.notify_all()
+
+    # -- encoders --------------------------------------------------------------
+
+    def _encode_loop(self) -> None:
+        import cv2
+
+        from camera import CameraUI
+
+        ui = CameraUI()  # per thread: it caches the rendered HUD panel
+        ui.debug = False
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job, self._pending = self._pending, None
+                scale = self.scale
+
+            t = time.perf_counter()
+            frame = job.frame
+            if scale < 1.0:
+                h, w = frame.shape[:2]
+                img = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+            else:
+                img = frame.copy()
+            for hand in job.hands:
+                if hand.handedness in ("left", "right"):
+                    ui.draw_hand(img, hand.landmarks, hand.handedness)
+            ui.draw_hud(img, job.hud_text, job.total)
+            ok, buf = cv2.imencode(".jpg", img, (cv2.IMWRITE_JPEG_QUALITY, self.quality))
+            dt = time.perf_counter() - t
+            if self._metrics is not None:
+                self._metrics.add("preview_encode", dt)
+            if not ok:
+                continue
+            with self._cond:
+                self.encode_s = _ema(self.encode_s, dt)
+                self.encoded += 1
+                # with several encoders frames can finish out of order
+                if job.number > self._jpeg_number:
+                    self._jpeg, self._jpeg_number = buf.tobytes(), job.number
+                    self._cond.notify_all()
+            self._adapt()
+
+    def _adapt(self) -> None:
+        now = time.perf_counter()
+        if now < self._next_adapt:
+            return
+        self._next_adapt = now + 1.0
+        with self._cond:
+            caps = sorted(1.0 / c.write_s for c in self._clients.values() if c.write_s > 0.0)
+            n_clients = len(self._clients)
+            encode_s = self.encode_s
+        fps = self.max_fps
+        if encode_s > 0.0:
+            fps = min(fps, self.max_cpu / encode_s)
+        if caps:
+            fps = min(fps, caps[-1])
+            typical = caps[len(caps) // 2]
+            i = SCALES.index(self.scale)
+            if (typical < 0.5 * self.max_fps or n_clients > MANY_CLIENTS) and i + 1 < len(SCALES):
+                self.scale = SCALES[i + 1]
+            elif typical > 2.0 * self.max_fps and n_clients <= MANY_CLIENTS and i > 0:
+                self.scale = SCALES[i - 1]
+        self.fps = max(1.0, fps)
+
+    # -- HTTP ------------------------------------------------------------------
+
+    def _serve(self, req: BaseHTTPRequestHandler) -> None:
+        path = req.path.split("?", 1)[0]
+        if path == "/":
+            req.send_response(200)
+            req.send_header("Content-Type", "text/html")
+            req.send_header("Content-Length", str(len(_PAGE)))
+            req.end_headers()
+            req.wfile.write(_PAGE)
+        elif path == "/snapshot.jpg":
+            self._snapshot(req)
+        elif path == "/stream.mjpg":
+            self._stream(req)
+        else:
+            req.send_error(404)
+
+    def _wait_jpeg(self, after: int, timeout: float) -> Optional[tuple]:
+        with self._cond:
+            self._cond.wait_for(lambda: self._closed or self._jpeg_number > after, timeout)
+            if self._closed or self._jpeg_number <= after:
+                return None
+            return self._jpeg_number, self._jpeg
+
+    def _snapshot(self, req: BaseHTTPRequestHandler) -> None:
+        key = id(req)
+        # a snapshot is a client for one frame (encoders only run when watched)
+        with self._cond:
+            self._clients[key] = _Client(addr=req.client_address[0])
+            # the cached JPEG may be from before anyone watched: wait for a newer one
+            after = self._jpeg_number
+        try:
+            got = self._wait_jpeg(after, 2.0)
+        finally:
+            with self._cond:
+                self._clients.pop(key, None)
+        if got is None:
+            req.send_error(503, "no frame yet")
+            return
+        req.send_response(200)
+        req.send_header("Content-Type", "image/jpeg")
+        req.send_header("Content-Length", str(len(got[1])))
+        req.send_header("Cache-Control", "no-store")
+        req.end_headers()
+        req.wfile.write(got[1])
+
+    def _stream(self, req: BaseHTTPRequestHandler) -> None:
+        req.send_response(200)
+        req.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={_BOUNDARY}")
+        req.send_header("Cache-Control", "no-store")
+        req.end_headers()
+        req.connection.settimeout(10.0)  # a stuck client goes away instead of lingering
+        key = id(req)
+        client = _Client(addr=req.client_address[0])
+        with self._cond:
+            self._clients[key] = client
+        last = 0
+        try:
+            while True:
+                got = self._wait_jpeg(last, 1.0)
+                if got is None:
+                    if self._closed:
+                        break
+                    continue
+                number, jpeg = got
+                if last:
+                    client.skipped += number - last - 1
+                t = time.perf_counter()
+                req.wfile.write(
+                    f"--{_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n"
+                )
+                req.wfile.flush()
+                client.write_s = _ema(client.write_s, time.perf_counter() - t)
+                client.sent += 1
+                last = number
+        except OSError:
+            pass  # client went away
+        finally:
+            with self._cond:
+                self._clients.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            clients = [{"addr": c.addr, "sent": c.sent, "skipped": c.skipped, "write_ms": c.write_s * 1e3} for c in self._clients.values()]
+        return {"fps": self.fps, "scale": self.scale, "encode_ms": self.encode_s * 1e3, "encoded": self.encoded, "dropped": self.dropped, "clients": clients}
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,117 @@
+"""Event output towards the Node backend.
+
+Two wire formats:
+- "text": the historical `EV GESTURE <hand> <name>` / `EV POPUP ...` /
+  `EV METRICS ...` lines (gesture hold/end transitions become
+  `EV GESTURE_HOLD` / `EV GESTURE_END`)
+- "jsonl": one JSON object per line, versioned (`"v"`), with typed fields:
+  {"v": 1, "type": "gesture", "seq": 812, "ts": 1760000000.123,
+   "mono": 5321.004, "capture_mono": 5320.962, "hand": "left",
+   "name": "peace", "conf": 0.93, "payload": {}, "phase": "start"}
+  `ts` is the capture time of the frame (wall clock), `mono` the monotonic
+  time the object was written and `capture_mono` the monotonic time the
+  frame was captured: `mono - capture_mono` is the capture-to-event latency.
+  other types: "popup", "metrics", "startup", "capture", "state" (daemon mode). With several cameras (multicam.py)
+  gesture objects also carry `"cam": "cam0"`.
+
+Events are buffered and everything produced for one frame goes out with a
+single write + flush, so a reader never sees a frame half written.
+"""
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional, TextIO
+
+from metrics import format_metrics_line
+
+PROTOCOL_VERSION = 1
+FORMATS = ("text", "jsonl")
+
+# start / pulse keep the historical line so old consumers still react to them
+_TEXT_TAGS = {"hold": "EV GESTURE_HOLD", "end": "EV GESTURE_END"}
+
+_dumps = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+
+class EventWriter:
+    def __init__(self, stream: Optional[TextIO] = None, fmt: str = "text"):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown event format {fmt!r} (expected one of {FORMATS})")
+        self.stream = stream if stream is not None else sys.stdout
+        self.fmt = fmt
+        self._buf: List[str] = []
+
+    def _obj(self, type_: str, ts: Optional[float], seq: Optional[int], **fields: Any) -> None:
+        obj: Dict[str, Any] = {"v": PROTOCOL_VERSION, "type": type_}
+        if seq is not None:
+            obj["seq"] = seq
+        if ts is not None:
+            obj["ts"] = ts
+        obj["mono"] = time.monotonic()
+        obj.update(fields)
+        self._buf.append(_dumps(obj))
+
+    def gesture(self, ev: Any, seq: Optional[int] = None, cam: Optional[str] = None, captured: Optional[float] = None) -> None:
+        """`captured`: time.monotonic() when the frame was captured (CapturedFrame.mono)."""
+        if self.fmt == "jsonl":
+            extra: Dict[str, Any] = {}
+            if captured is not None:
+                extra["capture_mono"] = captured
+            if cam is not None:
+                extra["cam"] = cam
+            self._obj("gesture", ev.ts, seq, hand=ev.hand, name=ev.name, conf=ev.confidence, payload=ev.payload, phase=ev.phase or "frame", **extra)
+            return
+        # text lines stay camera-less: legacy parsers take everything after the hand as the name
+        tag = _TEXT_TAGS.get(ev.phase, "EV GESTURE")
+        h = (ev.hand or "").strip().lower()
+        self._buf.append(f"{tag} {h} {ev.name}" if h else f"{tag} {ev.name}")
+
+    def popup(self, hands: Dict[str, str], count: int, last_event: str, debug: bool, ts: Optional[float] = None) -> None:
+        """Same parameters the OpenCV window shows (per-hand keypoints + HUD)."""
+        if self.fmt == "jsonl":
+            self._obj("popup", ts, None, hands=hands, count=count, last_event=last_event, debug=debug)
+            return
+        for handed, txt in hands.items():
+            self._buf.append(f"EV POPUP HAND {handed} {txt}")
+        self._buf.append(f"EV POPUP HUD count=count={count}")
+        if last_event:
+            self._buf.append(f"EV POPUP HUD last_event={last_event}")
+        self._buf.append(f"EV POPUP HUD debug={'ON' if debug else 'OFF'} (press D)")
+
+    def metrics(self, summary: Dict[str, Any]) -> None:
+        if self.fmt == "jsonl":
+            self._obj("metrics", None, None, **summary)
+            return
+        self._buf.append(format_metrics_line(summary))
+
+    def startup(self, timings: Dict[str, float]) -> None:
+        """Startup phase timings in ms (once, when the first frame is through)."""
+        if self.fmt == "jsonl":
+            self._obj("startup", None, None, **timings)
+            return
+        self._buf.append("EV STARTUP " + " ".join(f"{k}={v:.1f}" for k, v in timings.items()))
+
+    def capture(self, info: Dict[str, Any]) -> None:
+        """Negotiated capture properties (see capture_config.py)."""
+        if self.fmt == "jsonl":
+            self._obj("capture", None, None, **info)
+            return
+        parts = [f"{k}={info[k]}" for k in ("width", "height", "fps", "fourcc", "buffer_size") if k in info]
+        if info.get("ignored"):
+            parts.append("ignored=" + ",".join(info["ignored"]))
+        self._buf.append("EV CAPTURE " + " ".join(parts))
+
+    def state(self, state: str) -> None:
+        """Daemon state change (idle / running / paused / stopped)."""
+        if self.fmt == "jsonl":
+            self._obj("state", None, None, state=state)
+            return
+        self._buf.append(f"EV STATE {state}")
+
+    def flush(self) -> None:
+        if not self._buf:
+            return
+        self._buf.append("")
+        self.stream.write("\n".join(self._buf))
+        self.stream.flush()
+        self._buf.clear()
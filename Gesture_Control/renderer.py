@@ -0,0 +1,49 @@
+import time
+from typing import Any, List, Optional
+
+from camera import CameraUI
+
+
+class Renderer:
+    """Optional OpenCV preview window.
+
+    Drawing and imshow/waitKey only happen here, at most `max_fps` times per
+    second, so the detection loop does no render work in headless mode and
+    is not slowed down by the window when it runs faster than the cap.
+    """
+
+    def __init__(self, ui: CameraUI, max_fps: float = 30.0, window: str = "gesture_detector", metrics: Optional[Any] = None):
+        self.ui = ui
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.window = window
+        self._metrics = metrics
+        self._last_render = 0.0
+        import cv2  # the window is the only user of highgui
+
+        self._cv2 = cv2
+
+    def due(self) -> bool:
+        return (time.perf_counter() - self._last_render) >= self.min_interval
+
+    def render(self, frame: Any, hands: List[Any], hud_text: str, count_total: int) -> int:
+        """Draw overlays on `frame`, show it and return the pressed key (0xFF if none)."""
+        self._last_render = time.perf_counter()
+        m = self._metrics
+        t = m.clock() if m is not None else 0.0
+        for h in hands:
+            if h.handedness in ("left", "right"):
+                self.ui.draw_hand(frame, h.landmarks, h.handedness)
+        if m is not None:
+            t = m.lap("draw_hand", t)
+        self.ui.draw_hud(frame, hud_text, count_total)
+        if m is not None:
+            t = m.lap("draw_hud", t)
+        cv2 = self._cv2
+        cv2.imshow(self.window, frame)
+        k = cv2.waitKey(1) & 0xFF
+        if m is not None:
+            m.lap("show", t)
+        return k
+
+    def close(self) -> None:
+        self._cv2.destroyAllWindows()
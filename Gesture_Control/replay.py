@@ -0,0 +1,68 @@
+import argparse
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from gesture_detector import EdgeTracker, GestureDetector
+from landmark_log import load_recording, iter_frames
+
+
+def replay(path: str, wave_permissive: bool = False, repeat: int = 1, print_events: bool = False, edges: bool = False) -> dict:
+    """Feed a landmark recording through GestureDetector as fast as possible."""
+    rec = load_recording(path)
+    # decode once up front so the timing below only measures the detector
+    frames = list(iter_frames(rec))
+    if not frames:
+        raise ValueError(f"{path}: recording is empty")
+
+    lat = np.empty(len(frames) * repeat, dtype=np.float64)
+    counts: Counter = Counter()
+    k = 0
+    t_start = time.perf_counter()
+    for _ in range(repeat):
+        gd = GestureDetector(wave_permissive=wave_permissive, edges=EdgeTracker() if edges else None)
+        for ts, hands in frames:
+            t0 = time.perf_counter()
+            events, _, _ = gd.process(hands, ts)
+            lat[k] = time.perf_counter() - t0
+            k += 1
+            for ev in events:
+                if ev.name == "count":
+                    continue
+                counts[(ev.hand, ev.name, ev.phase)] += 1
+                if print_events:
+                    phase = f" {ev.phase}" if ev.phase else ""
+                    sys.stdout.write(f"EV GESTURE {ev.ts:.6f} {ev.hand} {ev.name}{phase}\n")
+    elapsed = time.perf_counter() - t_start
+
+    p50, p95, p99 = np.percentile(lat * 1e6, [50, 95, 99])
+    return {
+        "frames": int(k),
+        "elapsed_s": elapsed,
+        "fps": k / elapsed if elapsed > 0 else 0.0,
+        "p50_us": float(p50),
+        "p95_us": float(p95),
+        "p99_us": float(p99),
+        "max_us": float(lat.max() * 1e6),
+        "events": counts,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a landmark recording through GestureDetector at max speed")
+    parser.add_argument("recording", help="File written by main.py --record-landmarks")
+    parser.add_argument("--wave-permissive", action="store_true", help="Enable very permissive wave detection (more sensitive)")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the recording N times (fresh detector each pass)")
+    parser.add_argument("--edges", action="store_true", help="Run the start/hold/end EdgeTracker like main.py does")
+    parser.add_argument("--events", action="store_true", help="Print the produced event stream (EV GESTURE <ts> <hand> <name> [phase])")
+    args = parser.parse_args()
+
+    st = replay(args.recording, wave_permissive=args.wave_permissive, repeat=max(1, args.repeat), print_events=args.events, edges=args.edges)
+    print(
+        f"frames={st['frames']} elapsed={st['elapsed_s']:.3f}s fps={st['fps']:.0f} "
+        f"p50={st['p50_us']:.1f}us p95={st['p95_us']:.1f}us p99={st['p99_us']:.1f}us max={st['max_us']:.1f}us"
+    )
+    for (hand, name, phase), n in sorted(st["events"].items()):
+        print(f"  {hand:>5} {name:<14} {phase:<6} {n}")
@@ -0,0 +1,213 @@
+"""Synthetic 21-point hands for tests, benchmarks and load tests.
+
+Hands are built in a hand-local frame (wrist at the origin, fingers towards
++y, units of palm size) from a per-finger extended/curled pattern, then
+tilted, scaled, mirrored for the left hand and placed in normalized image
+coordinates. The geometry satisfies the same rules hand_geometry() applies
+(tip vs PIP/MCP distance from the wrist, thumb pointing outwards), so every
+pose in POSES is classified as the gesture listed in POSE_GESTURE.
+
+HandStream adds time: pose changes, parametric waves, jitter, occlusion
+dropouts and handedness flips. `generate()` mixes several streams into
+(ts, hands) frames, the same shape replay.py feeds GestureDetector.
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from hand_detector import NUM_LANDMARKS
+
+# thumb, index, middle, ring, pinky (1 = extended)
+POSES: Dict[str, Tuple[int, int, int, int, int]] = {
+    "open_palm": (1, 1, 1, 1, 1),
+    "fist": (0, 0, 0, 0, 0),
+    "thumbs_up": (1, 0, 0, 0, 0),
+    "middle_finger": (0, 0, 1, 0, 0),
+    "peace": (0, 1, 1, 0, 0),
+    "rock": (0, 1, 0, 0, 1),
+    "shaka": (1, 0, 0, 0, 1),
+    "count_1": (0, 1, 0, 0, 0),
+    "count_3": (0, 1, 1, 1, 0),
+    "count_4": (0, 1, 1, 1, 1),
+}
+
+# static gesture GestureDetector should report for each pose (None = only a count)
+POSE_GESTURE: Dict[str, Optional[str]] = {
+    "open_palm": "open_palm",
+    "fist": None,
+    "thumbs_up": "thumbs_up",
+    "middle_finger": "middle_finger",
+    "peace": "peace",
+    "rock": "rock",
+    "shaka": "yolo",
+    "count_1": None,
+    "count_3": None,
+    "count_4": None,
+}
+
+# hand-local layout of a right hand as seen in the (mirrored) image: x to the
+# pinky side, y from the wrist towards the fingers, in units of palm size
+# (wrist -> middle MCP = 1)
+_MCP = np.array([[-0.35, 0.95], [0.0, 1.0], [0.3, 0.92], [0.55, 0.8]])
+_DIRS = np.array([[-0.15, 1.0], [0.0, 1.0], [0.12, 1.0], [0.25, 1.0]])
+_EXTENDED = (0.45, 0.75, 1.0)  # PIP, DIP, TIP distance from the MCP along the finger
+_THUMB_CMC = (-0.3, 0.3)
+_THUMB_MCP = (-0.55, 0.5)
+_THUMB = {
+    "out": ((-0.85, 0.65), (-1.1, 0.75)),  # IP, TIP: sideways, away from the palm
+    "up": ((-0.6, 0.85), (-0.8, 1.2)),  # thumbs up (tip still outwards)
+    "in": ((-0.35, 0.55), (-0.2, 0.5)),  # folded over the palm
+}
+
+
+def _local_hand(fingers: Sequence[int], thumb_up: bool = False) -> np.ndarray:
+    pts = np.zeros((NUM_LANDMARKS, 2))
+    pts[1] = _THUMB_CMC
+    pts[2] = _THUMB_MCP
+    pts[3], pts[4] = _THUMB["in" if not fingers[0] else ("up" if thumb_up else "out")]
+    for k in range(4):
+        base = 5 + 4 * k
+        mcp = _MCP[k]
+        d = _DIRS[k] / np.linalg.norm(_DIRS[k])
+        pts[base] = mcp
+        if fingers[k + 1]:
+            for j, r in enumerate(_EXTENDED):
+                pts[base + 1 + j] = mcp + d * r
+        else:
+            # curled: up to the PIP, then back down into the palm
+            pts[base + 1] = mcp + d * 0.4
+            pts[base + 2] = mcp + d * 0.3 + np.array([0.0, -0.1])
+            pts[base + 3] = mcp + np.array([0.0, -0.15])
+    return pts
+
+
+_LOCAL = {name: _local_hand(f, thumb_up=(name == "thumbs_up")) for name, f in POSES.items()}
+
+
+def make_hand(
+    pose: str,
+    handedness: str = "right",
+    *,
+    center: Tuple[float, float] = (0.5, 0.6),
+    scale: float = 0.12,
+    tilt: float = 0.0,
+    jitter: float = 0.0,
+    rng: Optional[np.random.Generator] = None,
+) -> np.ndarray:
+    """(21, 2) float32 normalized landmarks of `pose`; `center` is the wrist,
+    `scale` the wrist -> middle MCP distance, `tilt` a rotation in radians."""
+    local = _LOCAL[pose]
+    c, s = math.cos(tilt), math.sin(tilt)
+    x = local[:, 0] * c - local[:, 1] * s
+    y = local[:, 0] * s + local[:, 1] * c
+    if handedness == "left":
+        x = -x
+    out = np.empty((NUM_LANDMARKS, 2))
+    out[:, 0] = center[0] + x * scale
+    out[:, 1] = center[1] - y * scale  # image y grows downwards
+    if jitter > 0:
+        rng = rng if rng is not None else np.random.default_rng()
+        out += rng.normal(0.0, jitter, out.shape)
+    return out.astype(np.float32)
+
+
+@dataclass(slots=True)
+class SynthHand:
+    landmarks: np.ndarray
+    handedness: str
+    score: float
+
+
+class HandStream:
+    """One simulated hand over time.
+
+    Holds a pose for hold_s seconds, then picks another one; with probability
+    wave_prob the next segment is a wave (open palm swinging at wave_hz with
+    wave_amp palm sizes of amplitude). dropout starts an occlusion of
+    dropout_frames frames; flip_prob mislabels the handedness for one frame.
+    """
+
+    def __init__(
+        self,
+        handedness: str = "right",
+        *,
+        poses: Sequence[str] = tuple(POSES),
+        hold_s: Tuple[float, float] = (0.6, 1.5),
+        wave_prob: float = 0.2,
+        wave_hz: float = 2.5,
+        wave_amp: float = 0.8,
+        scale: Tuple[float, float] = (0.09, 0.15),
+        jitter: float = 0.002,
+        dropout: float = 0.01,
+        dropout_frames: Tuple[int, int] = (1, 8),
+        flip_prob: float = 0.002,
+        seed: Optional[int] = None,
+    ):
+        self.handedness = handedness
+        self.poses = list(poses)
+        self.hold_s = hold_s
+        self.wave_prob = wave_prob
+        self.wave_hz = wave_hz
+        self.wave_amp = wave_amp
+        self.scale_range = scale
+        self.jitter = jitter
+        self.dropout = dropout
+        self.dropout_frames = dropout_frames
+        self.flip_prob = flip_prob
+        self.rng = np.random.default_rng(seed)
+
+        self.pose = self.poses[0]
+        self.waving = False
+        self._until = -1.0
+        self._hidden = 0
+        self._x0 = 0.35 if handedness == "left" else 0.65
+        self._scale = sum(scale) / 2
+        self._tilt = 0.0
+
+    def _next_segment(self, ts: float) -> None:
+        rng = self.rng
+        self.waving = rng.random() < self.wave_prob
+        self.pose = "open_palm" if self.waving else self.poses[int(rng.integers(len(self.poses)))]
+        self._until = ts + rng.uniform(*self.hold_s)
+        self._scale = rng.uniform(*self.scale_range)
+        self._tilt = rng.uniform(-0.25, 0.25)
+
+    def step(self, ts: float) -> Optional[SynthHand]:
+        """The hand at time `ts` (None while occluded)."""
+        rng = self.rng
+        if ts >= self._until:
+            self._next_segment(ts)
+        if self._hidden > 0:
+            self._hidden -= 1
+            return None
+        if rng.random() < self.dropout:
+            self._hidden = int(rng.integers(self.dropout_frames[0], self.dropout_frames[1] + 1)) - 1
+            return None
+
+        x = self._x0
+        if self.waving:
+            x += self.wave_amp * self._scale * math.sin(2.0 * math.pi * self.wave_hz * ts)
+        lms = make_hand(self.pose, self.handedness, center=(x, 0.65), scale=self._scale, tilt=self._tilt, jitter=self.jitter, rng=rng)
+        handed = self.handedness
+        if rng.random() < self.flip_prob:
+            handed = "left" if handed == "right" else "right"
+        return SynthHand(landmarks=lms, handedness=handed, score=float(rng.uniform(0.7, 0.99)))
+
+
+def generate(
+    n_frames: int,
+    fps: float = 30.0,
+    hands: Sequence[str] = ("left", "right"),
+    seed: int = 0,
+    t0: float = 0.0,
+    **stream_kwargs: object,
+) -> Iterator[Tuple[float, List[SynthHand]]]:
+    """Yield (ts, hands) frames from one HandStream per entry of `hands`."""
+    streams = [HandStream(h, seed=seed * 1000 + i, **stream_kwargs) for i, h in enumerate(hands)]
+    dt = 1.0 / fps
+    for i in range(n_frames):
+        ts = t0 + i * dt
+        frame = [h for h in (s.step(ts) for s in streams) if h is not None]
+        yield ts, frame
@@ -0,0 +1,63 @@
+"""BatchGestureDetector gives the same results as one GestureDetector per session.
+
+    python -m pytest -q test_batch_detector.py
+"""
+import random
+
+import pytest
+
+from batch_detector import BatchGestureDetector
+from gesture_detector import EdgeTracker, GestureDetector
+from synthetic import generate
+
+SESSIONS = 12
+FRAMES = 2500
+
+
+def _events(evs: list) -> list:
+    return [(e.name, e.hand, e.confidence, e.ts, e.payload, e.phase) for e in evs]
+
+
+def _per_hand(ph: dict) -> dict:
+    return {k: (v.handedness, v.score, v.states, v.count, v.center, v.wave, v.gestures) for k, v in ph.items()}
+
+
+@pytest.mark.parametrize("edges", [False, True], ids=["level", "edges"])
+def test_batch_matches_per_session_detectors(edges: bool) -> None:
+    # every 4th session sees a duplicate right hand (a second person, or a
+    # mislabelled handedness) so some batches repeat a (session, hand) slot
+    streams = [
+        list(generate(FRAMES, seed=s, hands=("left", "right", "right") if s % 4 == 0 else ("left", "right"), wave_prob=0.5, flip_prob=0.02))
+        for s in range(SESSIONS)
+    ]
+    make_edges = (lambda: EdgeTracker(hold_interval_s=0.5)) if edges else None
+    singles = [GestureDetector(edges=make_edges() if edges else None) for _ in range(SESSIONS)]
+    # small capacity: the slot storage has to grow while running
+    batch = BatchGestureDetector(edges=make_edges, capacity=2)
+    rnd = random.Random(1)
+
+    compared = waves = 0
+    for f in range(FRAMES):
+        # ~10% of the sessions skip each frame (camera hiccup, dropped frame)
+        active = [s for s in range(SESSIONS) if rnd.random() < 0.9]
+        rows = [(s, h) for s in active for h in streams[s][f][1]]
+        rnd.shuffle(rows)
+        out = batch.process_batch(
+            [(s, h.landmarks, h.handedness, h.score, streams[s][f][0]) for s, h in rows],
+            {s: streams[s][f][0] for s in active},
+        )
+        assert set(out) == set(active)
+        for s in active:
+            ts = streams[s][f][0]
+            # the single detector sees the session's hands in the batch row order
+            ev1, ph1, total1 = singles[s].process([h for sid, h in rows if sid == s], ts)
+            ev2, ph2, total2 = out[s]
+            assert _events(ev2) == _events(ev1), (s, f)
+            assert _per_hand(ph2) == _per_hand(ph1), (s, f)
+            assert total2 == total1, (s, f)
+            compared += 1
+            waves += sum(e.name == "wave" for e in ev1)
+
+    assert compared > 0.85 * SESSIONS * FRAMES
+    # the streams must actually exercise the wave state, not only static poses
+    assert waves > 0
@@ -0,0 +1,31 @@
+"""Every synthetic pose is classified as the gesture synthetic.POSE_GESTURE lists.
+
+    python -m pytest -q test_gesture_registry.py
+"""
+import numpy as np
+import pytest
+
+from gesture_registry import DEFAULT_REGISTRY, finger_masks
+from gestures import hand_geometry
+from synthetic import POSE_GESTURE, POSES, make_hand
+
+
+def _classify(pose: str, handedness: str, tilt: float) -> list:
+    lms = make_hand(pose, handedness, tilt=tilt)
+    states, _, _ = hand_geometry(lms[None].astype(np.float64), (handedness,))
+    assert tuple(int(v) for v in states[0]) == POSES[pose]
+    return [s.name for s in DEFAULT_REGISTRY.classify(int(finger_masks(states)[0]), lms)]
+
+
+@pytest.mark.parametrize("handedness", ["left", "right"])
+@pytest.mark.parametrize("tilt", [0.0, -0.3, 0.3])
+@pytest.mark.parametrize("pose", sorted(POSES))
+def test_pose_classified_as_listed(pose: str, handedness: str, tilt: float) -> None:
+    expected = POSE_GESTURE[pose]
+    assert _classify(pose, handedness, tilt) == ([expected] if expected else [])
+
+
+def test_every_pose_has_an_expected_gesture() -> None:
+    assert set(POSE_GESTURE) == set(POSES)
+    listed = {g for g in POSE_GESTURE.values() if g}
+    assert listed <= {s.name for s in DEFAULT_REGISTRY.specs}
@@ -0,0 +1,112 @@
+const fs = require("fs");
+const os = require("os");
+const path = require("path");
+
+// Reader for the Python frame ring (Gesture_Control/frame_ring.py): a file
+// with a 64-byte header and N slots, each slot a 64-byte header followed by
+// raw BGR pixels. Node has no mmap, so the newest slot is read with pread
+// straight into a reused buffer; the per-slot "gen" sequence lock is checked
+// before and after, a frame rewritten meanwhile is discarded.
+const MAGIC = "GCFR";
+const VERSION = 1;
+const HEADER_SIZE = 64;
+const SLOT_HEADER = 64;
+const DEFAULT_PATH =
+  process.env.GESTURE_FRAMES ||
+  path.join(fs.existsSync("/dev/shm") ? "/dev/shm" : os.tmpdir(), "gesture_control.frames");
+
+class FrameRingReader {
+  constructor(file = DEFAULT_PATH) {
+    this.path = file;
+    this.fd = null;
+    this.ino = null;
+    this.hdr = Buffer.alloc(HEADER_SIZE);
+    this.slotHdr = Buffer.alloc(SLOT_HEADER);
+    this.buf = Buffer.alloc(0);
+  }
+
+  _open() {
+    let st;
+    try {
+      st = fs.statSync(this.path);
+    } catch {
+      return false;
+    }
+    if (this.fd !== null && st.ino === this.ino) return true;
+    this.close();
+    if (st.size < HEADER_SIZE) return false;
+    const fd = fs.openSync(this.path, "r");
+    fs.readSync(fd, this.hdr, 0, HEADER_SIZE, 0);
+    if (this.hdr.toString("latin1", 0, 4) !== MAGIC || this.hdr.readUInt16LE(4) !== VERSION) {
+      fs.closeSync(fd);
+      return false;
+    }
+    this.fd = fd;
+    this.ino = st.ino;
+    this.slots = this.hdr.readUInt16LE(6);
+    this.stride = this.hdr.readUInt32LE(12);
+    return true;
+  }
+
+  _gen(base) {
+    fs.readSync(this.fd, this.slotHdr, 0, 8, base);
+    return this.slotHdr.readBigUInt64LE(0);
+  }
+
+  // Newest complete frame newer than `after`, or null. `data` is reused by
+  // the next call: copy it if it must outlive that.
+  latest(after = 0) {
+    if (!this._open()) return null;
+    fs.readSync(this.fd, this.hdr, 0, 8, 16);
+    const n = Number(this.hdr.readBigUInt64LE(0));
+    if (n === 0 || n <= after) return null;
+    const base = HEADER_SIZE + (n % this.slots) * this.stride;
+    fs.readSync(this.fd, this.slotHdr, 0, SLOT_HEADER, base);
+    const h = this.slotHdr;
+    if (h.readBigUInt64LE(0) !== BigInt(2 * n)) return null;
+    const frame = {
+      number: n,
+      ts: h.readDoubleLE(8),
+      width: h.readUInt32LE(16),
+      height: h.readUInt32LE(20),
+      channels: h.readUInt16LE(24),
+      flags: h.readUInt16LE(26),
+      seq: Number(h.readBigUInt64LE(32))
+    };
+    const nbytes = h.readUInt32LE(28);
+    if (this.buf.length < nbytes) this.buf = Buffer.alloc(nbytes);
+    fs.readSync(this.fd, this.buf, 0, nbytes, base + SLOT_HEADER);
+    if (this._gen(base) !== BigInt(2 * n)) return null;
+    frame.data = this.buf.subarray(0, nbytes);
+    return frame;
+  }
+
+  close() {
+    if (this.fd !== null) fs.closeSync(this.fd);
+    this.fd = null;
+    this.ino = null;
+  }
+}
+
+// BGR frame -> BMP file (top-down rows, no conversion; browsers show it as is).
+function toBmp(frame) {
+  const { width, height, channels, data } = frame;
+  if (channels !== 3) throw new Error(`unsupported channels: ${channels}`);
+  const row = width * 3;
+  const stride = (row + 3) & ~3;
+  const out = Buffer.alloc(54 + stride * height);
+  out.write("BM", 0, "latin1");
+  out.writeUInt32LE(out.length, 2);
+  out.writeUInt32LE(54, 10);
+  out.writeUInt32LE(40, 14);
+  out.writeInt32LE(width, 18);
+  out.writeInt32LE(-height, 22); // negative height = top-down rows
+  out.writeUInt16LE(1, 26);
+  out.writeUInt16LE(24, 28);
+  out.writeUInt32LE(stride * height, 34);
+  if (stride === row) data.copy(out, 54, 0, row * height);
+  else for (let y = 0; y < height; y++) data.copy(out, 54 + y * stride, y * row, (y + 1) * row);
+  return out;
+}
+
+module.exports = { FrameRingReader, toBmp, DEFAULT_FRAMES_PATH: DEFAULT_PATH };
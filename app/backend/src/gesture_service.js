@@ -1,26 +1,135 @@
 const { spawn } = require("child_process");
+const net = require("net");
+const os = require("os");
 const path = require("path");
+const { DEFAULT_FRAMES_PATH } = require("./frame_ring");
 
-function startGestureService(onLine) {
-  const scriptPath = path.join(__dirname, "../../../gesture_control/main.py");
+// Python writes newline-delimited JSON events (--events jsonl, protocol v1).
+// Each complete line is parsed once here and handed over as (line, msg);
+// plain text lines (prints, old "EV ..." format) come with msg = null.
+const PROTOCOL_VERSION = 1;
 
-  const proc = spawn("python3", ["-u", scriptPath, "--headless", "--emit-popup-debug"], {
-    stdio: ["ignore", "pipe", "pipe"]
-  });
+function parseEvent(line) {
+  if (line[0] !== "{") return null;
+  try {
+    const msg = JSON.parse(line);
+    if (msg && msg.v === PROTOCOL_VERSION && typeof msg.type === "string") return msg;
+  } catch {}
+  return null;
+}
 
-  proc.stdout.on("data", (buf) => {
-    buf.toString().split("\n").forEach((line) => {
+// Legacy text rendering of a structured event, only for the log and for the
+// frontend, which still understands the "EV ..." lines.
+function toLegacyLines(msg) {
+  if (msg.type === "gesture") {
+    const tag = { hold: "EV GESTURE_HOLD", end: "EV GESTURE_END" }[msg.phase] || "EV GESTURE";
+    return [msg.hand ? `${tag} ${msg.hand} ${msg.name}` : `${tag} ${msg.name}`];
+  }
+  if (msg.type === "popup") {
+    const lines = Object.entries(msg.hands || {}).map(([h, txt]) => `EV POPUP HAND ${h} ${txt}`);
+    lines.push(`EV POPUP HUD count=count=${msg.count}`);
+    if (msg.last_event) lines.push(`EV POPUP HUD last_event=${msg.last_event}`);
+    lines.push(`EV POPUP HUD debug=${msg.debug ? "ON" : "OFF"} (press D)`);
+    return lines;
+  }
+  if (msg.type === "metrics") {
+    const parts = [`fps=${Number(msg.fps).toFixed(1)}`, `frames=${msg.frames}`];
+    if (msg.dropped !== undefined) parts.push(`dropped=${msg.dropped}`);
+    for (const [name, p] of Object.entries(msg.stages || {})) {
+      parts.push(`${name}_ms=${p.map((v) => Number(v).toFixed(2)).join("/")}`);
+    }
+    return ["EV METRICS " + parts.join(" ")];
+  }
+  return [JSON.stringify(msg)];
+}
+
+// Split a stream into lines, keeping partial lines across chunk boundaries.
+function lineSplitter(onLine) {
+  let rest = "";
+  return (buf) => {
+    const parts = (rest + buf.toString()).split("\n");
+    rest = parts.pop();
+    parts.forEach((line) => {
       const s = line.trim();
       if (s) onLine(s);
     });
+  };
+}
+
+const SCRIPT_PATH = path.join(__dirname, "../../../gesture_control/main.py");
+const SOCKET_PATH = process.env.GESTURE_SOCKET || path.join(os.tmpdir(), "gesture_control.sock");
+
+function spawnPython(args, onLine) {
+  const proc = spawn("python3", ["-u", SCRIPT_PATH, ...args], {
+    stdio: ["ignore", "pipe", "pipe"]
   });
 
-  proc.stderr.on("data", (buf) => {
-    buf.toString().split("\n").forEach((line) => {
-      const s = line.trim();
-      if (s) onLine("PY_ERR " + s);
-    });
+  proc.stdout.on("data", lineSplitter((s) => onLine(s, parseEvent(s))));
+
+  proc.stderr.on("data", lineSplitter((s) => onLine("PY_ERR " + s, null)));
+  return proc;
+}
+
+// One request/reply over the daemon control socket (JSON lines).
+function sendCommand(cmd, fields = {}, socketPath = SOCKET_PATH) {
+  return new Promise((resolve, reject) => {
+    const sock = net.createConnection(socketPath);
+    sock.setTimeout(10000);
+    sock.on("connect", () => sock.write(JSON.stringify({ cmd, ...fields }) + "\n"));
+    sock.on("data", lineSplitter((s) => {
+      sock.end();
+      try {
+        resolve(JSON.parse(s));
+      } catch (err) {
+        reject(err);
+      }
+    }));
+    sock.on("timeout", () => sock.destroy(new Error(`gesture daemon: ${cmd} timed out`)));
+    sock.on("error", reject);
   });
+}
+
+// Resident Python process (main.py --daemon): the model stays loaded and
+// start/stop only attach/release the camera, in milliseconds.
+function startGestureDaemon(onLine) {
+  // frames (with overlay) go to the shared ring read by /api/preview.bmp
+  const proc = spawnPython(
+    ["--daemon", "--socket", SOCKET_PATH, "--emit-popup-debug", "--events", "jsonl", "--publish-frames", DEFAULT_FRAMES_PATH, "--publish-overlay"],
+    onLine
+  );
+  let exited = false;
+  proc.on("exit", () => (exited = true));
+
+  // the socket appears once the model is loaded: retry until it answers
+  async function command(cmd, fields = {}) {
+    for (let i = 0; ; i++) {
+      try {
+        return await sendCommand(cmd, fields);
+      } catch (err) {
+        if (exited || i >= 100 || (err.code !== "ENOENT" && err.code !== "ECONNREFUSED")) throw err;
+        await new Promise((r) => setTimeout(r, 100));
+      }
+    }
+  }
+
+  return {
+    command,
+    start: () => command("start"),
+    pause: () => command("pause"),
+    shutdown: () => command("shutdown").catch(() => proc.kill("SIGTERM")),
+    // synchronous: usable from signal and "exit" handlers (the daemon
+    // releases the camera and exits on SIGTERM)
+    kill: (signal = "SIGTERM") => {
+      if (!exited) proc.kill(signal);
+    },
+    exited: () => exited,
+    pid: proc.pid,
+    onExit: (cb) => proc.on("exit", cb)
+  };
+}
+
+function startGestureService(onLine) {
+  const proc = spawnPython(["--headless", "--emit-popup-debug", "--events", "jsonl"], onLine);
 
   return {
     stop: () => proc.kill("SIGTERM"),
@@ -29,4 +138,4 @@ function startGestureService(onLine) {
   };
 }
 
-module.exports = { startGestureService };
+module.exports = { startGestureService, startGestureDaemon, sendCommand, parseEvent, toLegacyLines };
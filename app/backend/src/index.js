@@ -4,7 +4,8 @@ const WebSocket = require("ws");
 const path = require("path");
 const { SerialPort } = require("serialport");
 const { ReadlineParser } = require("@serialport/parser-readline");
-const { startGestureService } = require("./gesture_service");
+const { startGestureDaemon, toLegacyLines } = require("./gesture_service");
+const { FrameRingReader, toBmp } = require("./frame_ring");
 
 const app = express();
 const server = http.createServer(app);
@@ -53,10 +54,10 @@ wss.on("connection", (ws) => {
   });
 });
 
+// Resident Python daemon (model loaded once); start/stop attach and release
+// the camera instead of respawning the process.
 let gestureProc = null;
-
-const lastTriggerByKey = new Map();
-const COOLDOWN_MS = Number(process.env.GESTURE_COOLDOWN_MS || 1000);
+let gestureState = "stopped";
 
 const gestureMap = {
   wave: "W\n",
@@ -66,64 +67,133 @@ const gestureMap = {
 };
 
 app.get("/api/gesture/status", (req, res) => {
-  res.json({ running: !!gestureProc, pid: gestureProc ? gestureProc.pid : null });
+  res.json({ running: gestureState === "running", state: gestureState, pid: gestureProc ? gestureProc.pid : null });
 });
 
-app.post("/api/gesture/start", (req, res) => {
-  if (gestureProc) return res.json({ ok: true, running: true, pid: gestureProc.pid });
-
-  gestureProc = startGestureService((line) => {
-    const clean = String(line).replace(/\r/g, "").trim();
-    if (!clean) return;
-
-    console.log("PY:", clean);
-    broadcast({ type: "py", line: clean });
-
-    if (!clean.startsWith("EV GESTURE ")) return;
-
-    const raw = clean.slice("EV GESTURE ".length).trim();
-    if (!raw) return;
-
-    // New format: "EV GESTURE <hand> <name...>"
-    // Old format: "EV GESTURE <name...>"
-    let hand = "";
-    let g = raw;
-    const m = raw.match(/^(left|right|both)\s+(.*)$/i);
-    if (m) {
-      hand = String(m[1] || "").toLowerCase();
-      g = String(m[2] || "").trim();
-    }
-    if (!g || g === "count") return;
-
-    const now = Date.now();
-    const key = `${hand || "none"}:${g}`;
-    const last = lastTriggerByKey.get(key) || 0;
-    if (now - last < COOLDOWN_MS) return;
-    lastTriggerByKey.set(key, now);
-
-    const cmd = gestureMap[g];
-    if (!cmd) {
-      console.log("Gesture non mappata:", g);
-      return;
-    }
-
-    console.log("GESTURE >", g, "-> TX SERIAL >", cmd.trim());
-    serial.write(cmd);
-  });
+// Latest camera frame published by Python (no second camera open)
+const frames = new FrameRingReader();
+app.get("/api/preview.bmp", (req, res) => {
+  // the daemon clears the ring when it releases the camera: no stale frame
+  const frame = frames.latest();
+  if (!frame) return res.status(204).set("X-Gesture-State", gestureState).end();
+  res.set({ "Content-Type": "image/bmp", "Cache-Control": "no-store", "X-Frame-Seq": String(frame.seq), "X-Gesture-State": gestureState });
+  res.send(toBmp(frame));
+});
+
+function onGestureLine(line, msg) {
+  if (msg) return onGestureEvent(msg);
+
+  const clean = String(line).replace(/\r/g, "").trim();
+  if (!clean) return;
+
+  console.log("PY:", clean);
+  broadcast({ type: "py", line: clean });
+
+  // plain text output (--events text): parse the legacy line
+  if (!clean.startsWith("EV GESTURE ")) return;
+
+  const raw = clean.slice("EV GESTURE ".length).trim();
+  if (!raw) return;
+
+  // New format: "EV GESTURE <hand> <name...>"
+  // Old format: "EV GESTURE <name...>"
+  let hand = "";
+  let g = raw;
+  const m = raw.match(/^(left|right|both)\s+(.*)$/i);
+  if (m) {
+    hand = String(m[1] || "").toLowerCase();
+    g = String(m[2] || "").trim();
+  }
+  sendGesture(hand, g);
+}
 
-  gestureProc.onExit((code) => {
-    broadcast({ type: "gesture", status: "stopped", code });
-    gestureProc = null;
+// Structured event (protocol v1): typed fields, no parsing needed. The
+// frontend still gets the legacy "EV ..." lines it understands.
+function onGestureEvent(msg) {
+  toLegacyLines(msg).forEach((legacy) => {
+    if (msg.type !== "popup" && msg.type !== "metrics") console.log("PY:", legacy);
+    broadcast({ type: "py", line: legacy });
   });
 
-  broadcast({ type: "gesture", status: "running", pid: gestureProc.pid });
-  res.json({ ok: true, running: true, pid: gestureProc.pid });
+  if (msg.type === "state") {
+    gestureState = msg.state;
+    broadcast({ type: "gesture", status: msg.state, pid: gestureProc ? gestureProc.pid : null });
+    return;
+  }
+  if (msg.type !== "gesture") return;
+  // Python debounces poses and reports transitions: react on start
+  // (and on one-shot pulses like wave), not on hold/end
+  if (msg.phase === "hold" || msg.phase === "end") return;
+  sendGesture(String(msg.hand || "").toLowerCase(), String(msg.name || ""));
+}
+
+function sendGesture(hand, g) {
+  if (!g || g === "count") return;
+
+  const cmd = gestureMap[g];
+  if (!cmd) {
+    console.log("Gesture non mappata:", g);
+    return;
+  }
+
+  console.log("GESTURE >", hand || "-", g, "-> TX SERIAL >", cmd.trim());
+  serial.write(cmd);
+}
+
+app.post("/api/gesture/start", async (req, res) => {
+  if (!gestureProc) {
+    const proc = startGestureDaemon(onGestureLine);
+    gestureProc = proc;
+    proc.onExit((code) => {
+      broadcast({ type: "gesture", status: "stopped", code });
+      if (gestureProc === proc) {
+        gestureProc = null;
+        gestureState = "stopped";
+      }
+    });
+  }
+  try {
+    const reply = await gestureProc.start();
+    if (!reply.ok) return res.status(500).json({ ok: false, error: reply.error });
+    res.json({ ok: true, running: true, pid: gestureProc.pid, attach_ms: reply.attach_ms });
+  } catch (err) {
+    res.status(500).json({ ok: false, error: err.message });
+  }
 });
 
-app.post("/api/gesture/stop", (req, res) => {
+app.post("/api/gesture/stop", async (req, res) => {
   if (!gestureProc) return res.json({ ok: true, running: false });
-  gestureProc.stop();
-  res.json({ ok: true, running: false });
+  try {
+    // keep the daemon (and the loaded model) around, just release the camera
+    await gestureProc.pause();
+    res.json({ ok: true, running: false });
+  } catch (err) {
+    res.status(500).json({ ok: false, error: err.message });
+  }
+});
+
+// Stop the daemon before exiting, or it outlives us holding the camera:
+// SIGTERM goes out right away, we exit once it is gone (or after a timeout).
+const SHUTDOWN_TIMEOUT_MS = 3000;
+let shuttingDown = false;
+
+function shutdownGesture() {
+  const proc = gestureProc;
+  if (shuttingDown || !proc || proc.exited()) process.exit(0);
+  shuttingDown = true;
+  proc.onExit(() => process.exit(0));
+  proc.kill("SIGTERM");
+  setTimeout(() => {
+    console.log("Gesture daemon did not exit, killing it");
+    proc.kill("SIGKILL");
+    process.exit(0);
+  }, SHUTDOWN_TIMEOUT_MS);
+}
+process.on("SIGINT", shutdownGesture);
+process.on("SIGTERM", shutdownGesture);
+// any other way out (uncaught error, process.exit): at least signal it
+process.on("exit", () => {
+  if (gestureProc) gestureProc.kill("SIGTERM");
 });
 
 server.listen(PORT, () => {